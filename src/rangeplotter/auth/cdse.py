@@ -8,20 +8,43 @@ storing only a refresh token (longer lived) once initially obtained.
 """
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass
+import hashlib
+import json
+import os
+import stat
 import time
-from typing import Optional
+import threading
+from typing import Any, Optional
 import sys
-import requests
 from pathlib import Path
-import re
+from urllib.parse import quote_plus, urlencode
+
+fcntl: Any
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: token cache works without a cross-process lock
+    fcntl = None
+
+# (connect, read) timeouts for token endpoint requests.
+_TOKEN_TIMEOUT = (5, 30)
+
+# Token responses are well under 2 KB; anything larger is an error page.
+_MAX_TOKEN_BODY = 8192
+
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+_ENV_KEY = "COPERNICUS_REFRESH_TOKEN"
 
 
 @dataclass
 class TokenInfo:
     access_token: str
     refresh_token: Optional[str]
-    expires_at: float
+    expires_at: float  # time.monotonic() based
+    safe_until: float = 0.0  # expires_at minus the early-refresh margin
+    expires_at_wall: float = 0.0  # time.time() based, for logging/persistence only
 
 
 class CdseAuth:
@@ -34,6 +57,8 @@ class CdseAuth:
         refresh_token: Optional[str] = None,
         early_refresh_seconds: int = 60,
         verbose: int = 0,
+        early_refresh_percent: float = 1.0,
+        token_cache_path: Optional[Path | str] = None,
     ):
         self.token_url = token_url.rstrip("/")
         self.client_id = client_id or "cdse-public"
@@ -43,6 +68,140 @@ class CdseAuth:
         self.early_refresh_seconds = early_refresh_seconds
         self.verbose = verbose
         self._token: Optional[TokenInfo] = None
+        # Pre-encoded form bodies; the password body is keyed on the credentials it encodes
+        self._rf_prefix: Optional[bytes] = None
+        self._pw_body: Optional[tuple[tuple[str, str], bytes]] = None
+        # Fraction of token lifetime after which a background refresh fires (1.0 = disabled)
+        self.early_refresh_percent = early_refresh_percent
+        self._lock = threading.Lock()
+        self._refresh_timer: Optional[threading.Timer] = None
+        # (st_mtime_ns, content) of the last .env read, to avoid re-reading unchanged files
+        self._env_cache: Optional[tuple[int, str]] = None
+        # Pooled session, created on first grant so importing this module stays cheap.
+        self._session = None
+        # Optional on-disk access token cache shared across CLI invocations (RPL_CDSE_NO_CACHE=1 disables)
+        self._cache_path: Optional[Path] = None
+        if token_cache_path is not None and os.environ.get("RPL_CDSE_NO_CACHE") != "1":
+            self._cache_path = Path(token_cache_path)
+            self._load_cached_token()
+
+    def _identity_fingerprint(self) -> str:
+        """Hash of the account the credentials belong to, so a cached token is never reused across accounts."""
+        identity = f"user:{self.username}" if self.username else f"refresh:{self.refresh_token or ''}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _load_cached_token(self) -> None:
+        """Adopt a still-valid access token persisted by a previous process."""
+        path = self._cache_path
+        assert path is not None
+        try:
+            data = json.loads(path.read_bytes())
+            if data.get("token_url") != self.token_url or data.get("client_id") != self.client_id:
+                return
+            if data.get("identity") != self._identity_fingerprint():
+                return
+            remaining = float(data["expires_at_wall"]) - time.time()
+            if remaining <= self.early_refresh_seconds:
+                return
+            self._token = self._make_token(data["access_token"], self.refresh_token, remaining)
+            self._log("Using cached CDSE access token.", level=2)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self._log(f"Ignoring unreadable token cache {path}: {e}", level=2)
+
+    def _save_cached_token(self, ti: TokenInfo) -> None:
+        """Persist the access token atomically with owner-only permissions."""
+        path = self._cache_path
+        assert path is not None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({
+                    "token_url": self.token_url,
+                    "client_id": self.client_id,
+                    "identity": self._identity_fingerprint(),
+                    "access_token": ti.access_token,
+                    "expires_at_wall": ti.expires_at_wall,
+                }, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self._log(f"Failed to write token cache {path}: {e}", is_error=True)
+
+    @contextmanager
+    def _cache_file_lock(self):
+        """Exclusive lock shared by every process using the same token cache.
+
+        Held around "re-read cache, else grant and save" so that a burst of CLI
+        invocations or pool workers results in one token exchange, not one each.
+        """
+        if self._cache_path is None or fcntl is None:
+            yield
+            return
+        lock_file = None
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(self._cache_path.with_name(self._cache_path.name + ".lock"), "a")
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        except OSError as e:
+            self._log(f"Token cache lock unavailable ({e}); continuing without it.", level=2)
+        try:
+            yield
+        finally:
+            if lock_file is not None:
+                lock_file.close()  # closing releases the flock
+
+    def _get_session(self):
+        """Return the pooled requests.Session, building it on first use."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            # Token POSTs are idempotent for our purposes, so retry transient IdP errors and honour Retry-After.
+            retry = Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset(["POST"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8, pool_block=True, max_retries=retry)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def close(self) -> None:
+        """Cancel any pending background refresh and release pooled HTTP connections."""
+        with self._lock:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __getstate__(self) -> dict:
+        # Locks, timers and sessions do not pickle; worker processes rebuild them lazily.
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_refresh_timer"] = None
+        state["_session"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "CdseAuth":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def _log(self, msg: str, is_error: bool = False, level: int = 1) -> None:
         """
@@ -63,44 +222,103 @@ class CdseAuth:
     def _update_env_file(self, new_refresh_token: str) -> None:
         """Update the .env file with the new refresh token."""
         try:
-            env_path = Path(".env")
-            if not env_path.exists():
+            try:
+                # Write through a symlinked .env rather than replacing the link itself
+                env_path = Path(".env").resolve(strict=True)
+                st = env_path.stat()
+            except FileNotFoundError:
                 return
-            
-            content = env_path.read_text(encoding="utf-8")
-            # Regex to replace COPERNICUS_REFRESH_TOKEN=...
-            pattern = r"^(COPERNICUS_REFRESH_TOKEN\s*=\s*)(.*)$"
-            if re.search(pattern, content, re.MULTILINE):
-                new_content = re.sub(pattern, f"\\1{new_refresh_token}", content, flags=re.MULTILINE)
-                env_path.write_text(new_content, encoding="utf-8")
-                self._log("Updated .env with new refresh token.")
+            mtime = st.st_mtime_ns
+
+            if self._env_cache and self._env_cache[0] == mtime:
+                content = self._env_cache[1]
+            else:
+                content = env_path.read_text(encoding="utf-8")
+                self._env_cache = (mtime, content)
+
+            # Single pass over the lines; keeps any "KEY = " spacing and line endings intact
+            lines = content.splitlines(keepends=True)
+            found = False
+            for i, ln in enumerate(lines):
+                key, sep, value = ln.partition("=")
+                if not sep or key.strip() != _ENV_KEY:
+                    continue
+                found = True
+                body = value.rstrip("\r\n")
+                eol = value[len(body):]
+                lead = body[:len(body) - len(body.lstrip())]
+                lines[i] = f"{key}={lead}{new_refresh_token}{eol}"
+            if found:
+                new_content = "".join(lines)
+                msg = "Updated .env with new refresh token."
             else:
-                with open(env_path, "a", encoding="utf-8") as f:
-                    f.write(f"\nCOPERNICUS_REFRESH_TOKEN={new_refresh_token}\n")
-                self._log("Appended new refresh token to .env.")
+                new_content = content + f"\n{_ENV_KEY}={new_refresh_token}\n"
+                msg = "Appended new refresh token to .env."
+            if new_content == content:
+                return
+
+            # Atomic replace so concurrent refreshes never leave a truncated .env.
+            # The file holds credentials, so the replacement keeps its original mode.
+            mode = stat.S_IMODE(st.st_mode)
+            tmp_path = env_path.with_name(env_path.name + ".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(new_content)
+            # os.open's mode is filtered by the umask and ignored for a leftover tmp file
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, env_path)
+            self._env_cache = (env_path.stat().st_mtime_ns, new_content)
+            self._log(msg)
         except Exception as e:
             self._log(f"Failed to update .env: {e}", is_error=True)
 
+    def _make_token(self, access: str, refresh: Optional[str], expires_in: float) -> TokenInfo:
+        expires_at = time.monotonic() + expires_in
+        return TokenInfo(
+            access_token=access,
+            refresh_token=refresh,
+            expires_at=expires_at,
+            safe_until=expires_at - self.early_refresh_seconds,
+            expires_at_wall=time.time() + expires_in,
+        )
+
+    def _parse_token_body(self, r, grant: str) -> Optional[dict]:
+        """Decode a token response body, rejecting oversized or non-JSON payloads."""
+        body = r.content
+        if len(body) > _MAX_TOKEN_BODY:
+            self._log(f"{grant} grant response too large ({len(body)} bytes); body prefix={body[:200]!r}", is_error=True)
+            return None
+        try:
+            j = json.loads(body)
+        except Exception as je:
+            self._log(f"{grant} grant JSON parse failed: {je}; body prefix={body[:200]!r}", is_error=True)
+            return None
+        if not isinstance(j, dict):
+            self._log(f"{grant} grant response is not a JSON object; body prefix={body[:200]!r}", is_error=True)
+            return None
+        return j
+
     def _password_grant(self) -> Optional[TokenInfo]:
         if not (self.username and self.password):
             self._log("Password grant requested but username/password missing.", is_error=True)
             return None
-        data = {
-            "grant_type": "password",
-            "client_id": self.client_id,
-            "username": self.username,
-            "password": self.password,
-        }
+        creds = (self.username, self.password)
+        if self._pw_body is None or self._pw_body[0] != creds:
+            self._pw_body = (creds, urlencode({
+                "grant_type": "password",
+                "client_id": self.client_id,
+                "username": self.username,
+                "password": self.password,
+            }).encode())
+        data = self._pw_body[1]
         try:
-            r = requests.post(self.token_url, data=data, timeout=30)
+            r = self._get_session().post(self.token_url, data=data, headers=_FORM_HEADERS, timeout=_TOKEN_TIMEOUT, stream=False)
             status = r.status_code
-            if status != 200:
+            if not 200 <= status < 300:
                 self._log(f"Password grant HTTP {status}, content-type={r.headers.get('Content-Type')}", is_error=True)
-            r.raise_for_status()
-            try:
-                j = r.json()
-            except Exception as je:
-                self._log(f"Password grant JSON parse failed: {je}; body prefix={r.text[:200]!r}", is_error=True)
+                return None
+            j = self._parse_token_body(r, "Password")
+            if j is None:
                 return None
             access = j.get("access_token")
             refresh = j.get("refresh_token")
@@ -108,7 +326,7 @@ class CdseAuth:
             if not access:
                 self._log("No access_token returned from password grant response.", is_error=True)
                 return None
-            ti = TokenInfo(access_token=access, refresh_token=refresh, expires_at=time.time() + exp)
+            ti = self._make_token(access, refresh, exp)
             self._log("CDSE password grant successful.")
             # Cache refresh token if newly provided
             if refresh:
@@ -122,21 +340,17 @@ class CdseAuth:
     def _refresh_grant(self) -> Optional[TokenInfo]:
         if not self.refresh_token:
             return None
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.client_id,
-            "refresh_token": self.refresh_token,
-        }
+        if self._rf_prefix is None:
+            self._rf_prefix = f"grant_type=refresh_token&client_id={quote_plus(self.client_id)}&refresh_token=".encode()
+        data = self._rf_prefix + quote_plus(self.refresh_token).encode()
         try:
-            r = requests.post(self.token_url, data=data, timeout=30)
+            r = self._get_session().post(self.token_url, data=data, headers=_FORM_HEADERS, timeout=_TOKEN_TIMEOUT, stream=False)
             status = r.status_code
-            if status != 200:
+            if not 200 <= status < 300:
                 self._log(f"Refresh grant HTTP {status}, content-type={r.headers.get('Content-Type')}", is_error=True)
-            r.raise_for_status()
-            try:
-                j = r.json()
-            except Exception as je:
-                self._log(f"Refresh grant JSON parse failed: {je}; body prefix={r.text[:200]!r}", is_error=True)
+                return None
+            j = self._parse_token_body(r, "Refresh")
+            if j is None:
                 return None
             access = j.get("access_token")
             refresh = j.get("refresh_token") or self.refresh_token
@@ -144,7 +358,7 @@ class CdseAuth:
             if not access:
                 self._log("No access_token returned from refresh grant response.", is_error=True)
                 return None
-            ti = TokenInfo(access_token=access, refresh_token=refresh, expires_at=time.time() + exp)
+            ti = self._make_token(access, refresh, exp)
             self._log("CDSE refresh grant successful.")
             self.refresh_token = refresh
             if j.get("refresh_token"):
@@ -154,21 +368,69 @@ class CdseAuth:
             self._log(f"Refresh grant failed: {e}", is_error=True)
             return None
 
+    def _schedule_refresh(self, delay: float, attempt: int = 0) -> None:
+        """Arm a daemon timer that refreshes the token in the background. Caller holds _lock."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        timer = threading.Timer(max(0.0, delay), self._background_refresh, args=(attempt,))
+        timer.daemon = True
+        self._refresh_timer = timer
+        timer.start()
+
+    def _set_token(self, ti: TokenInfo) -> None:
+        """Store a freshly granted token and schedule preemptive refresh if enabled. Caller holds _lock."""
+        self._token = ti
+        if self._cache_path is not None:
+            self._save_cached_token(ti)
+        if self.early_refresh_percent < 1.0:
+            lifetime = ti.expires_at - time.monotonic()
+            if lifetime > 0:
+                self._schedule_refresh(self.early_refresh_percent * lifetime)
+
+    def _background_refresh(self, attempt: int = 0) -> None:
+        with self._lock:
+            if self._refresh_timer is None:
+                return  # closed
+            self._refresh_timer = None
+            with self._cache_file_lock():
+                ti = self._refresh_grant() if self.refresh_token else None
+                if ti:
+                    self._set_token(ti)
+                    return
+            # Back off and retry while the current token is still usable
+            remaining = (self._token.expires_at - time.monotonic()) if self._token else 0.0
+            if remaining > 0:
+                self._log(f"Background refresh failed; retrying (attempt {attempt + 1}).", level=2)
+                self._schedule_refresh(min(60 * 2 ** attempt, remaining / 2), attempt + 1)
+
     def ensure_access_token(self) -> Optional[str]:
-        # If current token valid for > early_refresh_seconds keep it
-        if self._token and time.time() < (self._token.expires_at - self.early_refresh_seconds):
-            return self._token.access_token
-        # Try refresh grant first if we have refresh_token
-        if self.refresh_token:
-            ti = self._refresh_grant()
-            if ti:
-                self._token = ti
-                return ti.access_token
-        # Fallback to password grant if possible
-        ti = self._password_grant()
-        if ti:
-            self._token = ti
-            return ti.access_token
-        return None
+        # If current token valid for > early_refresh_seconds keep it (lock-free fast path)
+        tok = self._token
+        if tok is not None and time.monotonic() < tok.safe_until:
+            return tok.access_token
+        # Single-flight: one caller refreshes while concurrent callers wait for its result
+        with self._lock:
+            tok = self._token
+            if tok is not None and time.monotonic() < tok.safe_until:
+                return tok.access_token
+            with self._cache_file_lock():
+                # Another process may have refreshed while we waited for the lock
+                if self._cache_path is not None:
+                    self._load_cached_token()
+                    tok = self._token
+                    if tok is not None and time.monotonic() < tok.safe_until:
+                        return tok.access_token
+                # Try refresh grant first if we have refresh_token
+                if self.refresh_token:
+                    ti = self._refresh_grant()
+                    if ti:
+                        self._set_token(ti)
+                        return ti.access_token
+                # Fallback to password grant if possible
+                ti = self._password_grant()
+                if ti:
+                    self._set_token(ti)
+                    return ti.access_token
+                return None
 
 __all__ = ["CdseAuth", "TokenInfo"]
\ No newline at end of file
@@ -1,16 +1,18 @@
 from __future__ import annotations
 import typer
-import psutil
 import signal
 from rich import print, progress
 from rich.table import Table
 from rich.console import Console
 from pathlib import Path
-from typing import Optional, List
+from functools import lru_cache
+from typing import Any, Optional, List, cast
 from rangeplotter.config.settings import Settings, load_settings
 from rangeplotter.io.kml import parse_radars, parse_viewshed_kml
+from rangeplotter.io.kml_cache import load_cached_radars, store_cached_radars
 from rangeplotter.los.rings import compute_horizons
-from rangeplotter.io.dem import DemClient, approximate_bounding_box
+from rangeplotter.io.dem import DemClient, approximate_bounding_box, approximate_bounding_box_vec, partition_cached
+from rangeplotter.geo.earth import mutual_horizon_distance_vec
 from rangeplotter.auth.cdse import CdseAuth
 from rangeplotter.utils.logging import setup_logging, log_memory_usage
 from rangeplotter.utils.shutdown import (
@@ -21,17 +23,32 @@ from rangeplotter.utils.shutdown import (
     cleanup_temp_cache_files
 )
 from rangeplotter.processing import clip_viewshed, union_viewsheds
-from rangeplotter.io.export import export_viewshed_kml
+from rangeplotter.io.export import export_viewshed_kml, format_number
 from rangeplotter.io.csv_input import parse_csv_radars
+from rangeplotter.io.elevation_cache import ElevationCache
 from rangeplotter.utils.state import StateManager
 from rangeplotter.cli import network
 import time
 import re
-import yaml
 import datetime
+import contextlib
+import copy
+import fnmatch
+import glob
+import itertools
+import os
+import queue
+import multiprocessing
+import numpy as np
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 __version__ = "0.1.7-rc1"
 
+# Fields encoded in viewshed KML file names (see the viewshed command's naming)
+_RE_TGT_ALT = re.compile(r"tgt_alt_([\d.]+)m(?:_([A-Za-z]+))?")
+_RE_SENSOR_HEIGHT = re.compile(r"_sh_([\d.]+)m")
+_RE_VIEWSHED_NAME = re.compile(r"viewshed-(.*)-tgt_alt")
+
 def _signal_handler(signum, frame):
     """Handle Ctrl-C interrupt signal.
     
@@ -80,7 +97,6 @@ def resolve_output_path(user_path: Optional[Path], default_dir: Path) -> Path:
 
 app = typer.Typer(help="Radar LOS utility", context_settings={"help_option_names": ["-h", "--help"]})
 app.add_typer(network.app, name="network")
-print("RangePlotter by Renwell | Licence: MIT | Support: ko-fi.com/renwell")
 
 def version_callback(value: bool):
     if value:
@@ -105,7 +121,8 @@ def main(
     """
     RangePlotter: Advanced Sensor Line-of-Sight & Terrain Visibility Analysis
     """
-    pass
+    # Printed here rather than at import so --help/--version and library imports stay quiet
+    print("RangePlotter by Renwell | Licence: MIT | Support: ko-fi.com/renwell")
 
 # Load defaults from config if available
 try:
@@ -133,6 +150,126 @@ def format_duration(seconds: float) -> str:
     parts.append(f"{s}s")
     return " ".join(parts)
 
+def _available_cpus() -> int:
+    """CPUs this process may run on (cgroup/affinity aware on Linux), at least 1."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+def _viewshed_worker_count(settings: Settings, n_jobs: int) -> int:
+    """Number of pool workers for viewshed jobs (1 = run in-process).
+
+    Honours concurrency.max_workers and leaves concurrency.reserve_cpus free.
+    """
+    try:
+        max_workers = int(settings.concurrency.max_workers)
+        reserve_cpus = int(settings.concurrency.reserve_cpus)
+    except (TypeError, ValueError, AttributeError):
+        return 1
+    return max(1, min(max_workers, _available_cpus() - reserve_cpus, n_jobs))
+
+def _full_range_bboxes(radars: List, max_target_alt: float, k: float):
+    """Return (search radii, bboxes) covering each radar's max horizon plus a 5% buffer."""
+    lons = np.array([r.longitude for r in radars], dtype=float)
+    lats = np.array([r.latitude for r in radars], dtype=float)
+    heights = np.array([r.radar_height_m_msl or 0.0 for r in radars], dtype=float)
+    radii = mutual_horizon_distance_vec(heights, max_target_alt, lats, k) * 1.05
+    bboxes = [tuple(b) for b in approximate_bounding_box_vec(lons, lats, radii).tolist()]
+    return radii.tolist(), bboxes
+
+
+def _local_bboxes(radars: List, radius_m: float = 1000.0):
+    """Return small bboxes around each radar, enough to sample its ground elevation."""
+    lons = np.array([r.longitude for r in radars], dtype=float)
+    lats = np.array([r.latitude for r in radars], dtype=float)
+    return [tuple(b) for b in approximate_bounding_box_vec(lons, lats, np.full(len(radars), radius_m)).tolist()]
+
+
+def _bbox_contains(outer, inner) -> bool:
+    """True if lon/lat bbox inner lies within outer."""
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _sample_ground_elevations(dem_client: DemClient, radars: List, cache_dir: Path) -> List[float]:
+    """Ground elevation (m MSL) per radar, reusing values saved by earlier runs on the same DEM cache."""
+    cache = ElevationCache(cache_dir, dem_client.cache_version)
+    elevs: List[Optional[float]] = [cache.get(r.longitude, r.latitude) for r in radars]
+    missing = [i for i, e in enumerate(elevs) if e is None]
+    if missing:
+        sampled = dem_client.sample_elevations([radars[i].longitude for i in missing], [radars[i].latitude for i in missing])
+        for j, i in enumerate(missing):
+            elev = float(sampled[j])
+            elevs[i] = elev
+            cache.put(radars[i].longitude, radars[i].latitude, elev)
+        cache.save()
+    # Every gap was filled from the DEM above
+    return cast(List[float], elevs)
+
+
+def _token_cache_path(cache_dir: str | Path) -> Path:
+    """Where every command persists the CDSE access token, so they share one cache."""
+    return Path(cache_dir) / "auth" / "cdse_token.json"
+
+@lru_cache(maxsize=4)
+def _cached_dem_client(client_cls: type, base_url: str, cache_dir: str) -> DemClient:
+    # client_cls is part of the key so a substituted class never returns a stale instance
+    return client_cls(base_url=base_url, auth=None, cache_dir=Path(cache_dir))
+
+def _get_dem_client(base_url: str, auth: Optional[CdseAuth], cache_dir: Path, verbose: int = 0, max_workers: int = 1) -> DemClient:
+    """DemClient for a command, reused across commands run in the same Python process.
+
+    Scripted runs (e.g. horizon then viewshed via app()) keep the client's pooled
+    session and tile lookups. Per-command auth, verbosity and worker count are
+    applied on each call, and the download timer is reset. DemClient guards its
+    shared caches with locks, so the reused instance is thread-safe.
+    """
+    client = _cached_dem_client(DemClient, base_url, str(cache_dir))
+    client.auth = auth
+    client.verbose = verbose
+    client.max_workers = max(1, int(max_workers))
+    client.total_download_time = 0.0
+    return client
+
+# Sensor name -> filename component: spaces to underscores, path separators to dashes.
+_SAFE_NAME_TRANS = str.maketrans({" ": "_", "/": "-"})
+
+class _UnitProgress:
+    """progress_callback for one serially computed viewshed unit.
+
+    Drives the unit's own bar and its ``span`` steps of the overall bar, from
+    ``base_step``. Bound to its unit at construction rather than closing over
+    loop variables.
+    """
+    __slots__ = ("prog", "calc_task", "overall_task", "base_step", "span")
+
+    def __init__(self, prog: progress.Progress, calc_task, overall_task, base_step: float, span: float):
+        self.prog = prog
+        self.calc_task = calc_task
+        self.overall_task = overall_task
+        self.base_step = base_step
+        self.span = span
+
+    def __call__(self, step: str, fraction: float) -> None:
+        fraction = max(0.0, min(1.0, fraction))
+        self.prog.update(self.calc_task, description=f"  {step}...", completed=fraction * 100)
+        self.prog.update(self.overall_task, completed=self.base_step + fraction * self.span)
+
+def _safe_name(name: str) -> str:
+    """Filename-safe form of a sensor name."""
+    return name.translate(_SAFE_NAME_TRANS)
+
+def _list_input_dir(input_dir: Path) -> List[Path]:
+    """KML files then CSV files directly inside input_dir, from a single directory scan."""
+    kml_files, csv_files = [], []
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".kml") and entry.is_file():
+                kml_files.append(Path(entry.path))
+            elif entry.name.endswith(".csv") and entry.is_file():
+                csv_files.append(Path(entry.path))
+    return kml_files + csv_files
+
 def _resolve_inputs(input_path: Optional[Path]) -> List[Path]:
     """Resolve input path to a list of KML or CSV files."""
     if input_path is None:
@@ -140,9 +277,9 @@ def _resolve_inputs(input_path: Optional[Path]) -> List[Path]:
         input_dir = default_input_dir
         if not input_dir.exists():
             return []
-        return list(input_dir.glob("*.kml")) + list(input_dir.glob("*.csv"))
+        return _list_input_dir(input_dir)
     elif input_path.is_dir():
-        return list(input_path.glob("*.kml")) + list(input_path.glob("*.csv"))
+        return _list_input_dir(input_path)
     elif input_path.exists():
         return [input_path]
     else:
@@ -152,17 +289,139 @@ def _resolve_inputs(input_path: Optional[Path]) -> List[Path]:
             return [fallback]
         return [input_path]
 
-def _load_radars(input_files: List[Path], sensor_height: float) -> List:
-    """Load radars from multiple KML or CSV files."""
-    all_radars = []
+def _has_glob_magic(pattern: str) -> bool:
+    return "*" in pattern or "?" in pattern or "[" in pattern
+
+def _scan_files(directory: Path) -> dict:
+    """Map file name -> Path for the regular files directly inside directory."""
+    try:
+        with os.scandir(directory) as it:
+            return {e.name: Path(e.path) for e in it if e.is_file()}
+    except OSError:
+        return {}
+
+def _resolve_viewshed_inputs(inputs: List[str], fallback_dir: Path) -> List[Path]:
+    """
+    Resolve detection-range inputs (paths or wildcard patterns) to files.
+
+    Each input is tried relative to the CWD first, then against fallback_dir.
+    The fallback directory is scanned once and bare-name patterns are matched
+    against that listing, rather than globbing it again for every input.
+    """
+    resolved: List[Path] = []
+    fallback_index = None
+
+    def fallback_files() -> dict:
+        nonlocal fallback_index
+        if fallback_index is None:
+            fallback_index = _scan_files(fallback_dir)
+        return fallback_index
+
+    for inp in inputs:
+        if _has_glob_magic(inp):
+            matches = [Path(m) for m in glob.glob(inp)]
+            if not matches:
+                pattern = Path(inp)
+                if pattern.parent == Path(".") and not pattern.is_absolute():
+                    # glob skips dotfiles unless the pattern asks for them
+                    names = list(fallback_files())
+                    if not inp.startswith("."):
+                        names = [n for n in names if not n.startswith(".")]
+                    matches = [fallback_files()[n] for n in sorted(fnmatch.filter(names, inp))]
+                else:
+                    matches = [Path(m) for m in glob.glob(str(fallback_dir / inp))]
+
+            if not matches:
+                typer.echo(f"[yellow]Warning: No files matched pattern {inp} (checked CWD and {fallback_dir})[/yellow]")
+            resolved.extend(p for p in matches if p.is_file())
+        else:
+            p = Path(inp)
+            if p.is_file():
+                resolved.append(p)
+            elif p.name in fallback_files():
+                resolved.append(fallback_files()[p.name])
+            elif p.is_dir():
+                typer.echo(f"[yellow]Warning: {inp} is a directory. Skipping.[/yellow]")
+            else:
+                typer.echo(f"[yellow]Warning: File {inp} not found (checked CWD and {fallback_dir}).[/yellow]")
+    return resolved
+
+# Below this much input in total, parsing in-process beats starting worker processes
+_PARALLEL_PARSE_MIN_BYTES = 8 * 1024 * 1024
+
+def _parse_workers(files: List[Path]) -> int:
+    """Worker processes worth starting to parse files; 1 means parse in-process."""
+    if len(files) <= 1:
+        return 1
+    cpus = _available_cpus()
+    if cpus <= 1:
+        return 1
+    total = 0
+    for f in files:
+        try:
+            total += f.stat().st_size
+        except OSError:
+            pass
+    if total < _PARALLEL_PARSE_MIN_BYTES:
+        return 1
+    return min(len(files), cpus)
+
+def _parse_pool(workers: int) -> ProcessPoolExecutor:
+    # XML parsing holds the GIL, so use processes rather than threads.
+    # spawn: forking while Rich's refresh thread holds locks can deadlock the children
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def _parse_kml_files(kml_files: List[Path], sensor_height: float) -> List[List]:
+    """parse_radars over several files, in input order; large batches are parsed in parallel processes."""
+    workers = _parse_workers(kml_files)
+    if workers <= 1:
+        return [parse_radars(str(f), sensor_height) for f in kml_files]
+    with _parse_pool(workers) as pool:
+        return list(pool.map(parse_radars, [str(f) for f in kml_files], itertools.repeat(sensor_height)))
+
+def _try_parse_viewshed_kml(kml_path: str):
+    """parse_viewshed_kml, returning (results, None) or (None, error) so one bad file does not stop a batch."""
+    try:
+        return parse_viewshed_kml(kml_path), None
+    except Exception as e:
+        return None, e
+
+def _parse_viewshed_files(kml_files: List[Path]) -> List:
+    """_try_parse_viewshed_kml over several files, in input order; large batches are parsed in parallel processes."""
+    workers = _parse_workers(kml_files)
+    if workers <= 1:
+        return [_try_parse_viewshed_kml(str(f)) for f in kml_files]
+    with _parse_pool(workers) as pool:
+        return list(pool.map(_try_parse_viewshed_kml, [str(f) for f in kml_files]))
+
+def _load_radars(input_files: List[Path], sensor_height: float, cache_dir: Optional[Path] = None) -> List:
+    """Load radars from multiple KML or CSV files.
+
+    When cache_dir is given, parsed KML files are reused from '{cache_dir}/kml/'
+    until the file changes. KML files that do need parsing are parsed in
+    parallel when there is more than one.
+    """
+    parsed: dict = {}
+    to_parse: List[Path] = []
+    for file_path in input_files:
+        if file_path.suffix.lower() == '.kml' and file_path.exists() and file_path not in parsed:
+            parsed[file_path] = load_cached_radars(file_path, sensor_height, cache_dir) if cache_dir else None
+            if parsed[file_path] is None:
+                to_parse.append(file_path)
+    for file_path, radars in zip(to_parse, _parse_kml_files(to_parse, sensor_height)):
+        parsed[file_path] = radars
+        # Nothing worth reusing when a file yields no sites
+        if cache_dir and radars:
+            store_cached_radars(file_path, sensor_height, cache_dir, radars)
+
+    all_radars: List = []
     for file_path in input_files:
         if not file_path.exists():
             typer.echo(f"[yellow]Warning: Input file {file_path} not found.[/yellow]")
             continue
             
         if file_path.suffix.lower() == '.kml':
-            radars = parse_radars(str(file_path), sensor_height)
-            all_radars.extend(radars)
+            all_radars.extend(parsed[file_path])
         elif file_path.suffix.lower() == '.csv':
             radars = parse_csv_radars(file_path, sensor_height)
             all_radars.extend(radars)
@@ -171,6 +430,36 @@ def _load_radars(input_files: List[Path], sensor_height: float) -> List:
             
     return all_radars
 
+def _parse_float_list(raw: Optional[List[str]], field: str) -> List[float]:
+    """Parse repeated and/or comma-separated numeric options; invalid tokens are skipped with a warning."""
+    if not raw:
+        return []
+    values = []
+    for token in ",".join(raw).split(","):
+        try:
+            values.append(float(token.strip()))
+        except ValueError:
+            typer.echo(f"[yellow]Warning: Invalid {field} value '{token}'. Skipping.[/yellow]")
+    return values
+
+def _filter_radars(radars: List, filter_pattern: str) -> List:
+    """Keep radars whose name matches filter_pattern (regex search); exits if none match or the regex is invalid."""
+    if re.escape(filter_pattern) == filter_pattern:
+        # No metacharacters: a plain substring test gives the same result as re.search
+        radars = [r for r in radars if filter_pattern in r.name]
+    else:
+        try:
+            pattern = re.compile(filter_pattern)
+        except re.error as e:
+            typer.echo(f"[red]Invalid regex pattern: {e}[/red]")
+            raise typer.Exit(code=1)
+        radars = [r for r in radars if pattern.search(r.name)]
+    if not radars:
+        typer.echo(f"[yellow]No sensors matched filter '{filter_pattern}'.[/yellow]")
+        raise typer.Exit(code=0)
+    typer.echo(f"Filtered to {len(radars)} sensors matching '{filter_pattern}'")
+    return radars
+
 @app.command()
 def extract_refresh_token(
     username: str = typer.Option(..., help="CDSE username"),
@@ -212,7 +501,7 @@ def prepare_dem(
         typer.echo("[red]No input KML files found.[/red]")
         raise typer.Exit(code=1)
         
-    radars = _load_radars(kml_files, settings.sensor_height_m_agl)
+    radars = _load_radars(kml_files, settings.sensor_height_m_agl, Path(settings.cache_dir))
 
     auth = CdseAuth(
         token_url=settings.copernicus_api.token_url,
@@ -220,17 +509,23 @@ def prepare_dem(
         username=settings.copernicus_api.username,
         password=settings.copernicus_api.password,
         refresh_token=settings.copernicus_api.refresh_token,
+        token_cache_path=_token_cache_path(settings.cache_dir),
     )
     dem_cache = Path(settings.cache_dir) / "dem"
-    dem_client = DemClient(base_url=settings.copernicus_api.base_url, auth=auth, cache_dir=dem_cache)
-    from rangeplotter.geo.earth import mutual_horizon_distance
+    dem_client = _get_dem_client(settings.copernicus_api.base_url, auth, dem_cache, max_workers=settings.max_threads)
     max_alt = max(settings.effective_altitudes)
-    for r in radars:
-        horizon = mutual_horizon_distance(settings.sensor_height_m_agl, max_alt, r.latitude, settings.atmospheric_k_factor)
-        # Add 5% buffer to match compute_viewshed logic and prevent re-downloading fringe tiles
-        horizon *= 1.05
-        bbox = approximate_bounding_box(r.longitude, r.latitude, horizon)
-        tiles = dem_client.query_tiles(bbox, limit=limit)
+    sensor_h = settings.sensor_height_m_agl
+    if isinstance(sensor_h, list):
+        sensor_h = max(sensor_h)
+    lons = np.array([r.longitude for r in radars], dtype=float)
+    lats = np.array([r.latitude for r in radars], dtype=float)
+    # Add 5% buffer to match compute_viewshed logic and prevent re-downloading fringe tiles
+    horizons = mutual_horizon_distance_vec(np.full(len(radars), float(sensor_h)), max_alt, lats, settings.atmospheric_k_factor) * 1.05
+    bboxes = list(zip(horizons.tolist(), (tuple(b) for b in approximate_bounding_box_vec(lons, lats, horizons).tolist())))
+    # One catalogue round-trip per batch of bboxes instead of one per radar
+    tiles_by_bbox = dem_client.query_tiles_many([bbox for _, bbox in bboxes], limit=limit)
+    for r, (horizon, bbox) in zip(radars, bboxes):
+        tiles = tiles_by_bbox[bbox]
         typer.echo(f"Radar {r.name}: {len(tiles)} DEM products referenced (bbox radius ~{horizon/1000:.1f} km)")
     typer.echo("DEM metadata preparation complete.")
 
@@ -250,7 +545,7 @@ def debug_auth_dem(
         typer.echo("[red]No input KML files found.[/red]")
         raise typer.Exit(code=1)
         
-    radars = _load_radars(kml_files, settings.sensor_height_m_agl)
+    radars = _load_radars(kml_files, settings.sensor_height_m_agl, Path(settings.cache_dir))
     if not radars:
         typer.echo("[red]No radars found in KML.[/red]")
         raise typer.Exit(code=1)
@@ -262,6 +557,7 @@ def debug_auth_dem(
         username=settings.copernicus_api.username,
         password=settings.copernicus_api.password,
         refresh_token=settings.copernicus_api.refresh_token,
+        token_cache_path=_token_cache_path(settings.cache_dir),
     )
     token = auth.ensure_access_token()
     if not token:
@@ -269,7 +565,7 @@ def debug_auth_dem(
         raise typer.Exit(code=1)
     typer.echo("Access token acquired (not shown). Querying DEM...")
     dem_cache = Path(settings.cache_dir) / "dem_debug"
-    dem_client = DemClient(base_url=settings.copernicus_api.base_url, auth=auth, cache_dir=dem_cache)
+    dem_client = _get_dem_client(settings.copernicus_api.base_url, auth, dem_cache)
     from rangeplotter.geo.earth import mutual_horizon_distance
     horizon = mutual_horizon_distance(5.0, max(settings.effective_altitudes), r.latitude, settings.atmospheric_k_factor)
     bbox = approximate_bounding_box(r.longitude, r.latitude, horizon * 0.1)  # smaller for test
@@ -319,20 +615,10 @@ def horizon(
         typer.echo("[red]No input KML files found.[/red]")
         raise typer.Exit(code=1)
         
-    radars = _load_radars(kml_files, settings.sensor_height_m_agl)
+    radars = _load_radars(kml_files, settings.sensor_height_m_agl, Path(settings.cache_dir))
 
     if filter_pattern:
-        import re
-        try:
-            pattern = re.compile(filter_pattern)
-            radars = [r for r in radars if pattern.search(r.name)]
-            if not radars:
-                typer.echo(f"[yellow]No sensors matched filter '{filter_pattern}'.[/yellow]")
-                raise typer.Exit(code=0)
-            typer.echo(f"Filtered to {len(radars)} sensors matching '{filter_pattern}'")
-        except re.error as e:
-            typer.echo(f"[red]Invalid regex pattern: {e}[/red]")
-            raise typer.Exit(code=1)
+        radars = _filter_radars(radars, filter_pattern)
     
     if verbose >= 2:
         print("[grey58]DEBUG: settings loaded, radars parsed.[/grey58]")
@@ -345,7 +631,8 @@ def horizon(
         username=settings.copernicus_api.username,
         password=settings.copernicus_api.password,
         refresh_token=settings.copernicus_api.refresh_token,
-        verbose=verbose
+        verbose=verbose,
+        token_cache_path=_token_cache_path(settings.cache_dir),
     )
     if verbose >= 2:
         print("[grey58]DEBUG: Auth object created.[/grey58]")
@@ -358,25 +645,26 @@ def horizon(
         print("See README for details.\n")
         raise typer.Exit(code=1)
 
-    dem_client = DemClient(
-        base_url=settings.copernicus_api.base_url,
-        auth=auth,
-        cache_dir=dem_cache,
-        verbose=verbose
+    dem_client = _get_dem_client(
+        settings.copernicus_api.base_url,
+        auth,
+        dem_cache,
+        verbose=verbose,
+        max_workers=settings.max_threads
     )
     if verbose >= 1:
         print("[bold blue]Initializing Radar Sites...[/bold blue]")
     
     # 1. Determine ground elevation for all radars (requires minimal DEM fetch)
-    for r in radars:
-        # We need the ground elevation to calculate the true radar height (MSL).
-        # Fetch a small area around the radar (1km radius) to ensure we have the local tile.
+    # We need the ground elevation to calculate the true radar height (MSL).
+    # Fetch a small area around each radar (1km radius) up front so the local
+    # tiles for all sites download together rather than one radar at a time.
+    dem_client.ensure_tiles_many(_local_bboxes(radars))
+    ground_elevs = _sample_ground_elevations(dem_client, radars, Path(settings.cache_dir))
+    for i, r in enumerate(radars):
         if verbose >= 1:
             print(f"  [cyan]•[/cyan] Sampling ground elevation for [bold]{r.name}[/bold]...")
-        bbox_local = approximate_bounding_box(r.longitude, r.latitude, 1000)
-        dem_client.ensure_tiles(bbox_local)
-        
-        r.ground_elevation_m_msl = dem_client.sample_elevation(r.longitude, r.latitude)
+        r.ground_elevation_m_msl = float(ground_elevs[i])
         if verbose >= 1:
             print(f"    [green]✓[/green] Ground elevation: {r.ground_elevation_m_msl:.1f} m MSL")
         
@@ -405,19 +693,24 @@ def horizon(
     with progress.Progress(progress.SpinnerColumn(), progress.TextColumn("{task.description}"), console=console) as prog:
         task = prog.add_task("Computing geodesic horizons", total=len(radars))
         rings_all = {}
-        meta = {}
-        for r in radars:
+        # compute_horizons is vectorised over radars: call it on chunks sized for
+        # ~20 progress updates rather than once per radar
+        chunk_size = max(1, -(-len(radars) // 20))
+        for start in range(0, len(radars), chunk_size):
+            chunk = radars[start:start + chunk_size]
             if verbose >= 2:
-                print(f"[grey58]DEBUG: Computing horizons for {r.name}.")
-            rings = compute_horizons([r], altitudes, settings.atmospheric_k_factor)
-            rings_all.update(rings)
-            meta[r.name] = {
+                print(f"[grey58]DEBUG: Computing horizons for {', '.join(r.name for r in chunk)}.")
+            rings_all.update(compute_horizons(chunk, altitudes, settings.atmospheric_k_factor))
+            prog.advance(task, len(chunk))
+        meta = {
+            r.name: {
                 'lon': r.longitude,
                 'lat': r.latitude,
                 'ground_elev': r.ground_elevation_m_msl,
                 'height_agl': r.sensor_height_m_agl
             }
-            prog.advance(task)
+            for r in radars
+        }
     if verbose >= 2:
         print("[grey58]DEBUG: Horizon computation finished. Beginning export.")
     
@@ -438,10 +731,11 @@ def horizon(
         "Refraction Factor (k)": settings.atmospheric_k_factor,
     }
     
+    style_dict = settings.style.model_dump()
     if do_union:
         # Single file with all horizons
         kml_path = out_path / "rangeplotter-union-horizon.kml"
-        export_horizons_kml(str(kml_path), rings_all, meta, style=settings.style.model_dump(), kml_export_mode=settings.kml_export_altitude_mode, metadata=base_metadata)
+        export_horizons_kml(str(kml_path), rings_all, meta, style=style_dict, kml_export_mode=settings.kml_export_altitude_mode, metadata=base_metadata)
         if verbose >= 2:
             print("[grey58]DEBUG: Export complete.")
         print(f"[green]Exported horizons to {kml_path}[/green]")
@@ -449,7 +743,7 @@ def horizon(
         # Per-sensor files
         exported_files = []
         for i, r in enumerate(radars, 1):
-            safe_name = r.name.replace(" ", "_").replace("/", "-")
+            safe_name = _safe_name(r.name)
             prefix = f"{i:02d}_"
             filename = f"{prefix}rangeplotter-{safe_name}-horizon.kml"
             kml_path = out_path / filename
@@ -465,7 +759,7 @@ def horizon(
                 "Sensor Ground Elevation": f"{r.ground_elevation_m_msl:.1f} m MSL" if r.ground_elevation_m_msl else "N/A",
             })
             
-            export_horizons_kml(str(kml_path), sensor_rings, sensor_meta, style=settings.style.model_dump(), kml_export_mode=settings.kml_export_altitude_mode, metadata=sensor_metadata)
+            export_horizons_kml(str(kml_path), sensor_rings, sensor_meta, style=style_dict, kml_export_mode=settings.kml_export_altitude_mode, metadata=sensor_metadata)
             exported_files.append(kml_path)
             if verbose >= 1:
                 print(f"  [green]✓[/green] {filename}")
@@ -526,28 +820,14 @@ def viewshed(
     
     # Override altitudes if provided via CLI
     if combined_altitudes_cli:
-        parsed_alts = []
-        for a_str in combined_altitudes_cli:
-            parts = a_str.split(',')
-            for p in parts:
-                try:
-                    parsed_alts.append(float(p.strip()))
-                except ValueError:
-                    typer.echo(f"[yellow]Warning: Invalid altitude value '{p}'. Skipping.[/yellow]")
+        parsed_alts = _parse_float_list(combined_altitudes_cli, "altitude")
         if parsed_alts:
             settings.altitudes_msl_m = parsed_alts
             typer.echo(f"Using target altitudes from CLI: {settings.altitudes_msl_m}")
             
     # Override sensor heights if provided via CLI
     if sensor_heights_cli:
-        parsed_heights = []
-        for h_str in sensor_heights_cli:
-            parts = h_str.split(',')
-            for p in parts:
-                try:
-                    parsed_heights.append(float(p.strip()))
-                except ValueError:
-                    typer.echo(f"[yellow]Warning: Invalid sensor height value '{p}'. Skipping.[/yellow]")
+        parsed_heights = _parse_float_list(sensor_heights_cli, "sensor height")
         if parsed_heights:
             settings.sensor_height_m_agl = sorted(list(set(parsed_heights)))
             typer.echo(f"Using sensor heights from CLI: {settings.sensor_height_m_agl}")
@@ -570,20 +850,10 @@ def viewshed(
         typer.echo("[red]No input KML files found.[/red]")
         raise typer.Exit(code=1)
         
-    radars = _load_radars(kml_files, settings.sensor_height_m_agl)
+    radars = _load_radars(kml_files, settings.sensor_height_m_agl, Path(settings.cache_dir))
     
     if filter_pattern:
-        import re
-        try:
-            pattern = re.compile(filter_pattern)
-            radars = [r for r in radars if pattern.search(r.name)]
-            if not radars:
-                typer.echo(f"[yellow]No sensors matched filter '{filter_pattern}'.[/yellow]")
-                raise typer.Exit(code=0)
-            typer.echo(f"Filtered to {len(radars)} sensors matching '{filter_pattern}'")
-        except re.error as e:
-            typer.echo(f"[red]Invalid regex pattern: {e}[/red]")
-            raise typer.Exit(code=1)
+        radars = _filter_radars(radars, filter_pattern)
     
     auth = CdseAuth(
         token_url=settings.copernicus_api.token_url,
@@ -591,7 +861,8 @@ def viewshed(
         username=settings.copernicus_api.username,
         password=settings.copernicus_api.password,
         refresh_token=settings.copernicus_api.refresh_token,
-        verbose=verbose
+        verbose=verbose,
+        token_cache_path=_token_cache_path(settings.cache_dir),
     )
 
     # Friendly auth check
@@ -603,11 +874,12 @@ def viewshed(
         raise typer.Exit(code=1)
 
     dem_cache = Path(settings.cache_dir) / "dem"
-    dem_client = DemClient(
-        base_url=settings.copernicus_api.base_url,
-        auth=auth,
-        cache_dir=dem_cache,
-        verbose=verbose
+    dem_client = _get_dem_client(
+        settings.copernicus_api.base_url,
+        auth,
+        dem_cache,
+        verbose=verbose,
+        max_workers=settings.max_threads
     )
     
     if verbose >= 1:
@@ -617,21 +889,38 @@ def viewshed(
     all_tiles_map = {}  # Track unique tiles for check mode
     missing_local_tiles = []
 
-    for r in radars:
+    max_target_alt = max(settings.effective_altitudes)
+    if check_download:
+        local_bboxes = _local_bboxes(radars)
+        # Catalogue lookups for every site in one batched pass rather than one request each
+        local_tiles_by_bbox = dem_client.query_tiles_many(local_bboxes)
+    else:
+        # Normal mode: fetch full-range coverage for all sites in one batch before
+        # sampling. Ground is not known yet, so radar heights are estimated with
+        # ground at 0 m MSL; the local tiles are inside these bboxes, so sampling
+        # needs no separate fetch and step 2 only tops up sites on high ground.
+        ground_estimates = []
+        for r in radars:
+            est = copy.copy(r)
+            est.ground_elevation_m_msl = 0.0
+            ground_estimates.append(est)
+        _, estimated_bboxes = _full_range_bboxes(ground_estimates, max_target_alt, settings.atmospheric_k_factor)
+        dem_client.ensure_tiles_many(estimated_bboxes)
+        ground_elevs = _sample_ground_elevations(dem_client, radars, Path(settings.cache_dir))
+
+    for i, r in enumerate(radars):
         # We need the ground elevation to calculate the true radar height (MSL).
         # Fetch a small area around the radar (1km radius) to ensure we have the local tile.
         if verbose >= 1:
             print(f"  [cyan]•[/cyan] Sampling ground elevation for [bold]{r.name}[/bold]...")
-        bbox_local = approximate_bounding_box(r.longitude, r.latitude, 1000)
-        
         if check_download:
             # In check mode, we query but do not download
-            local_tiles = dem_client.query_tiles(bbox_local)
+            local_tiles = local_tiles_by_bbox[local_bboxes[i]]
             for t in local_tiles:
                 all_tiles_map[t.id] = t
             
             # If we happen to have the tiles, we can sample elevation to get a better horizon estimate
-            missing_here = [t for t in local_tiles if not (t.local_path.exists() and t.local_path.stat().st_size > 0)]
+            _, missing_here = partition_cached(local_tiles)
             
             if not missing_here and local_tiles:
                 r.ground_elevation_m_msl = dem_client.sample_elevation(r.longitude, r.latitude)
@@ -644,9 +933,8 @@ def viewshed(
                 if verbose >= 1:
                     print(f"    [yellow]![/yellow] Local tile missing. Assuming 0m MSL for horizon check.")
         else:
-            # Normal mode: ensure tiles are present
-            dem_client.ensure_tiles(bbox_local)
-            r.ground_elevation_m_msl = dem_client.sample_elevation(r.longitude, r.latitude)
+            # Normal mode: tiles were prefetched and sampled above
+            r.ground_elevation_m_msl = float(ground_elevs[i])
             if verbose >= 1:
                 print(f"    [green]✓[/green] Ground elevation: {r.ground_elevation_m_msl:.1f} m MSL")
             
@@ -689,8 +977,9 @@ def viewshed(
             
             # Re-sample elevations
             print("[bold blue]Re-sampling ground elevations...[/bold blue]")
-            for r in radars:
-                r.ground_elevation_m_msl = dem_client.sample_elevation(r.longitude, r.latitude)
+            resampled = dem_client.sample_elevations([r.longitude for r in radars], [r.latitude for r in radars])
+            for i, r in enumerate(radars):
+                r.ground_elevation_m_msl = float(resampled[i])
                 if verbose >= 1:
                      print(f"  [cyan]•[/cyan] {r.name}: {r.ground_elevation_m_msl:.1f} m MSL")
             local_tiles_fixed = True
@@ -699,27 +988,19 @@ def viewshed(
     # Now that we have ground elevations, we can calculate the true horizon distance.
     if verbose >= 1:
         print("\n[bold blue]Verifying DEM Coverage...[/bold blue]")
-    max_target_alt = max(settings.effective_altitudes)
     from rangeplotter.geo.earth import mutual_horizon_distance
     
     if check_download:
         print("[bold]Checking download requirements...[/bold]")
         # all_tiles_map already contains local tiles
-        for r in radars:
-            radar_h = r.radar_height_m_msl or 0.0
-            horizon_m = mutual_horizon_distance(radar_h, max_target_alt, r.latitude, settings.atmospheric_k_factor)
-            search_radius = horizon_m * 1.05
-            bbox_full = approximate_bounding_box(r.longitude, r.latitude, search_radius)
-            
-            # Use query_tiles directly to get objects, but don't download
-            # We use limit=100 as in ensure_tiles
-            tiles = dem_client.query_tiles(bbox_full, limit=100)
+        _, full_bboxes = _full_range_bboxes(radars, max_target_alt, settings.atmospheric_k_factor)
+        # Query tile objects without downloading; limit=100 as in ensure_tiles
+        for tiles in dem_client.query_tiles_many(full_bboxes, limit=100).values():
             for t in tiles:
                 all_tiles_map[t.id] = t
         
         unique_tiles = list(all_tiles_map.values())
-        to_download = [t for t in unique_tiles if not (t.local_path.exists() and t.local_path.stat().st_size > 0)]
-        cached = [t for t in unique_tiles if (t.local_path.exists() and t.local_path.stat().st_size > 0)]
+        cached, to_download = partition_cached(unique_tiles)
         
         est_size_mb = len(to_download) * 25.0
         
@@ -734,27 +1015,23 @@ def viewshed(
 
         raise typer.Exit()
 
-    for r in radars:
-        # Calculate max horizon based on radar height + max target altitude
-        # radar_height_m_msl property now uses the sampled ground elevation
-        radar_h = r.radar_height_m_msl or 0.0
-        horizon_m = mutual_horizon_distance(radar_h, max_target_alt, r.latitude, settings.atmospheric_k_factor)
-        
-        # Add a 5% buffer to match viewshed logic
-        search_radius = horizon_m * 1.05
-        
-        if verbose >= 1:
+    # Calculate max horizon based on radar height + max target altitude (plus a 5% buffer
+    # to match viewshed logic); radar_height_m_msl now uses the sampled ground elevation
+    search_radii, full_bboxes = _full_range_bboxes(radars, max_target_alt, settings.atmospheric_k_factor)
+    if verbose >= 1:
+        for r, search_radius in zip(radars, search_radii):
             print(f"  [cyan]•[/cyan] Checking coverage for [bold]{r.name}[/bold] (Radius: {search_radius/1000:.1f} km)...")
-        bbox_full = approximate_bounding_box(r.longitude, r.latitude, search_radius)
-        
-        # This will download any missing tiles for the full range
-        dem_client.ensure_tiles(bbox_full)
+
+    # Only sites whose true range escapes the step-1 estimate need more tiles
+    escaped = [b for b, est in zip(full_bboxes, estimated_bboxes) if not _bbox_contains(est, b)]
+    if escaped:
+        dem_client.ensure_tiles_many(escaped)
 
     if download_only:
         print("[green]Download complete. Skipping viewshed calculation.[/green]")
         raise typer.Exit()
 
-    from rangeplotter.los.viewshed import compute_viewshed
+    from rangeplotter.los.viewshed import compute_viewsheds, init_viewshed_worker, run_viewshed_job
     from rangeplotter.io.export import export_viewshed_kml
     
     # Resolve output directory using F3 logic
@@ -762,10 +1039,8 @@ def viewshed(
         
     out_dir_path.mkdir(parents=True, exist_ok=True)
     
-    # Map populated radars by location for easy lookup
-    radar_map = {(r.longitude, r.latitude): r for r in radars}
-
     # Check system memory before starting
+    import psutil
     mem = psutil.virtual_memory()
     max_ram_percent = settings.resources.max_ram_percent
     if mem.percent > max_ram_percent:
@@ -782,6 +1057,8 @@ def viewshed(
     # If it uses the default (from config/CLI), we run it for each height in the list.
     
     default_sensor_heights = settings.effective_sensor_heights
+    altitude_mode = settings.target_altitude_reference
+    ref_str = altitude_mode.upper()
 
     with progress.Progress(
         progress.SpinnerColumn(),
@@ -809,44 +1086,36 @@ def viewshed(
                 for alt in altitudes:
                     tasks_to_run.append((sensor, h, alt))
         
-        total_steps = len(tasks_to_run) * 100
-        overall_task = prog.add_task("Computing viewsheds...", total=total_steps)
-        
-        current_step = 0
-        
-        for sensor, sensor_h, alt in tasks_to_run:
-            # Check for graceful shutdown request
-            if is_shutdown_requested():
-                prog.console.print("[yellow]Shutdown requested. Stopping after cleanup...[/yellow]")
-                cleanup_temp_cache_files()
-                print(f"\n[bold]Interrupted. Completed {current_step // 100} of {len(tasks_to_run)} viewsheds.[/bold]")
-                raise typer.Exit(code=130)  # 130 = 128 + SIGINT(2)
-            
-            # Temporarily override sensor height for calculation
-            # We need to be careful not to permanently modify the sensor object if we are iterating
-            original_h = sensor.sensor_height_m_agl
-            sensor.sensor_height_m_agl = sensor_h
+        # Settings are fixed for the run: dump them once rather than per job.
+        base_style = settings.style.model_dump()
+        cfg_dict = settings.model_dump()
+
+        # Resolve filenames and state hashes first; only stale outputs become jobs.
+        jobs = []
+        skipped = 0
+        sized_sensors: dict = {}  # (id(sensor), sensor_h) -> copy of the sensor at that height
+        for base_sensor, sensor_h, alt in tasks_to_run:
+            # Work on a copy with the height fixed rather than mutating the shared sensor;
+            # radar_height_m_msl (horizon, hash) and the viewshed job all read it from there.
+            group = (id(base_sensor), sensor_h)
+            sensor = sized_sensors.get(group)
+            if sensor is None:
+                sensor = copy.copy(base_sensor)
+                sensor.sensor_height_m_agl = sensor_h
+                sized_sensors[group] = sensor
             
             # Prepare filename to check state
-            safe_name = sensor.name.replace(" ", "_").replace("/", "-")
-            alt_str = f"{int(alt)}" if alt.is_integer() else f"{alt}"
+            safe_name = _safe_name(sensor.name)
+            alt_str = format_number(alt)
             
             # Add sensor height to filename if we are running multiple heights
-            # or if it differs from the default single height?
-            # To keep it simple and consistent, maybe we should always include it if it's not the standard default?
-            # Or just always include it?
             # Existing naming convention: 01_rangeplotter-Site-tgt_alt_100m_AGL.kml
             # If we have multiple sensor heights, we need to distinguish them.
-            # Let's add _sh_Xm if there are multiple heights configured globally, or if it's a non-standard run.
-            
             sh_suffix = ""
             if len(default_sensor_heights) > 1:
-                sh_str = f"{int(sensor_h)}" if sensor_h.is_integer() else f"{sensor_h}"
+                sh_str = format_number(sensor_h)
                 sh_suffix = f"_sh_{sh_str}m"
             
-            altitude_mode = settings.target_altitude_reference
-            ref_str = altitude_mode.upper()
-            
             # Find index for altitude sorting prefix
             try:
                 alt_idx = altitudes.index(alt) + 1
@@ -861,7 +1130,7 @@ def viewshed(
             horizon_m = mutual_horizon_distance(radar_h, alt, sensor.latitude, settings.atmospheric_k_factor)
 
             # Determine styling early so it can be included in the hash
-            final_style = settings.style.model_dump()
+            final_style = dict(base_style)
             if sensor.style_config:
                 final_style.update(sensor.style_config)
 
@@ -877,20 +1146,15 @@ def viewshed(
                 line_color=final_style.get('line_color'),
                 fill_opacity=final_style.get('fill_opacity')
             )
-            # Note: compute_hash uses sensor.radar_height_m_msl, which uses sensor.sensor_height_m_agl
-            # So modifying sensor.sensor_height_m_agl above correctly affects the hash.
             
             should_run = force
             if not should_run:
                 should_run = state_manager.should_run(sensor.name, alt, current_hash, filename)
                 
             if not should_run:
-                if verbose >= 1:
+                if verbose >= 2:
                     prog.console.print(f"[dim][INFO] Skipping: {filename} (Already exists, hash match)[/dim]")
-                prog.update(overall_task, completed=current_step + 100)
-                current_step += 100
-                # Restore original height
-                sensor.sensor_height_m_agl = original_h
+                skipped += 1
                 continue
             
             # If we are running, check if it's a recalculation (file exists but hash mismatch)
@@ -902,93 +1166,262 @@ def viewshed(
                  if verbose >= 1:
                     prog.console.print(f"[yellow][INFO] Recalculating: {filename} (Forced)[/yellow]")
 
-            prog.update(overall_task, description=f"Computing viewshed for {sensor.name} (SH: {sensor_h}m) @ {alt}m")
-            calc_task = prog.add_task(f"  {sensor.name} @ {alt}m", total=100)
+            jobs.append({
+                'sensor': sensor,
+                'sensor_h': sensor_h,
+                'alt': alt,
+                'filename': filename,
+                'safe_name': safe_name,
+                'alt_str': alt_str,
+                'final_style': final_style,
+                'hash': current_hash,
+                'horizon_m': horizon_m,
+                'group': group,
+            })
+
+        if skipped:
+            prog.console.print(f"[dim][INFO] Skipping {skipped} of {len(tasks_to_run)} viewsheds (already exist, hash match)[/dim]")
+
+        # The bar only counts viewsheds that will actually be computed
+        overall_task = prog.add_task("Computing viewsheds...", total=len(jobs) * 100)
+
+        # Altitudes of one sensor at one height share DEM reprojection and MVA rasters
+        # (see compute_viewsheds), so they are computed together as one unit.
+        jobs_by_group: dict = {}
+        for job_id, job in enumerate(jobs):
+            jobs_by_group.setdefault(job['group'], []).append(job_id)
+        units: List[List[int]] = list(jobs_by_group.values())
+
+        def _export_job(job: dict, poly) -> None:
+            sensor = job['sensor']
+            alt = job['alt']
+            filename = job['filename']
+            final_style = job['final_style']
+            out_path = out_dir_path / filename
             
-            def _update_progress(step: str, pct: float):
-                pct = max(0.0, min(100.0, pct))
-                prog.update(calc_task, description=f"  {step}...", completed=pct)
-                
-                task_progress = 0.0
-                if step == "Initializing": task_progress = 5.0
-                elif step == "Computing LOS": task_progress = 10.0 + (pct * 0.6)
-                elif step == "Generating Mask": task_progress = 70.0 + (pct * 0.2)
-                elif step == "Vectorizing": task_progress = 90.0
-                elif step == "Transforming to WGS84": task_progress = 95.0
-                
-                prog.update(overall_task, completed=current_step + task_progress)
+            metadata = {
+                "Utility": f"RangePlotter {__version__}",
+                "Command": "viewshed",
+                "Date": datetime.datetime.now().isoformat(),
+                "Sensor Name": sensor.name,
+                "Sensor Location": f"{sensor.latitude:.5f}, {sensor.longitude:.5f}",
+                "Sensor Ground Elevation": f"{sensor.ground_elevation_m_msl:.1f} m MSL",
+                "Sensor Height (AGL)": f"{sensor.sensor_height_m_agl} m",
+                "Sensor Height (MSL)": f"{sensor.radar_height_m_msl:.1f} m" if sensor.radar_height_m_msl else "N/A",
+                "Target Altitude": f"{alt} m ({altitude_mode.upper()})",
+                "Max Range": f"{job['horizon_m']/1000:.1f} km (Horizon)",
+                "Refraction Factor (k)": settings.atmospheric_k_factor,
+                "Earth Radius Model": settings.earth_model.ellipsoid,
+                "state_hash": job['hash']
+            }
 
-            try:
-                if verbose >= 2:
-                    log_memory_usage(log, f"Before {sensor.name} @ {alt}m")
-                
-                cfg_dict = settings.model_dump()
-                poly = compute_viewshed(
-                    sensor, 
-                    alt, 
-                    dem_client, 
-                    cfg_dict, 
-                    progress_callback=_update_progress, 
-                    rich_progress=prog,
-                    altitude_mode=altitude_mode,
-                    use_cache=not no_cache
-                )
-                
-                out_path = out_dir_path / filename
-                
-                # final_style was already computed before hash calculation
-                
-                metadata = {
-                    "Utility": f"RangePlotter {__version__}",
-                    "Command": "viewshed",
-                    "Date": datetime.datetime.now().isoformat(),
-                    "Sensor Name": sensor.name,
-                    "Sensor Location": f"{sensor.latitude:.5f}, {sensor.longitude:.5f}",
-                    "Sensor Ground Elevation": f"{sensor.ground_elevation_m_msl:.1f} m MSL",
-                    "Sensor Height (AGL)": f"{sensor.sensor_height_m_agl} m",
-                    "Sensor Height (MSL)": f"{sensor.radar_height_m_msl:.1f} m" if sensor.radar_height_m_msl else "N/A",
-                    "Target Altitude": f"{alt} m ({altitude_mode.upper()})",
-                    "Max Range": f"{mutual_horizon_distance(sensor.radar_height_m_msl or 0, alt, sensor.latitude, settings.atmospheric_k_factor)/1000:.1f} km (Horizon)",
-                    "Refraction Factor (k)": settings.atmospheric_k_factor,
-                    "Earth Radius Model": settings.earth_model.ellipsoid,
-                    "state_hash": current_hash
-                }
-
-                export_viewshed_kml(
-                    viewshed_polygon=poly,
-                    output_path=out_path,
-                    altitude=alt,
-                    style_config=final_style,
-                    sensors=[{
-                        'name': sensor.name,
-                        'location': (sensor.longitude, sensor.latitude),
-                        'style_config': final_style
-                    }],
-                    document_name=f"viewshed-{safe_name}-tgt_alt_{alt_str}m_{ref_str}",
-                    altitude_mode=altitude_mode,
-                    kml_export_mode=settings.kml_export_altitude_mode,
-                    metadata=metadata
-                )
-                
-                if verbose >= 1:
-                    prog.console.print(f"    [green]Saved {filename}[/green]")
+            export_viewshed_kml(
+                viewshed_polygon=poly,
+                output_path=out_path,
+                altitude=alt,
+                style_config=final_style,
+                sensors=[{
+                    'name': sensor.name,
+                    'location': (sensor.longitude, sensor.latitude),
+                    'style_config': final_style
+                }],
+                document_name=f"viewshed-{job['safe_name']}-tgt_alt_{job['alt_str']}m_{ref_str}",
+                altitude_mode=altitude_mode,
+                kml_export_mode=settings.kml_export_altitude_mode,
+                metadata=metadata
+            )
+            
+            if verbose >= 1:
+                prog.console.print(f"    [green]Saved {filename}[/green]")
+            
+            # Update state
+            state_manager.update_state(sensor.name, alt, job['hash'], filename)
+
+        def _export_unit(unit: List[int], polys) -> None:
+            for job_id, poly in zip(unit, polys):
+                job = jobs[job_id]
+                try:
+                    _export_job(job, poly)
+                except Exception as e:
+                    log.error(f"Failed to export viewshed for {job['sensor'].name} @ {job['alt']}m: {e}", exc_info=True)
+                    prog.console.print(f"[red]    Failed to export viewshed for {job['sensor'].name} @ {job['alt']}m: {e}[/red]")
+
+        def _unit_alts(unit: List[int]) -> str:
+            return ", ".join(f"{jobs[j]['alt']}m" for j in unit)
+
+        def _unit_label(unit: List[int]) -> str:
+            return f"{jobs[unit[0]]['sensor'].name} @ {_unit_alts(unit)}"
+
+        def _interrupted(completed_jobs: int) -> None:
+            prog.console.print("[yellow]Shutdown requested. Stopping after cleanup...[/yellow]")
+            cleanup_temp_cache_files()
+            done = skipped + completed_jobs
+            print(f"\n[bold]Interrupted. Completed {done} of {len(tasks_to_run)} viewsheds.[/bold]")
+            raise typer.Exit(code=130)  # 130 = 128 + SIGINT(2)
+
+        workers = _viewshed_worker_count(settings, len(jobs))
+
+        if workers <= 1:
+            # One per-unit bar, reset for each unit rather than re-created
+            calc_task = prog.add_task("", total=100, visible=False)
+            completed_jobs = 0
+            for unit in units:
+                # Check for graceful shutdown request
+                if is_shutdown_requested():
+                    _interrupted(completed_jobs)
                 
-                if verbose >= 2:
-                    log_memory_usage(log, f"After {sensor.name} @ {alt}m")
+                first = jobs[unit[0]]
+                sensor = first['sensor']
+                label = _unit_label(unit)
+                base_step = completed_jobs * 100
+                span = 100 * len(unit)
+                prog.update(overall_task, description=f"Computing viewshed for {sensor.name} (SH: {first['sensor_h']}m) @ {_unit_alts(unit)}")
+                prog.reset(calc_task, total=100, description=f"  {label}", visible=True)
                 
-                # Update state
-                state_manager.update_state(sensor.name, alt, current_hash, filename)
+                try:
+                    if verbose >= 2:
+                        log_memory_usage(log, f"Before {label}")
                     
-            except Exception as e:
-                log.error(f"Failed to compute viewshed for {sensor.name} @ {alt}m: {e}", exc_info=True)
-                prog.console.print(f"[red]    Failed to compute viewshed for {sensor.name} @ {alt}m: {e}[/red]")
-            finally:
-                prog.remove_task(calc_task)
-                current_step += 100
-                prog.update(overall_task, completed=current_step)
-                # Restore original height
-                sensor.sensor_height_m_agl = original_h
+                    polys = compute_viewsheds(
+                        sensor, 
+                        [jobs[j]['alt'] for j in unit], 
+                        dem_client, 
+                        cfg_dict, 
+                        progress_callback=_UnitProgress(prog, calc_task, overall_task, base_step, span), 
+                        rich_progress=prog,
+                        altitude_mode=altitude_mode,
+                        use_cache=not no_cache
+                    )
+                    _export_unit(unit, polys)
+                    
+                    if verbose >= 2:
+                        log_memory_usage(log, f"After {label}")
+                        
+                except Exception as e:
+                    log.error(f"Failed to compute viewshed for {label}: {e}", exc_info=True)
+                    prog.console.print(f"[red]    Failed to compute viewshed for {label}: {e}[/red]")
+                finally:
+                    prog.update(calc_task, visible=False)
+                    completed_jobs += len(unit)
+                    prog.update(overall_task, completed=base_step + span)
+            prog.remove_task(calc_task)
+        else:
+            # Jobs are independent and CPU-bound: fan them out to a worker pool.
+            # DEM tiles were fetched in step 2, so workers only read the local cache.
+            use_threads = settings.concurrency.mode == "thread"
+            if len(units) < workers:
+                # Too few sensors to keep every worker busy: run altitudes as separate jobs
+                units = [[job_id] for job_id in range(len(jobs))]
+            if verbose >= 1:
+                prog.console.print(f"[dim][INFO] Running {len(jobs)} viewsheds on {workers} {'threads' if use_threads else 'processes'}[/dim]")
+            # queue.Queue for threads, a multiprocessing queue for worker processes
+            progress_queue: Any
+            executor: Executor
+            if use_threads:
+                progress_queue = queue.Queue()
+                executor = ThreadPoolExecutor(max_workers=workers)
+            else:
+                # spawn: forking while Rich's refresh thread holds locks can deadlock the children
+                mp_ctx = multiprocessing.get_context("spawn")
+                progress_queue = mp_ctx.Queue()
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=mp_ctx,
+                    initializer=init_viewshed_worker,
+                    # Shared by every job: sent once per worker, not pickled per job
+                    initargs=(progress_queue, dem_client, cfg_dict)
+                )
+
+            prog.update(overall_task, description=f"Computing {len(jobs)} viewsheds ({workers} workers)...")
+            # One hidden bar per worker, lent to whichever job is running on it
+            free_slots = [prog.add_task("", total=100, visible=False) for _ in range(workers)]
+            calc_tasks = {}   # unit_id -> slot for units that have reported progress
+            partial = {}      # unit_id -> progress within the unit (100 per job)
+            finished = set()
+            completed_jobs = 0
+
+            def _drain_progress() -> None:
+                while True:
+                    try:
+                        unit_id, step, fraction = progress_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if unit_id in finished:
+                        continue  # late message from a unit already exported
+                    if unit_id not in calc_tasks and free_slots:
+                        calc_tasks[unit_id] = free_slots.pop()
+                        prog.reset(calc_tasks[unit_id], total=100, visible=True)
+                    if unit_id in calc_tasks:
+                        prog.update(calc_tasks[unit_id], description=f"  {jobs[units[unit_id][0]]['sensor'].name}: {step}...", completed=fraction * 100)
+                    partial[unit_id] = fraction * 100 * len(units[unit_id])
+
+            try:
+                # Units are submitted as slots free up (at most in_flight_limit running or
+                # queued in the pool), so memory pressure can throttle the run mid-way.
+                queued = list(range(len(units)))
+                queued.reverse()
+                in_flight_limit = workers
+                futures = {}
+                pending: set[Future] = set()
+                while pending or queued:
+                    while queued and len(pending) < in_flight_limit:
+                        unit_id = queued.pop()
+                        unit = units[unit_id]
+                        fut = executor.submit(
+                            run_viewshed_job,
+                            unit_id,
+                            jobs[unit[0]]['sensor'],
+                            [jobs[j]['alt'] for j in unit],
+                            dem_client if use_threads else None,
+                            cfg_dict if use_threads else None,
+                            altitude_mode,
+                            not no_cache,
+                            progress_queue if use_threads else None
+                        )
+                        futures[fut] = unit_id
+                        pending.add(fut)
+                    if is_shutdown_requested():
+                        # Let in-flight jobs finish (they cannot be interrupted), drop the rest
+                        queued.clear()
+                        for fut in pending:
+                            fut.cancel()
+                        executor.shutdown(wait=True)
+                        _interrupted(completed_jobs)
+                    done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    _drain_progress()
+                    if in_flight_limit > 1 and psutil.virtual_memory().percent > max_ram_percent:
+                        in_flight_limit = max(1, in_flight_limit // 2)
+                        prog.console.print(f"[yellow]Memory above {max_ram_percent}% - running at most {in_flight_limit} viewshed(s) at once.[/yellow]")
+                    for fut in done:
+                        unit_id = futures[fut]
+                        unit = units[unit_id]
+                        try:
+                            _export_unit(unit, fut.result())
+                        except Exception as e:
+                            log.error(f"Failed to compute viewshed for {_unit_label(unit)}: {e}", exc_info=True)
+                            prog.console.print(f"[red]    Failed to compute viewshed for {_unit_label(unit)}: {e}[/red]")
+                        finally:
+                            finished.add(unit_id)
+                            if unit_id in calc_tasks:
+                                slot = calc_tasks.pop(unit_id)
+                                prog.update(slot, visible=False)
+                                free_slots.append(slot)
+                            partial.pop(unit_id, None)
+                            completed_jobs += len(unit)
+                    prog.update(overall_task, completed=completed_jobs * 100 + sum(partial.values()))
+            except BaseException:
+                # Force quit / unexpected error: do not wait for running workers
+                executor.shutdown(wait=False, cancel_futures=True)
+                if not use_threads:
+                    for child in multiprocessing.active_children():
+                        child.terminate()
+                raise
+            else:
+                executor.shutdown(wait=True)
+            for slot in free_slots:
+                prog.remove_task(slot)
             
+
     print("[green]Viewshed computation complete.[/green]")
     
     end_time = time.time()
@@ -1042,52 +1475,14 @@ def detection_range(
         raise typer.Exit(code=1)
 
     # Resolve inputs (handle wildcards manually if shell didn't)
-    resolved_files = []
-    import glob
-    for inp in all_inputs:
-        # Check if it's a glob pattern
-        if "*" in inp or "?" in inp or "[" in inp:
-            matches = glob.glob(inp)
-            if not matches:
-                # Try fallback dir
-                fallback_pattern = str(default_viewshed_dir / inp)
-                matches = glob.glob(fallback_pattern)
-                
-            if not matches:
-                typer.echo(f"[yellow]Warning: No files matched pattern {inp} (checked CWD and {default_viewshed_dir})[/yellow]")
-            for m in matches:
-                p = Path(m)
-                if p.is_file():
-                    resolved_files.append(p)
-        else:
-            p = Path(inp)
-            if p.exists() and p.is_file():
-                resolved_files.append(p)
-            else:
-                # Check fallback
-                fallback = default_viewshed_dir / p.name
-                if fallback.exists() and fallback.is_file():
-                    resolved_files.append(fallback)
-                elif p.is_dir():
-                     typer.echo(f"[yellow]Warning: {inp} is a directory. Skipping.[/yellow]")
-                else:
-                    typer.echo(f"[yellow]Warning: File {inp} not found (checked CWD and {default_viewshed_dir}).[/yellow]")
+    resolved_files = _resolve_viewshed_inputs(all_inputs, default_viewshed_dir)
     
     if not resolved_files:
         typer.echo("[red]No valid input files provided.[/red]")
         raise typer.Exit(code=1)
 
     # Resolve ranges
-    final_ranges = []
-    if ranges:
-        for r_str in ranges:
-            # Split by comma
-            parts = r_str.split(',')
-            for p in parts:
-                try:
-                    final_ranges.append(float(p.strip()))
-                except ValueError:
-                    typer.echo(f"[yellow]Warning: Invalid range value '{p}'. Skipping.[/yellow]")
+    final_ranges = _parse_float_list(ranges, "range")
     
     # Fallback to config
     if not final_ranges:
@@ -1104,12 +1499,13 @@ def detection_range(
     if verbose >= 1:
         console.print(f"[bold blue]Parsing {len(resolved_files)} input files...[/bold blue]")
     parsed_data = []
+    to_parse = []  # (file, altitude, reference, sensor height) for files with a usable name
     for kml_file in resolved_files:
         if verbose >= 2:
             log.debug(f"Parsing file: {kml_file}")
 
         # Extract altitude from filename
-        match = re.search(r"tgt_alt_([\d.]+)m(?:_([A-Za-z]+))?", kml_file.name)
+        match = _RE_TGT_ALT.search(kml_file.name)
         if not match:
             msg = f"Warning: Could not extract altitude from filename {kml_file.name}. Skipping."
             if verbose >= 1:
@@ -1121,30 +1517,32 @@ def detection_range(
         reference = match.group(2)
 
         # Extract sensor height from filename (optional)
-        sh_match = re.search(r"_sh_([\d.]+)m", kml_file.name)
+        sh_match = _RE_SENSOR_HEIGHT.search(kml_file.name)
         sensor_height = float(sh_match.group(1)) if sh_match else None
+        to_parse.append((kml_file, altitude, reference, sensor_height))
         
-        # Parse KML
-        try:
-            results = parse_viewshed_kml(str(kml_file))
-            if verbose >= 2:
-                log.debug(f"  Found {len(results)} viewshed(s) in {kml_file.name}")
-            
-            for res in results:
-                parsed_data.append({
-                    'file': kml_file,
-                    'altitude': altitude,
-                    'reference': reference,
-                    'sensor_height': sensor_height,
-                    'sensor': res['sensor'],
-                    'viewshed': res['viewshed'],
-                    'style': res.get('style', {}),
-                    'name': res.get('sensor_name') or res.get('folder_name') or kml_file.stem
-                })
-        except Exception as e:
-            log.error(f"Failed to parse {kml_file}: {e}")
+    # Parse KML
+    parsed_files = _parse_viewshed_files([f for f, _, _, _ in to_parse])
+    for (kml_file, altitude, reference, sensor_height), (results, error) in zip(to_parse, parsed_files):
+        if error is not None:
+            log.error(f"Failed to parse {kml_file}: {error}")
             if verbose >= 1:
-                console.print(f"[red]Failed to parse {kml_file}: {e}[/red]")
+                console.print(f"[red]Failed to parse {kml_file}: {error}[/red]")
+            continue
+        if verbose >= 2:
+            log.debug(f"  Found {len(results)} viewshed(s) in {kml_file.name}")
+        
+        for res in results:
+            parsed_data.append({
+                'file': kml_file,
+                'altitude': altitude,
+                'reference': reference,
+                'sensor_height': sensor_height,
+                'sensor': res['sensor'],
+                'viewshed': res['viewshed'],
+                'style': res.get('style', {}),
+                'name': res.get('sensor_name') or res.get('folder_name') or kml_file.stem
+            })
 
     if not parsed_data:
         typer.echo("[red]No valid data found in input files.[/red]")
@@ -1162,13 +1560,19 @@ def detection_range(
     output_dir = resolve_output_path(output_dir, default_detection_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    # Clipping is GEOS work that releases the GIL, so sensors are clipped on threads
+    try:
+        clip_workers = min(int(settings.max_threads), _available_cpus())
+    except (TypeError, ValueError, AttributeError):
+        clip_workers = 1
+
     # Process
     with progress.Progress(
         progress.SpinnerColumn(),
         progress.TextColumn("[progress.description]{task.description}"),
         transient=True,
         console=console
-    ) as prog:
+    ) as prog, (ThreadPoolExecutor(max_workers=clip_workers) if clip_workers > 1 else contextlib.nullcontext()) as clip_pool:
         # Total tasks = groups * ranges
         total_steps = len(by_alt_ref) * len(final_ranges)
         task = prog.add_task("Processing detection ranges...", total=total_steps)
@@ -1178,16 +1582,20 @@ def detection_range(
         
         for i, (alt, ref, sh) in enumerate(sorted_keys, 1):
             items = by_alt_ref[(alt, ref, sh)]
+            # Filename parts fixed for the whole group
+            alt_str = format_number(alt)
+            ref_suffix = f"_{ref}" if ref else ""
+            prefix = f"{i:02d}_"
             
             # Group by location to detect collisions (same site, multiple viewsheds)
             # This handles the case where we have multiple heights for the same site in the same group
             # (e.g. if SH extraction failed, or if user wants to process variants)
             items_by_loc = {}
             for item in items:
-                # Use rounded coordinates to group same locations (approx 1m precision)
-                # item['sensor'] is a tuple (lon, lat)
+                # Group same locations on a 1e-5 degree (approx 1m) grid, as integers
+                # so the key hashes cheaply; item['sensor'] is a tuple (lon, lat)
                 sensor_loc = item['sensor']
-                loc_key = (round(sensor_loc[0], 5), round(sensor_loc[1], 5))
+                loc_key = (round(float(sensor_loc[0]) * 1e5), round(float(sensor_loc[1]) * 1e5))
                 if loc_key not in items_by_loc:
                     items_by_loc[loc_key] = []
                 items_by_loc[loc_key].append(item)
@@ -1200,6 +1608,12 @@ def detection_range(
             if verbose >= 2 and max_variants > 1:
                 log.debug(f"Detected {max_variants} variants/scenarios for group Alt:{alt}m")
 
+            # Sites with fewer variants appear in several scenarios; clip each
+            # viewshed once per range. Ranges ascend, so a viewshed that lies
+            # wholly inside one circle is returned unchanged for the rest.
+            clip_cache = {}
+            whole_inside = set()
+
             # Process each variant scenario
             for v_idx in range(max_variants):
                 scenario_items = []
@@ -1215,17 +1629,38 @@ def detection_range(
                 
                 # Add variant indicator to log/progress if needed
                 var_str = f" (Var {v_idx+1}/{max_variants})" if max_variants > 1 else ""
+                var_suffix = f"-var{v_idx+1}" if max_variants > 1 else ""
 
                 for rng in final_ranges:
+                    rng_str = format_number(rng)
                     if verbose >= 2:
                         log.debug(f"Processing Alt: {alt}m{ref_str}{sh_str}{var_str}, Range: {rng}km with {len(scenario_items)} inputs")
                     prog.update(task, description=f"Processing Alt: {alt}m{ref_str}{sh_str}{var_str}, Range: {rng}km")
                     
+                    to_clip = [
+                        item for item in scenario_items
+                        if id(item['viewshed']) not in whole_inside
+                        and (id(item['viewshed']), rng) not in clip_cache
+                    ]
+                    if verbose >= 2:
+                        for item in to_clip:
+                            log.debug(f"Clipping {item['name']} to {rng}km")
+                    clip_one = lambda item: clip_viewshed(item['viewshed'], item['sensor'], rng)
+                    if clip_pool is not None and len(to_clip) > 1:
+                        clipped_new = list(clip_pool.map(clip_one, to_clip))
+                    else:
+                        clipped_new = [clip_one(item) for item in to_clip]
+                    for item, clipped in zip(to_clip, clipped_new):
+                        clip_cache[(id(item['viewshed']), rng)] = clipped
+                        if clipped is item['viewshed']:
+                            whole_inside.add(id(item['viewshed']))
+
                     valid_results = []
                     for item in scenario_items:
-                        if verbose >= 2:
-                            log.debug(f"Clipping {item['name']} to {rng}km")
-                        clipped = clip_viewshed(item['viewshed'], item['sensor'], rng)
+                        if id(item['viewshed']) in whole_inside:
+                            clipped = item['viewshed']
+                        else:
+                            clipped = clip_cache[(id(item['viewshed']), rng)]
                         if not clipped.is_empty:
                             valid_results.append({'poly': clipped, 'item': item})
                     
@@ -1268,7 +1703,7 @@ def detection_range(
                         elif len(task_items) == 1:
                             # Try to extract sensor name from filename
                             # viewshed-(.*)-tgt_alt
-                            m_name = re.search(r"viewshed-(.*)-tgt_alt", task_items[0]['file'].name)
+                            m_name = _RE_VIEWSHED_NAME.search(task_items[0]['file'].name)
                             if m_name:
                                 base_name = m_name.group(1)
                             else:
@@ -1287,11 +1722,6 @@ def detection_range(
                             }
                         
                         # Construct filename (flat structure - no subfolders)
-                        alt_str = f"{int(alt)}" if alt.is_integer() else f"{alt}"
-                        rng_str = f"{int(rng)}" if rng.is_integer() else f"{rng}"
-                        ref_suffix = f"_{ref}" if ref else ""
-                        var_suffix = f"-var{v_idx+1}" if max_variants > 1 else ""
-                        prefix = f"{i:02d}_"
                         filename = f"{prefix}rangeplotter-{base_name}-tgt_alt_{alt_str}m{ref_suffix}-det_rng_{rng_str}km{var_suffix}.kml"
                         kml_doc_name = filename.replace(".kml", "")
                         
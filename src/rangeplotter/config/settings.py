@@ -1,6 +1,8 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import List, Optional
+from functools import lru_cache
+import copy
 import os
 from dotenv import load_dotenv
 import yaml
@@ -161,8 +163,7 @@ class Settings(BaseModel):
     @classmethod
     def from_file(cls, path: str | Path) -> "Settings":
         path = Path(path)
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        data = copy.deepcopy(_read_config_yaml(str(path.absolute()), path.stat().st_mtime_ns))
         settings = cls(**data)
         
         # Store the base path of the config file to resolve relative paths later
@@ -173,6 +174,15 @@ class Settings(BaseModel):
             settings.copernicus_api.client_id = "cdse-public"
         return settings
 
+# libyaml's C loader when PyYAML was built with it; same semantics as SafeLoader
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@lru_cache(maxsize=8)
+def _read_config_yaml(path: str, mtime_ns: int) -> dict:
+    """Parse a config file once per (path, mtime); callers must copy the result."""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
 def load_settings(config_name: str = "config.yaml") -> Settings:
     """
     Load settings by searching for config.yaml in priority order:
@@ -1,7 +1,10 @@
 from __future__ import annotations
 import math
+from functools import lru_cache
 from typing import Tuple
 
+import numpy as np
+
 WGS84_A = 6378137.0  # semi-major axis (m)
 WGS84_F = 1 / 298.257223563
 WGS84_E2 = 2 * WGS84_F - WGS84_F * WGS84_F
@@ -22,13 +25,34 @@ def gaussian_radius(lat_deg: float) -> float:
 def effective_earth_radius(lat_deg: float, k: float) -> float:
     return gaussian_radius(lat_deg) * k
 
+@lru_cache(maxsize=1024)
 def mutual_horizon_distance(observer_height_m: float, target_height_m: float, lat_deg: float, k: float) -> float:
     """Compute mutual LOS distance (m) between observer and target altitudes above MSL.
     d_max ≈ sqrt(2 * R_eff * h_obs) + sqrt(2 * R_eff * h_tgt)
+
+    Memoised: the same (site, altitude) pairs are evaluated by the CLI, the
+    ring builder and compute_viewshed within one run.
     """
     R_eff = effective_earth_radius(lat_deg, k)
     return math.sqrt(2 * R_eff * observer_height_m) + math.sqrt(2 * R_eff * target_height_m)
 
+def mutual_horizon_distance_vec(observer_heights_m: np.ndarray, target_height_m, lats_deg: np.ndarray, k: float) -> np.ndarray:
+    """Vectorised :func:`mutual_horizon_distance` over arrays of observer heights and latitudes.
+
+    target_height_m may be a scalar or an array; inputs broadcast, so e.g.
+    heights[:, None], lats[:, None] and altitudes[None, :] give an
+    (n_sites, n_altitudes) table. Negative heights (sites below MSL) are
+    clamped to 0 rather than producing NaN.
+    """
+    sin_phi = np.sin(np.radians(np.asarray(lats_deg, dtype=float)))
+    denom = np.sqrt(1 - WGS84_E2 * sin_phi * sin_phi)
+    N = WGS84_A / denom
+    M = WGS84_A * (1 - WGS84_E2) / (denom ** 3)
+    R_eff = np.sqrt(M * N) * k
+    h_obs = np.maximum(np.asarray(observer_heights_m, dtype=float), 0.0)
+    h_tgt = np.maximum(np.asarray(target_height_m, dtype=float), 0.0)
+    return np.sqrt(2 * R_eff * h_obs) + np.sqrt(2 * R_eff * h_tgt)
+
 def single_horizon_distance(observer_height_m: float, lat_deg: float, k: float) -> float:
     R_eff = effective_earth_radius(lat_deg, k)
     return math.sqrt(2 * R_eff * observer_height_m)
@@ -38,5 +62,6 @@ __all__ = [
     "gaussian_radius",
     "effective_earth_radius",
     "mutual_horizon_distance",
+    "mutual_horizon_distance_vec",
     "single_horizon_distance",
 ]
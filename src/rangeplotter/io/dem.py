@@ -10,10 +10,16 @@ dataset endpoints for COP-DEM are integrated.
 """
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, cast
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import os
+import threading
 import time
+import uuid
 import sys
 import json
 from urllib.parse import quote
@@ -21,11 +27,10 @@ import zipfile
 import io
 import shutil
 
+import numpy as np
 import requests
 import rasterio
-from shapely.geometry import box, Polygon, Point
-from shapely import wkt
-from shapely.ops import unary_union
+from rasterio.windows import Window
 from rich import print
 from rich.progress import track, Progress, SpinnerColumn, BarColumn, TextColumn, DownloadColumn, TransferSpeedColumn, TimeRemainingColumn
 
@@ -35,6 +40,42 @@ except Exception:  # pragma: no cover
     CdseAuth = None  # type: ignore
 
 
+# OData Intersects clauses OR'd into one catalogue request by query_tiles_many
+_MAX_OR_CLAUSES = 20
+
+# Read/copy size for tile downloads; tiles are ~25 MB, so 1 MiB keeps the
+# number of socket reads and Python-level loop iterations small
+_DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Extensions of DEM tile files in the cache (see _tile_path)
+_TILE_SUFFIXES = (".dt2", ".dt1", ".tif")
+
+# numpy dtype name -> GDAL data type, for raw tile headers
+_GDAL_TYPES = {"int16": "Int16", "uint16": "UInt16", "int32": "Int32", "float32": "Float32", "float64": "Float64"}
+
+
+def _parse_footprint(footprint_raw: Optional[str]):
+    """Parse an OData footprint (``geography'SRID=4326;POLYGON ((...))'``) into a shapely geometry."""
+    if not footprint_raw:
+        return None
+    from shapely import wkt
+    try:
+        wkt_str = footprint_raw.split(";", 1)[1].rstrip("'") if ";" in footprint_raw else footprint_raw
+        return wkt.loads(wkt_str)
+    except Exception:
+        return None
+
+
+def _tile_score(name: str) -> int:
+    """Resolution preference for an indexed product: 30 m (DT2) over 90 m (DT1) over anything else."""
+    name = name.lower()
+    if "dte_30" in name or "dt2" in name:
+        return 3
+    if "dte_90" in name or "dt1" in name:
+        return 2
+    return 1
+
+
 @dataclass
 class DemTile:
     id: str
@@ -42,9 +83,25 @@ class DemTile:
     local_path: Path
     downloaded: bool = False
 
+    def is_cached(self) -> bool:
+        """True if a non-empty file is present at local_path (a single stat call)."""
+        try:
+            return self.local_path.stat().st_size > 0
+        except OSError:
+            return False
+
+
+def partition_cached(tiles: Iterable[DemTile]) -> Tuple[List[DemTile], List[DemTile]]:
+    """Split tiles into (cached, missing), checking each tile's file once."""
+    cached: List[DemTile] = []
+    missing: List[DemTile] = []
+    for t in tiles:
+        (cached if t.is_cached() else missing).append(t)
+    return cached, missing
+
 
 class DemClient:
-    def __init__(self, base_url: str, auth: Optional["CdseAuth"], cache_dir: Path, verbose: int = 0):
+    def __init__(self, base_url: str, auth: Optional["CdseAuth"], cache_dir: Path, verbose: int = 0, max_workers: int = 1):
         self.base_url = base_url.rstrip("/")  # Expected: https://catalogue.dataspace.copernicus.eu/odata/v1
         self.auth = auth
         self.cache_dir = cache_dir
@@ -54,6 +111,80 @@ class DemClient:
         if not self._index_path.exists():
             self._index_path.write_text("{}", encoding="utf-8")
         self.total_download_time = 0.0
+        # Number of tiles fetched concurrently by ensure_tiles/ensure_tiles_many.
+        self.max_workers = max(1, int(max_workers))
+        self._time_lock = threading.Lock()
+        # Serialises read-modify-write of index.json / query_cache.json
+        self._cache_lock = threading.Lock()
+        # Tile lists for recently resolved bboxes, keyed like the on-disk query cache.
+        self._tile_lookup_cache: "OrderedDict[str, List[DemTile]]" = OrderedDict()
+        # Pooled session, created on first request so TLS connections are reused across queries and downloads.
+        self._session: Optional[requests.Session] = None
+        # (index.json stat key, pids, footprints, scores, STRtree), rebuilt when index.json changes.
+        self._footprint_cache: Optional[tuple] = None
+
+    @property
+    def cache_version(self) -> str:
+        """Token that changes whenever DEM tiles are added to, replaced in or removed from the cache.
+
+        Derived from the tile files themselves (name, size, mtime), so rewrites of
+        index.json / query_cache.json or derived files do not change it.
+        """
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                tiles = sorted(
+                    (e.name, st.st_size, st.st_mtime_ns)
+                    for e in entries
+                    if e.name.endswith(_TILE_SUFFIXES) and e.is_file()
+                    for st in (e.stat(),)
+                )
+        except OSError:
+            return ""
+        return hashlib.md5(repr(tiles).encode("utf-8")).hexdigest()
+
+    def _get_session(self) -> requests.Session:
+        """Return the pooled requests.Session, building it on first use."""
+        if self._session is None:
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            # Catalogue queries and tile GETs are idempotent: retry transient server errors
+            # and throttling with backoff, honouring Retry-After.
+            retry = Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            # One pool per host (catalogue + download redirect targets), sized for the download threads.
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(8, self.max_workers * 2), max_retries=retry)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def close(self) -> None:
+        """Release pooled HTTP connections."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __getstate__(self) -> dict:
+        # Locks and sessions do not pickle; process-pool workers rebuild them.
+        state = self.__dict__.copy()
+        state["_time_lock"] = None
+        state["_cache_lock"] = None
+        state["_session"] = None
+        state["_footprint_cache"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._time_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
 
     def _log(self, msg: str, is_error: bool = False, level: int = 1):
         if is_error:
@@ -81,71 +212,138 @@ class DemClient:
         except Exception:
             return {}
 
+    def _footprint_index(self):
+        """Return (pids, footprints, scores, tree) for every indexed product with a parsable footprint.
+
+        The STRtree is built once per index.json version, so point and bbox
+        lookups against the local index cost O(log T) rather than parsing
+        and testing every footprint on each call.
+        """
+        from shapely import STRtree
+
+        try:
+            st = self._index_path.stat()
+            key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            key = None
+        cached = self._footprint_cache
+        if cached is not None and key is not None and cached[0] == key:
+            return cached[1:]
+        pids, footprints, scores = [], [], []
+        for pid, meta in self._load_index().items():
+            poly = _parse_footprint(meta.get("footprint"))
+            if poly is None:
+                continue
+            pids.append(pid)
+            footprints.append(poly)
+            scores.append(_tile_score(meta.get("name", "")))
+        tree = STRtree(footprints)
+        self._footprint_cache = (key, pids, footprints, scores, tree)
+        return pids, footprints, scores, tree
+
     def _save_index(self, idx: dict) -> None:
         try:
-            self._index_path.write_text(json.dumps(idx, indent=2), encoding="utf-8")
+            self._atomic_write_text(self._index_path, json.dumps(idx, indent=2))
         except Exception as e:
             self._log(f"Failed to save DEM index: {e}", is_error=True)
 
-    def query_tiles(self, bbox: Tuple[float, float, float, float], limit: int = 20) -> List[DemTile]:
-        """Query COP-DEM products intersecting bbox. If auth missing, return synthetic tile."""
-        # Check local index coverage first
-        local_tiles = self._check_local_coverage(bbox)
-        if local_tiles:
-            return local_tiles
+    @staticmethod
+    def _temp_path(path: Path) -> Path:
+        return path.with_name(f"{path.name}.tmp.{uuid.uuid4().hex[:8]}")
 
-        if not self.auth:
-            minx, miny, maxx, maxy = bbox
-            tile_id = f"synthetic_{minx:.3f}_{miny:.3f}_{maxx:.3f}_{maxy:.3f}"
-            path = self.cache_dir / f"{tile_id}.tif"
-            return [DemTile(id=tile_id, bbox=bbox, local_path=path, downloaded=path.exists())]
-        token = self._access_token()
-        if not token or not isinstance(token, str):
-            self._log("No valid access token; falling back to synthetic tile.", is_error=True)
-            minx, miny, maxx, maxy = bbox
-            tile_id = f"synthetic_{minx:.3f}_{miny:.3f}_{maxx:.3f}_{maxy:.3f}"
-            path = self.cache_dir / f"{tile_id}.tif"
-            return [DemTile(id=tile_id, bbox=bbox, local_path=path, downloaded=path.exists())]
-
-        poly = self._bbox_polygon_wkt(bbox)
-        # Build OData filter
-        # Check query cache first
-        query_key = f"{bbox[0]:.4f}_{bbox[1]:.4f}_{bbox[2]:.4f}_{bbox[3]:.4f}"
+    def _atomic_write_text(self, path: Path, text: str) -> None:
+        """Write via a temp file + rename so concurrent readers never see a partial file."""
+        temp_path = self._temp_path(path)
+        try:
+            temp_path.write_text(text, encoding="utf-8")
+            os.replace(temp_path, path)
+        except Exception:
+            try:
+                temp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            raise
+
+    def _tile_path(self, pid: str) -> Path:
+        """Local path for a product: an existing .dt2/.dt1/.tif file, else the default .dt2 name."""
+        # Check for existing file with supported extensions
+        for ext in [".dt2", ".dt1", ".tif"]:
+            p = self.cache_dir / f"{pid}{ext}"
+            if p.exists():
+                return p
+        return self.cache_dir / f"{pid}.dt2"  # Default
+
+    def _synthetic_tiles(self, bbox: Tuple[float, float, float, float]) -> List[DemTile]:
+        minx, miny, maxx, maxy = bbox
+        tile_id = f"synthetic_{minx:.3f}_{miny:.3f}_{maxx:.3f}_{maxy:.3f}"
+        path = self.cache_dir / f"{tile_id}.tif"
+        return [DemTile(id=tile_id, bbox=bbox, local_path=path, downloaded=path.exists())]
+
+    @staticmethod
+    def _query_key(bbox: Tuple[float, float, float, float]) -> str:
+        return f"{bbox[0]:.4f}_{bbox[1]:.4f}_{bbox[2]:.4f}_{bbox[3]:.4f}"
+
+    def _load_query_cache(self) -> dict:
         query_cache_path = self.cache_dir / "query_cache.json"
-        query_cache = {}
         if query_cache_path.exists():
             try:
-                query_cache = json.loads(query_cache_path.read_text(encoding="utf-8"))
+                return json.loads(query_cache_path.read_text(encoding="utf-8"))
             except Exception:
                 pass
-        
-        cached_ids = query_cache.get(query_key)
-        if cached_ids:
-            # Reconstruct tiles from cache
-            tiles = []
-            for pid in cached_ids:
-                # Check for existing file with supported extensions
-                found_path = None
-                for ext in [".dt2", ".dt1", ".tif"]:
-                    p = self.cache_dir / f"{pid}{ext}"
-                    if p.exists():
-                        found_path = p
-                        break
-                
-                if found_path:
-                    path = found_path
-                else:
-                    path = self.cache_dir / f"{pid}.dt2" # Default
-                
-                tiles.append(DemTile(id=pid, bbox=bbox, local_path=path, downloaded=path.exists()))
-            return tiles
+        return {}
+
+    def _cached_query_ids(self, query_cache: dict, bbox: Tuple[float, float, float, float]) -> Optional[List[str]]:
+        """Product IDs for bbox from query_cache.json, or None on a miss.
 
-        poly_enc = quote(f"SRID=4326;{poly}")
-        base_filter = f"Collection/Name eq 'COP-DEM' and OData.CSC.Intersects(area=geography'{poly_enc}')"
+        An exact entry wins. Otherwise any earlier query whose bbox contains this
+        one answers it, keeping only the products whose indexed footprint
+        intersects bbox (products without a footprint are kept).
+        """
+        ids = query_cache.get(self._query_key(bbox))
+        if ids:
+            return ids
+        minx, miny, maxx, maxy = bbox
+        footprints = None
+        for key, cached_ids in query_cache.items():
+            if not cached_ids:
+                continue
+            try:
+                kminx, kminy, kmaxx, kmaxy = (float(v) for v in key.split("_"))
+            except ValueError:
+                continue
+            if kminx <= minx and kminy <= miny and kmaxx >= maxx and kmaxy >= maxy:
+                if footprints is None:
+                    from shapely.geometry import box
+                    pids, polys, _, _ = self._footprint_index()
+                    footprints = dict(zip(pids, polys))
+                    target = box(*bbox)
+                ids = []
+                for pid in cached_ids:
+                    fp = footprints.get(pid)
+                    if fp is None or fp.intersects(target):
+                        ids.append(pid)
+                if ids:
+                    return ids
+        return None
+
+    def _tiles_for_ids(self, ids: List[str], bbox: Tuple[float, float, float, float]) -> List[DemTile]:
+        tiles = []
+        for pid in ids:
+            path = self._tile_path(pid)
+            tiles.append(DemTile(id=pid, bbox=bbox, local_path=path, downloaded=path.exists()))
+        return tiles
+
+    def _products_filter(self, bboxes: List[Tuple[float, float, float, float]]) -> str:
+        """OData $filter for COP-DEM products intersecting any of ``bboxes``."""
+        clauses = []
+        for bbox in bboxes:
+            poly_enc = quote(f"SRID=4326;{self._bbox_polygon_wkt(bbox)}")
+            clauses.append(f"OData.CSC.Intersects(area=geography'{poly_enc}')")
+        area = clauses[0] if len(clauses) == 1 else "(" + " or ".join(clauses) + ")"
+        base_filter = f"Collection/Name eq 'COP-DEM' and {area}"
         dataset_identifier = None
         try:
             # Attempt to read dataset identifier from auth (not ideal) or environment via index path context; left flexible
-            import os
             dataset_identifier = os.getenv("COPERNICUS_DATASET_IDENTIFIER")
         except Exception:
             dataset_identifier = None
@@ -155,78 +353,162 @@ class DemClient:
                 "Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'datasetIdentifier' "
                 f"and att/OData.CSC.StringAttribute/Value eq '{dataset_identifier}')"
             )
-            flt = f"{base_filter} and {attr_filter}"
-        else:
-            flt = base_filter
-        url = f"{self._odata_products_url()}?$filter={flt}&$select=Id,Name,Footprint&$top={limit}"
+            return f"{base_filter} and {attr_filter}"
+        return base_filter
+
+    def _fetch_products(self, flt: str, limit: int, token: str) -> List[dict]:
+        """Run an OData product query, following nextLink pages. Raises on HTTP errors or no results."""
+        url: Optional[str] = f"{self._odata_products_url()}?$filter={flt}&$select=Id,Name,Footprint&$top={limit}"
         headers = {"Authorization": f"Bearer {token}"}
-        tiles: List[DemTile] = []
-        try:
-            # Handle pagination to ensure we get ALL tiles covering the area
-            items = []
-            while url:
-                resp = requests.get(url, headers=headers, timeout=60)
-                if resp.status_code != 200:
-                    self._log(f"OData query failed ({resp.status_code}); using synthetic tile.", is_error=True)
-                    raise RuntimeError(resp.text)
-                data = resp.json()
-                current_items = data.get("value") or data.get("result") or []
-                items.extend(current_items)
-                
-                # Check for next link
-                next_link = data.get("@odata.nextLink")
-                if next_link:
-                    url = next_link
-                    # Ensure base URL is correct if nextLink is relative (usually absolute)
-                    if not url.startswith("http"):
-                         url = f"{self.base_url}/{url}"
-                else:
-                    url = None
-
-            if not items:
-                self._log("No COP-DEM products returned; using synthetic fallback.", is_error=True)
-                raise RuntimeError("empty")
+        # Handle pagination to ensure we get ALL tiles covering the area
+        items: List[dict] = []
+        while url:
+            resp = self._get_session().get(url, headers=headers, timeout=60)
+            if resp.status_code != 200:
+                self._log(f"OData query failed ({resp.status_code}); using synthetic tile.", is_error=True)
+                raise RuntimeError(resp.text)
+            data = resp.json()
+            current_items = data.get("value") or data.get("result") or []
+            items.extend(current_items)
+            
+            # Check for next link
+            next_link = data.get("@odata.nextLink")
+            if next_link:
+                url = next_link
+                # Ensure base URL is correct if nextLink is relative (usually absolute)
+                if not url.startswith("http"):
+                     url = f"{self.base_url}/{url}"
+            else:
+                url = None
+
+        if not items:
+            self._log("No COP-DEM products returned; using synthetic fallback.", is_error=True)
+            raise RuntimeError("empty")
+        return items
+
+    def _record_products(self, items: List[dict], ids_by_key: dict) -> None:
+        """Add product metadata to index.json and query results to query_cache.json."""
+        with self._cache_lock:
             idx = self._load_index()
-            found_ids = []
             for it in items:
                 pid = it.get("Id") or it.get("id")
-                if not pid:
-                    continue
-                found_ids.append(pid)
-                # Check for existing file with supported extensions
-                found_path = None
-                for ext in [".dt2", ".dt1", ".tif"]:
-                    p = self.cache_dir / f"{pid}{ext}"
-                    if p.exists():
-                        found_path = p
-                        break
-                
-                if found_path:
-                    path = found_path
-                else:
-                    path = self.cache_dir / f"{pid}.dt2" # Default
-                
-                tiles.append(DemTile(id=pid, bbox=bbox, local_path=path, downloaded=path.exists()))
-                if pid not in idx:
+                if pid and pid not in idx:
                     idx[pid] = {"name": it.get("Name"), "footprint": it.get("Footprint")}
             self._save_index(idx)
             
-            # Update query cache
-            query_cache[query_key] = found_ids
+            # Update query cache (re-read so concurrent queries don't drop each other's entries)
+            query_cache = self._load_query_cache()
+            query_cache.update(ids_by_key)
             try:
-                query_cache_path.write_text(json.dumps(query_cache, indent=2), encoding="utf-8")
+                self._atomic_write_text(self.cache_dir / "query_cache.json", json.dumps(query_cache, indent=2))
             except Exception as e:
                 self._log(f"Failed to save query cache: {e}", is_error=True)
-                
+
+    def query_tiles(self, bbox: Tuple[float, float, float, float], limit: int = 20) -> List[DemTile]:
+        """Query COP-DEM products intersecting bbox. If auth missing, return synthetic tile."""
+        # Check local index coverage first
+        local_tiles = self._check_local_coverage(bbox)
+        if local_tiles:
+            return local_tiles
+
+        if not self.auth:
+            return self._synthetic_tiles(bbox)
+
+        # Check query cache before asking for a token, so cache hits cost no auth round-trip
+        query_key = self._query_key(bbox)
+        cached_ids = self._cached_query_ids(self._load_query_cache(), bbox)
+        if cached_ids:
+            # Reconstruct tiles from cache
+            return self._tiles_for_ids(cached_ids, bbox)
+
+        token = self._access_token()
+        if not token or not isinstance(token, str):
+            self._log("No valid access token; falling back to synthetic tile.", is_error=True)
+            return self._synthetic_tiles(bbox)
+
+        tiles: List[DemTile] = []
+        try:
+            items = self._fetch_products(self._products_filter([bbox]), limit, token)
+            found_ids = [pid for pid in ((it.get("Id") or it.get("id")) for it in items) if pid]
+            tiles = self._tiles_for_ids(found_ids, bbox)
+            self._record_products(items, {query_key: found_ids})
         except Exception as e:
             self._log(f"DEM query exception: {e}; falling back to synthetic tile.", is_error=True)
             if not tiles:
-                minx, miny, maxx, maxy = bbox
-                tile_id = f"synthetic_{minx:.3f}_{miny:.3f}_{maxx:.3f}_{maxy:.3f}"
-                path = self.cache_dir / f"{tile_id}.tif"
-                tiles = [DemTile(id=tile_id, bbox=bbox, local_path=path, downloaded=path.exists())]
+                tiles = self._synthetic_tiles(bbox)
         return tiles
 
+    def query_tiles_many(self, bboxes: List[Tuple[float, float, float, float]], limit: int = 20) -> dict:
+        """Query tiles for several bboxes, batching catalogue misses into OR'd OData filters.
+
+        Bboxes answered by the local index or the query cache cost no request.
+        The rest are sent ``_MAX_OR_CLAUSES`` at a time as one filter, and the
+        products are split back per bbox by footprint; with ``max_workers > 1``
+        the batches are sent concurrently. Returns ``{bbox: [DemTile]}``.
+        """
+        results: dict = {}
+        pending: List[Tuple[float, float, float, float]] = []
+        query_cache = self._load_query_cache()
+        # tuple() makes list bboxes hashable; dict.fromkeys drops duplicates in order
+        unique = dict.fromkeys(cast(Tuple[float, float, float, float], tuple(b)) for b in bboxes)
+        for bbox in unique:
+            local_tiles = self._check_local_coverage(bbox)
+            cached_ids = self._cached_query_ids(query_cache, bbox) if (self.auth and not local_tiles) else None
+            if local_tiles:
+                results[bbox] = local_tiles
+            elif cached_ids:
+                results[bbox] = self._tiles_for_ids(cached_ids, bbox)
+            else:
+                pending.append(bbox)
+
+        token = self._access_token() if (self.auth and len(pending) > 1) else None
+        if not token or not isinstance(token, str):
+            # Nothing to batch (or no token): the single-bbox path handles fallbacks
+            for bbox in pending:
+                results[bbox] = self.query_tiles(bbox, limit=limit)
+            return results
+
+        groups = [pending[i:i + _MAX_OR_CLAUSES] for i in range(0, len(pending), _MAX_OR_CLAUSES)]
+        if self.max_workers <= 1 or len(groups) <= 1:
+            for group in groups:
+                results.update(self._query_group(group, limit, token))
+            return results
+
+        # Batches are independent, latency-bound requests: send them concurrently
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as pool:
+            for group_results in pool.map(lambda g: self._query_group(g, limit, token), groups):
+                results.update(group_results)
+        return results
+
+    def _query_group(self, group: List[Tuple[float, float, float, float]], limit: int, token: str) -> dict:
+        """Resolve one OR'd batch of bboxes for query_tiles_many. Returns ``{bbox: [DemTile]}``."""
+        from shapely.geometry import box
+
+        results = {}
+        try:
+            items = self._fetch_products(self._products_filter(group), limit, token)
+        except Exception as e:
+            self._log(f"Batched DEM query failed ({e}); querying bboxes individually.", level=1)
+            for bbox in group:
+                results[bbox] = self.query_tiles(bbox, limit=limit)
+            return results
+
+        footprints = []
+        for it in items:
+            pid = it.get("Id") or it.get("id")
+            if pid:
+                footprints.append((pid, _parse_footprint(it.get("Footprint"))))
+        ids_by_key = {}
+        for bbox in group:
+            target = box(*bbox)
+            # Products without a parseable footprint are kept for every bbox in the group
+            ids = [pid for pid, fp in footprints if fp is None or fp.intersects(target)]
+            results[bbox] = self._tiles_for_ids(ids, bbox) if ids else self._synthetic_tiles(bbox)
+            if ids:
+                ids_by_key[self._query_key(bbox)] = ids
+        self._record_products(items, ids_by_key)
+        return results
+
     def sample_elevation(self, lon: float, lat: float) -> float:
         """Sample elevation (m) at lon/lat from the best available DEM tile.
 
@@ -234,12 +516,15 @@ class DemClient:
         1. Checks index.json for tiles covering the point, prioritizing high-res (DT2/30m).
         2. Fallback: Scans cache directory, prioritizing .dt2 files.
         """
+        from shapely.geometry import Point
+
         # Helper to sample from a dataset
         def _sample_from_ds(ds, x, y):
             try:
                 row, col = ds.index(x, y)
                 if 0 <= row < ds.height and 0 <= col < ds.width:
-                    val = ds.read(1)[row, col]
+                    # 1-pixel window: only the block holding the pixel is decoded
+                    val = ds.read(1, window=Window(col, row, 1, 1))[0, 0]
                     # Filter nodata if possible, though usually handled by mask
                     return float(val)
             except Exception:
@@ -247,37 +532,12 @@ class DemClient:
             return None
 
         # 1. Try to find the best tile via index.json
-        idx = self._load_index()
-        candidates = []
-        point = Point(lon, lat)
-        
-        for pid, meta in idx.items():
-            footprint_raw = meta.get("footprint")
-            if not footprint_raw:
-                continue
-            try:
-                # Parse WKT: geography'SRID=4326;POLYGON ((...))'
-                if ";" in footprint_raw:
-                    wkt_str = footprint_raw.split(";", 1)[1].rstrip("'")
-                else:
-                    wkt_str = footprint_raw
-                
-                poly = wkt.loads(wkt_str)
-                if poly.contains(point):
-                    name = meta.get("name", "").lower()
-                    score = 0
-                    # Prioritize 30m (DT2) over 90m (DT1)
-                    if "dte_30" in name or "dt2" in name: 
-                        score = 3
-                    elif "dte_90" in name or "dt1" in name: 
-                        score = 2
-                    else: 
-                        score = 1
-                    candidates.append((score, pid))
-            except Exception:
-                continue
-        
-        # Sort by score descending
+        pids, _, scores, tree = self._footprint_index()
+        # "within" tests point.within(footprint), i.e. footprint.contains(point)
+        hits = sorted(tree.query(Point(lon, lat), predicate="within").tolist())
+        candidates = [(scores[j], pids[j]) for j in hits]
+
+        # Sort by score descending (stable, so index order breaks ties)
         candidates.sort(key=lambda x: x[0], reverse=True)
         
         # Try to open candidates
@@ -315,14 +575,86 @@ class DemClient:
                     
         return 0.0
 
+    def _sample_tile(self, fpath: Path, idxs: List[int], lons: np.ndarray, lats: np.ndarray, out: np.ndarray) -> None:
+        """Fill out[i] for each point index in idxs that falls inside the tile at fpath."""
+        try:
+            with rasterio.open(fpath) as ds:
+                for i in idxs:
+                    try:
+                        row, col = ds.index(lons[i], lats[i])
+                        if 0 <= row < ds.height and 0 <= col < ds.width:
+                            out[i] = float(ds.read(1, window=Window(col, row, 1, 1))[0, 0])
+                            self._log(f"Sampled {out[i]}m from {fpath.name}", level=1)
+                    except Exception:
+                        pass
+        except Exception:
+            pass
+
+    def sample_elevations(self, lons, lats) -> np.ndarray:
+        """Sample elevations (m) for many lon/lat points, opening each DEM tile once.
+
+        Tile choice matches :meth:`sample_elevation` (index.json footprints, DT2
+        preferred). Points are bucketed by their best tile so each file is opened
+        a single time and read with 1-pixel windows rather than a full-band read;
+        with ``max_workers > 1`` the tiles are read concurrently. Points no
+        indexed tile can answer fall back to :meth:`sample_elevation`.
+        """
+        import shapely
+
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        out = np.full(lons.shape, np.nan)
+
+        # One bulk STRtree query for the whole batch; rank each point's hits best score first
+        pids, _, scores, tree = self._footprint_index()
+        point_idx, tile_idx = tree.query(shapely.points(lons, lats), predicate="within")
+        hits: List[List[int]] = [[] for _ in range(lons.size)]
+        for i, j in sorted(zip(point_idx.tolist(), tile_idx.tolist())):
+            hits[i].append(j)
+        fpaths: Dict[int, Optional[Path]] = {}
+
+        def _local_file(j: int) -> Optional[Path]:
+            if j not in fpaths:
+                fpaths[j] = next((p for p in (self.cache_dir / f"{pids[j]}{ext}" for ext in (".dt2", ".dt1", ".tif")) if p.exists()), None)
+            return fpaths[j]
+
+        candidates: List[List[Path]] = [
+            [p for p in (_local_file(j) for j in sorted(js, key=lambda j: scores[j], reverse=True)) if p is not None]
+            for js in hits
+        ]
+        cursor = [0] * len(candidates)
+        remaining = [i for i, c in enumerate(candidates) if c]
+        while remaining:
+            buckets: Dict[Path, List[int]] = {}
+            for i in remaining:
+                buckets.setdefault(candidates[i][cursor[i]], []).append(i)
+            if self.max_workers > 1 and len(buckets) > 1:
+                # Tiles are independent and rasterio releases the GIL while reading
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(buckets))) as pool:
+                    list(pool.map(lambda item: self._sample_tile(item[0], item[1], lons, lats, out), buckets.items()))
+            else:
+                for fpath, idxs in buckets.items():
+                    self._sample_tile(fpath, idxs, lons, lats, out)
+            unresolved = []
+            for fpath, idxs in buckets.items():
+                for i in idxs:
+                    if np.isnan(out[i]):
+                        cursor[i] += 1
+                        if cursor[i] < len(candidates[i]):
+                            unresolved.append(i)
+            remaining = unresolved
+
+        for i in np.flatnonzero(np.isnan(out)):
+            out[i] = self.sample_elevation(lons[i], lats[i])
+        return out
+
     def get_download_requirements(self, bbox: Tuple[float, float, float, float]) -> dict:
         """
         Return statistics about what needs to be downloaded for a given bbox.
         Returns dict with: total_tiles, cached_count, download_count, est_size_mb, tiles (list of DemTile)
         """
         tiles = self.query_tiles(bbox, limit=100)
-        to_download = [t for t in tiles if not (t.local_path.exists() and t.local_path.stat().st_size > 0)]
-        already_downloaded = [t for t in tiles if (t.local_path.exists() and t.local_path.stat().st_size > 0)]
+        already_downloaded, to_download = partition_cached(tiles)
         
         return {
             "total_tiles": len(tiles),
@@ -340,7 +672,7 @@ class DemClient:
         and streams the result.
         Since COP-DEM downloads as a ZIP containing a DTED/DGED file, we extract it.
         """
-        if tile.local_path.exists() and tile.local_path.stat().st_size > 0:
+        if tile.is_cached():
             tile.downloaded = True
             return tile.local_path
 
@@ -353,18 +685,19 @@ class DemClient:
         url = f"{self.base_url}/Products({tile.id})/$value"
         headers = {"Authorization": f"Bearer {token}"}
         
+        temp_path = self._temp_path(tile.local_path)
         t0 = time.time()
         try:
             self._log(f"Downloading DEM tile {tile.id} ...")
             
             # Manual redirect handling to preserve Authorization header
             # requests strips Auth header on cross-domain redirects by default
-            r = requests.get(url, headers=headers, allow_redirects=False, timeout=30)
+            r = self._get_session().get(url, headers=headers, allow_redirects=False, timeout=30)
             if r.status_code in (301, 302, 303, 307, 308):
                 redirect_url = r.headers.get("Location")
                 if redirect_url:
                     self._log(f"Following redirect to {redirect_url} ...")
-                    r = requests.get(redirect_url, headers=headers, stream=True, timeout=600)
+                    r = self._get_session().get(redirect_url, headers=headers, stream=True, timeout=600)
             
             if r.status_code != 200:
                 self._log(f"DEM tile download failed for {tile.id} with HTTP {r.status_code}", is_error=True)
@@ -374,7 +707,7 @@ class DemClient:
             # Download to memory buffer (or temp file if large, but DEM tiles are ~25MB)
             # Using memory buffer for simplicity of extraction
             content = io.BytesIO()
-            for chunk in r.iter_content(chunk_size=8192):
+            for chunk in r.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
                 if chunk:
                     content.write(chunk)
             
@@ -430,15 +763,17 @@ class DemClient:
                     
                     self._log(f"Extracting {best_candidate} from zip...")
                     
-                    with z.open(best_candidate) as src, open(tile.local_path, 'wb') as dst:
-                        shutil.copyfileobj(src, dst)
+                    with z.open(best_candidate) as src, open(temp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, _DOWNLOAD_CHUNK_BYTES)
                         
             except zipfile.BadZipFile:
                 # Not a zip, maybe it's the file itself?
                 content.seek(0)
-                with open(tile.local_path, 'wb') as f:
-                    f.write(content.read())
+                with open(temp_path, 'wb') as f:
+                    f.write(content.getbuffer())
             
+            # Only a complete file ever appears under the tile's name
+            os.replace(temp_path, tile.local_path)
             tile.downloaded = True
             return tile.local_path
             
@@ -446,16 +781,33 @@ class DemClient:
             self._log(f"Download exception: {e}", is_error=True)
             return tile.local_path
         finally:
-            self.total_download_time += (time.time() - t0)
+            if temp_path.exists():
+                try:
+                    temp_path.unlink()
+                except OSError:
+                    pass
+            with self._time_lock:
+                self.total_download_time += (time.time() - t0)
 
     def ensure_tiles(self, bbox: Tuple[float, float, float, float], progress: Optional[Progress] = None) -> List[Path]:
-        # Increase limit to ensure we get all tiles for large viewsheds (e.g. 500m altitude -> 100km+ radius)
-        tiles = self.query_tiles(bbox, limit=100)
+        return self.ensure_tiles_many([bbox], progress=progress)
+
+    def ensure_tiles_many(self, bboxes: Iterable[Tuple[float, float, float, float]], progress: Optional[Progress] = None) -> List[Path]:
+        """Ensure DEM coverage for several bboxes at once.
+
+        Tiles are resolved for every bbox first and de-duplicated by product ID,
+        so overlapping radar footprints only fetch a shared tile once. Missing
+        tiles are then downloaded concurrently (up to ``max_workers`` at a time).
+        """
+        tiles_by_id: Dict[str, DemTile] = {}
+        for bbox_tiles in self._lookup_tiles(merge_bboxes(list(bboxes))):
+            for t in bbox_tiles:
+                tiles_by_id.setdefault(t.id, t)
+        tiles = list(tiles_by_id.values())
         paths = []
         
         # Filter for tiles that actually need downloading
-        to_download = [t for t in tiles if not (t.local_path.exists() and t.local_path.stat().st_size > 0)]
-        already_downloaded = [t for t in tiles if (t.local_path.exists() and t.local_path.stat().st_size > 0)]
+        already_downloaded, to_download = partition_cached(tiles)
         
         # Add already downloaded paths
         for t in already_downloaded:
@@ -482,11 +834,7 @@ class DemClient:
         # Download missing tiles
         if progress:
             task = progress.add_task(f"Downloading {len(to_download)} DEM tiles...", total=len(to_download))
-            for t in to_download:
-                self.download_tile(t)
-                if t.downloaded:
-                    paths.append(t.local_path)
-                progress.advance(task)
+            paths.extend(self._download_tiles(to_download, progress, task))
             progress.remove_task(task)
         else:
             with Progress(
@@ -498,19 +846,66 @@ class DemClient:
                 transient=True
             ) as p:
                 task = p.add_task(f"Downloading {len(to_download)} DEM tiles...", total=len(to_download))
-                
-                for t in to_download:
-                    self.download_tile(t)
-                    if t.downloaded:
-                        paths.append(t.local_path)
-                    p.advance(task)
+                paths.extend(self._download_tiles(to_download, p, task))
                 
         return paths
 
+    def _lookup_tiles(self, bboxes: List[Tuple[float, float, float, float]]) -> List[List[DemTile]]:
+        """Tile lists for ``bboxes``, via a small in-memory LRU keyed like the on-disk query cache."""
+        found = {}
+        misses = []
+        for bbox in bboxes:
+            key = self._query_key(bbox)
+            if key in self._tile_lookup_cache:
+                self._tile_lookup_cache.move_to_end(key)
+                found[bbox] = self._tile_lookup_cache[key]
+            else:
+                misses.append(bbox)
+        # Increase limit to ensure we get all tiles for large viewsheds (e.g. 500m altitude -> 100km+ radius)
+        if len(misses) == 1:
+            found[misses[0]] = self.query_tiles(misses[0], limit=100)
+        elif misses:
+            found.update(self.query_tiles_many(misses, limit=100))
+        for bbox in misses:
+            tiles = found[bbox]
+            # Synthetic fallbacks mean the query failed; don't pin them for the rest of the run
+            if tiles and not any(t.id.startswith("synthetic_") for t in tiles):
+                self._tile_lookup_cache[self._query_key(bbox)] = tiles
+                if len(self._tile_lookup_cache) > 128:
+                    self._tile_lookup_cache.popitem(last=False)
+        return [found[bbox] for bbox in bboxes]
+
+    def _download_tiles(self, tiles: List[DemTile], progress: Progress, task) -> List[Path]:
+        """Download tiles, advancing ``task`` as each one finishes. Returns paths of successful downloads."""
+        paths = []
+        if self.max_workers <= 1 or len(tiles) <= 1:
+            for t in tiles:
+                self.download_tile(t)
+                if t.downloaded:
+                    paths.append(t.local_path)
+                progress.advance(task)
+            return paths
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as pool:
+            futures = {pool.submit(self.download_tile, t): t for t in tiles}
+            for fut in as_completed(futures):
+                t = futures[fut]
+                try:
+                    fut.result()
+                except Exception as e:
+                    self._log(f"Download exception: {e}", is_error=True)
+                if t.downloaded:
+                    paths.append(t.local_path)
+                progress.advance(task)
+        return paths
+
     def _check_local_coverage(self, bbox: Tuple[float, float, float, float]) -> Optional[List[DemTile]]:
         """Check if local index has tiles covering the bbox."""
-        idx = self._load_index()
-        if not idx:
+        from shapely.geometry import box
+        from shapely.ops import unary_union
+
+        pids, polys, _, tree = self._footprint_index()
+        if not pids:
             return None
             
         minx, miny, maxx, maxy = bbox
@@ -519,38 +914,14 @@ class DemClient:
         covering_tiles = []
         covering_polys = []
         
-        for pid, meta in idx.items():
-            footprint_raw = meta.get("footprint")
-            if not footprint_raw:
-                continue
-            
-            # Parse WKT: geography'SRID=4326;POLYGON ((...))'
-            try:
-                wkt_str = footprint_raw.split(";", 1)[1].rstrip("'")
-                poly = wkt.loads(wkt_str)
-                
-                if poly.intersects(target_poly):
-                    # Check if file exists
-                    found_path = None
-                    for ext in [".dt2", ".dt1", ".tif"]:
-                        p = self.cache_dir / f"{pid}{ext}"
-                        if p.exists():
-                            found_path = p
-                            break
-                    
-                    # We include it if it intersects, but we prefer if we have the file.
-                    # If we don't have the file, we can still return it as a candidate,
-                    # but we can't skip OData if we are missing files?
-                    # Actually, if we have the metadata, we know the ID, so we can download it without OData query.
-                    # So we just need to know if the *metadata* covers the area.
-                    
-                    path = found_path if found_path else (self.cache_dir / f"{pid}.dt2")
-                    tile = DemTile(id=pid, bbox=bbox, local_path=path, downloaded=path.exists())
-                    
-                    covering_tiles.append(tile)
-                    covering_polys.append(poly)
-            except Exception:
-                continue
+        for j in sorted(tree.query(target_poly, predicate="intersects").tolist()):
+            pid = pids[j]
+            # We include every intersecting product, downloaded or not: with the
+            # metadata we know the ID, so it can be downloaded without an OData
+            # query. We just need to know if the *metadata* covers the area.
+            path = self._tile_path(pid)
+            covering_tiles.append(DemTile(id=pid, bbox=bbox, local_path=path, downloaded=path.exists()))
+            covering_polys.append(polys[j])
                 
         if not covering_polys:
             return None
@@ -565,6 +936,70 @@ class DemClient:
             
         return None
 
+# DEM formats stored column by column; warping reads these through a row-major copy
+_COLUMN_MAJOR_SUFFIXES = (".dt1", ".dt2")
+# Subdirectory of the tile directory holding those copies
+_ROW_MAJOR_DIR = "row_major"
+
+def row_major_tile(path: Path) -> Path:
+    """Return a row-major raw copy of a DTED tile for GDAL to warp from, creating it on first use.
+
+    DTED stores elevations as one record per column, so every window the warper
+    reads touches (and byte-swaps) each column record it crosses. The copy is the
+    same little-endian grid written row by row (``row_major/<tile>.raw`` beside
+    the tile), described by a small VRT header (``row_major/<tile>.raw.vrt``)
+    which is returned. Keeping the copies in their own subdirectory leaves the
+    tile directory (and ``DemClient.cache_version``) untouched. GDAL
+    reads it directly and the OS page cache shares it between worker processes.
+    The copy is rebuilt when the tile is newer than it. Other formats, and tiles
+    that cannot be copied, are returned unchanged.
+    """
+    if path.suffix.lower() not in _COLUMN_MAJOR_SUFFIXES:
+        return path
+    copy_dir = path.parent / _ROW_MAJOR_DIR
+    data_path = copy_dir / f"{path.name}.raw"
+    header_path = copy_dir / f"{path.name}.raw.vrt"
+    try:
+        if header_path.exists() and header_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return header_path
+        copy_dir.mkdir(exist_ok=True)
+
+        with rasterio.open(path) as src:
+            data = src.read(1)
+            t = src.transform
+            nodata = f"<NoDataValue>{src.nodata}</NoDataValue>" if src.nodata is not None else ""
+            header = (
+                f'<VRTDataset rasterXSize="{src.width}" rasterYSize="{src.height}">\n'
+                f"  <SRS>{src.crs.wkt}</SRS>\n"
+                f"  <GeoTransform>{t.c!r}, {t.a!r}, {t.b!r}, {t.f!r}, {t.d!r}, {t.e!r}</GeoTransform>\n"
+                f'  <VRTRasterBand dataType="{_GDAL_TYPES[data.dtype.name]}" band="1" subClass="VRTRawRasterBand">\n'
+                f"    {nodata}\n"
+                f'    <SourceFilename relativetoVRT="1">{data_path.name}</SourceFilename>\n'
+                f"    <ImageOffset>0</ImageOffset>\n"
+                f"    <PixelOffset>{data.itemsize}</PixelOffset>\n"
+                f"    <LineOffset>{data.itemsize * src.width}</LineOffset>\n"
+                f"    <ByteOrder>LSB</ByteOrder>\n"
+                f"  </VRTRasterBand>\n"
+                f"</VRTDataset>\n"
+            )
+
+        # Data first, header last: a header on disk always describes a complete copy.
+        # Concurrent workers may both build it; each rename is atomic.
+        for target, write in (
+            (data_path, lambda tmp: data.astype(data.dtype.newbyteorder("<"), copy=False).tofile(tmp)),
+            (header_path, lambda tmp: tmp.write_text(header, encoding="utf-8")),
+        ):
+            tmp = DemClient._temp_path(target)
+            try:
+                write(tmp)
+                os.replace(tmp, target)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+        return header_path
+    except (OSError, KeyError, rasterio.errors.RasterioError):
+        return path
+
 def approximate_bounding_box(lon: float, lat: float, radius_m: float) -> Tuple[float, float, float, float]:
     """Approximate lon/lat bbox for a radius (m). Uses simple degree conversions."""
     # Degrees per meter approximations (improved later using pyproj)
@@ -572,7 +1007,49 @@ def approximate_bounding_box(lon: float, lat: float, radius_m: float) -> Tuple[f
     dlon = radius_m / (111320.0 * max(0.1, math.cos(math.radians(lat))))
     return (lon - dlon, lat - dlat, lon + dlon, lat + dlat)
 
+def merge_bboxes(bboxes: List[Tuple[float, float, float, float]], slack: float = 0.1) -> List[Tuple[float, float, float, float]]:
+    """Collapse overlapping lon/lat bboxes into fewer query regions.
+
+    Duplicates and boxes contained in another box are dropped. Each remaining
+    group of overlapping boxes is replaced by its envelope when that envelope
+    adds at most ``slack`` (fractional) area over the group's union, so merging
+    never pulls in large empty corners (and their tiles). Otherwise the group's
+    boxes are kept as they are.
+    """
+    if len(bboxes) <= 1:
+        return list(bboxes)
+    from shapely.geometry import box
+    from shapely.ops import unary_union
+
+    polys = [box(*b) for b in bboxes]
+    kept = []
+    for i, p in enumerate(polys):
+        # Ties (identical boxes) keep the first occurrence
+        if any(j != i and q.contains(p) and (j < i or not p.contains(q)) for j, q in enumerate(polys)):
+            continue
+        kept.append(i)
+
+    union = unary_union([polys[i] for i in kept])
+    components = list(getattr(union, "geoms", [union]))
+    merged = []
+    for comp in components:
+        members = [i for i in kept if polys[i].intersects(comp)]
+        if len(members) > 1 and comp.envelope.area <= comp.area * (1.0 + slack):
+            merged.append(tuple(comp.bounds))
+        else:
+            merged.extend(bboxes[i] for i in members)
+    return merged
+
+def approximate_bounding_box_vec(lons: np.ndarray, lats: np.ndarray, radii_m: np.ndarray) -> np.ndarray:
+    """Vectorised :func:`approximate_bounding_box`. Returns an (N, 4) array of minx, miny, maxx, maxy."""
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    radii_m = np.asarray(radii_m, dtype=float)
+    dlat = radii_m / 111320.0
+    dlon = radii_m / (111320.0 * np.maximum(0.1, np.cos(np.radians(lats))))
+    return np.column_stack((lons - dlon, lats - dlat, lons + dlon, lats + dlat))
+
 import math  # placed after function to avoid unused import ordering issues
 
-__all__ = ["DemClient", "DemTile", "approximate_bounding_box"]
+__all__ = ["DemClient", "DemTile", "approximate_bounding_box", "approximate_bounding_box_vec", "merge_bboxes", "partition_cached"]
    
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Ground Elevation Caching Module.
+
+Radar ground elevations are sampled from the DEM at the start of every
+`horizon` / `viewshed` run. Neither the site coordinates nor the DEM usually
+change between runs, so the sampled values are persisted to a small JSON file
+and reused until the DEM cache changes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+log = logging.getLogger(__name__)
+
+# Cache version - increment when the file layout or sampling logic changes
+CACHE_VERSION = "1"
+
+
+class ElevationCache:
+    """
+    Persistent lon/lat -> ground elevation (m MSL) cache.
+
+    Entries are only valid for the DEM cache state they were sampled from;
+    ``dem_version`` (see ``DemClient.cache_version``) is stored alongside them and
+    a mismatch discards the whole file.
+    """
+
+    def __init__(self, cache_dir: Path, dem_version: str):
+        """
+        Load the elevation cache.
+
+        Args:
+            cache_dir: Base cache directory; the cache is stored as 'elevations.json'.
+            dem_version: Identifier of the current DEM cache state.
+        """
+        self.path = Path(cache_dir) / "elevations.json"
+        self.dem_version = str(dem_version)
+        self._points: Dict[str, float] = {}
+        self._dirty = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION and data.get("dem_version") == self.dem_version:
+                self._points = {k: float(v) for k, v in data.get("points", {}).items()}
+            else:
+                log.debug("Elevation cache is stale (DEM cache changed); ignoring it.")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.debug(f"Could not read elevation cache {self.path}: {e}")
+
+    @staticmethod
+    def _key(lon: float, lat: float) -> str:
+        # 7 decimals ~1 cm, well below DEM resolution
+        return f"{lon:.7f},{lat:.7f}"
+
+    def get(self, lon: float, lat: float) -> Optional[float]:
+        """Return the cached elevation for a point, or None on a miss."""
+        return self._points.get(self._key(lon, lat))
+
+    def put(self, lon: float, lat: float, elevation_m: float) -> None:
+        """Record a sampled elevation; call save() to persist."""
+        self._points[self._key(lon, lat)] = float(elevation_m)
+        self._dirty = True
+
+    def save(self) -> bool:
+        """
+        Write the cache if anything changed.
+
+        Uses atomic write (temp file + rename) so an interrupted run never
+        leaves a truncated file behind.
+
+        Returns:
+            True if the cache is on disk and up to date, False otherwise.
+        """
+        if not self._dirty:
+            return True
+        payload = {"version": CACHE_VERSION, "dem_version": self.dem_version, "points": self._points}
+        temp_path = self.path.with_name(f"{self.path.name}.tmp.{uuid.uuid4().hex[:8]}")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            os.replace(temp_path, self.path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            log.warning(f"Failed to save elevation cache: {e}")
+            try:
+                if temp_path.exists():
+                    temp_path.unlink()
+            except OSError:
+                pass
+            return False
+
+
+__all__ = ["ElevationCache"]
@@ -1,15 +1,43 @@
 from __future__ import annotations
 from typing import Dict, List, Tuple, Union, Optional, Any
 import math
+import os
+import uuid
+from functools import lru_cache
 from pathlib import Path
-from pyproj import Geod
-from shapely.geometry import Polygon, MultiPolygon, Point
+from typing import TYPE_CHECKING
 from xml.sax.saxutils import escape
 
+import numpy as np
+
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon, MultiPolygon
+
 KML_HEADER = """<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<kml xmlns=\"http://www.opengis.net/kml/2.2\"><Document>"""
 KML_FOOTER = "</Document></kml>"
 
-GEOD = Geod(ellps="WGS84")
+# Write buffer for streamed viewshed exports; large rings go out in few syscalls
+_WRITE_BUFFER_BYTES = 1024 * 1024
+
+def format_number(value: float) -> str:
+    """Format an altitude/range for names and labels: whole numbers without '.0' (100.0 -> '100')."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
+
+@lru_cache(maxsize=1)
+def _geod():
+    """WGS84 geodesic, created on first use so importing this module stays cheap."""
+    from pyproj import Geod
+    return Geod(ellps="WGS84")
+
+def _polygon_parts(geometry) -> List[Polygon]:
+    """Return the individual polygons of a Polygon or MultiPolygon (empty list otherwise)."""
+    from shapely.geometry import Polygon, MultiPolygon
+    if isinstance(geometry, Polygon):
+        return [geometry]
+    if isinstance(geometry, MultiPolygon):
+        return list(geometry.geoms)
+    return []
 
 def _format_metadata_html(metadata: Dict[str, Any]) -> str:
     """Generate an HTML table for KML description."""
@@ -38,8 +66,17 @@ def _format_extended_data(metadata: Dict[str, Any]) -> str:
     return f"<ExtendedData>{''.join(data_tags)}</ExtendedData>"
 
 def _coords_to_kml_str(coords, altitude: float = 0.0) -> str:
-    """Convert list of (lon, lat) or (lon, lat, z) to KML coordinate string."""
-    return " ".join(f"{c[0]},{c[1]},{altitude}" for c in coords)
+    """Convert list of (lon, lat) or (lon, lat, z) to KML coordinate string.
+
+    Lon/lat are written with 7 decimals (~1 cm), well below DEM resolution.
+    The ring is read as one array and formatted from plain floats, which is
+    several times faster than indexing each coordinate tuple.
+    """
+    xy = np.asarray(coords, dtype=float)
+    if xy.size == 0:
+        return ""
+    fmt = f"%.7f,%.7f,{altitude}"
+    return " ".join([fmt % (x, y) for x, y in xy[:, :2].tolist()])
 
 def to_kml_color(hex_col: str, opacity_float: float) -> str:
     """Convert hex #RRGGBB to KML aabbggrr."""
@@ -188,7 +225,7 @@ def export_viewshed_kml(
     # If len(sensors) == 1, use "viewshed-{sensors[0]['name']}-..."
     # If len(sensors) > 1, use document_name (which is likely "Union" or "MyRun").
     
-    alt_str = f"{int(altitude)}" if altitude.is_integer() else f"{altitude}"
+    alt_str = format_number(altitude)
     
     poly_name = document_name
 
@@ -207,46 +244,65 @@ def export_viewshed_kml(
 
     kml_content.append('        <MultiGeometry>')
 
-    polys = []
-    if isinstance(viewshed_polygon, Polygon):
-        polys = [viewshed_polygon]
-    elif isinstance(viewshed_polygon, MultiPolygon):
-        polys = list(viewshed_polygon.geoms)
-        
-    for poly in polys:
-        if poly.is_empty:
-            continue
-            
-        # Determine KML altitude mode
-        kml_alt_mode = "clampToGround"
-        if kml_export_mode == "absolute":
-            kml_alt_mode = "absolute"
-            if altitude_mode.lower() == "agl":
-                kml_alt_mode = "relativeToGround"
-            
-        # Exterior
-        kml_content.append("        <Polygon>")
-        kml_content.append(f"          <altitudeMode>{kml_alt_mode}</altitudeMode>")
-        kml_content.append("          <outerBoundaryIs><LinearRing><coordinates>")
-        kml_content.append(_coords_to_kml_str(poly.exterior.coords, altitude))
-        kml_content.append("          </coordinates></LinearRing></outerBoundaryIs>")
-        
-        # Interiors (holes)
-        for interior in poly.interiors:
-            kml_content.append("          <innerBoundaryIs><LinearRing><coordinates>")
-            kml_content.append(_coords_to_kml_str(interior.coords, altitude))
-            kml_content.append("          </coordinates></LinearRing></innerBoundaryIs>")
-            
-        kml_content.append("        </Polygon>")
-
-    kml_content.append('        </MultiGeometry>')
-    kml_content.append('      </Placemark>')
-    # kml_content.append('    </Folder>')
-    kml_content.append('  </Document>')
-    kml_content.append('</kml>')
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(kml_content))
+    polys = _polygon_parts(viewshed_polygon)
+
+    # Determine KML altitude mode
+    kml_alt_mode = "clampToGround"
+    if kml_export_mode == "absolute":
+        kml_alt_mode = "absolute"
+        if altitude_mode.lower() == "agl":
+            kml_alt_mode = "relativeToGround"
+
+    # Rings are streamed to the file one at a time rather than collected into one
+    # document string, and written to a temp file that is renamed into place so an
+    # interrupted export never leaves a truncated KML behind.
+    output_path = Path(output_path)
+    temp_path = output_path.with_name(f"{output_path.name}.tmp.{uuid.uuid4().hex[:8]}")
+    try:
+        with open(temp_path, "w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as f:
+            f.write("\n".join(kml_content))
+
+            def emit(*lines: str) -> None:
+                for line in lines:
+                    f.write("\n")
+                    f.write(line)
+
+            for poly in polys:
+                if poly.is_empty:
+                    continue
+                    
+                # Exterior
+                emit(
+                    "        <Polygon>",
+                    f"          <altitudeMode>{kml_alt_mode}</altitudeMode>",
+                    "          <outerBoundaryIs><LinearRing><coordinates>",
+                    _coords_to_kml_str(poly.exterior.coords, altitude),
+                    "          </coordinates></LinearRing></outerBoundaryIs>",
+                )
+                
+                # Interiors (holes)
+                for interior in poly.interiors:
+                    emit(
+                        "          <innerBoundaryIs><LinearRing><coordinates>",
+                        _coords_to_kml_str(interior.coords, altitude),
+                        "          </coordinates></LinearRing></innerBoundaryIs>",
+                    )
+                    
+                emit("        </Polygon>")
+
+            emit(
+                '        </MultiGeometry>',
+                '      </Placemark>',
+                '  </Document>',
+                '</kml>',
+            )
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            temp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+        raise
 
 def export_kml_polygon(
     geometry: Union[Polygon, MultiPolygon],
@@ -304,11 +360,7 @@ def export_kml_polygon(
 </kml>
 """
     
-    polys = []
-    if isinstance(geometry, Polygon):
-        polys = [geometry]
-    elif isinstance(geometry, MultiPolygon):
-        polys = list(geometry.geoms)
+    polys = _polygon_parts(geometry)
         
     body = []
     for poly in polys:
@@ -339,7 +391,7 @@ def geodesic_circle_coords(lon: float, lat: float, radius_m: float, segments: in
     coords: List[str] = []
     for i in range(segments):
         az = (360.0 * i) / segments
-        lon2, lat2, _ = GEOD.fwd(lon, lat, az, radius_m)
+        lon2, lat2, _ = _geod().fwd(lon, lat, az, radius_m)
         coords.append(f"{lon2},{lat2},{altitude}")
     coords.append(coords[0])
     return coords
@@ -452,7 +504,7 @@ def export_horizons_kml(path: str, rings: Dict[str, List[Tuple[float, float]]],
             coords = geodesic_circle_coords(lon, lat, dist_m, altitude=ring_alt)
             coord_str = " ".join(coords)
             
-            alt_label = f"{int(alt)}" if alt.is_integer() else f"{alt}"
+            alt_label = format_number(alt)
             
             # Construct per-ring metadata
             # Merge global metadata with sensor specific metadata
@@ -603,11 +655,7 @@ def export_combined_kml(
 
             kml_content.append(f'{indent}  <MultiGeometry>')
             
-            polys = []
-            if isinstance(poly, Polygon):
-                polys = [poly]
-            elif isinstance(poly, MultiPolygon):
-                polys = list(poly.geoms)
+            polys = _polygon_parts(poly)
                 
             for p in polys:
                 if p.is_empty: continue
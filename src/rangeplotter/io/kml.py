@@ -1,44 +1,57 @@
 from __future__ import annotations
 from xml.etree import ElementTree as ET
-from typing import List, Tuple, Optional, Union
+from typing import TYPE_CHECKING, Iterable, List, Tuple, Optional, Union
 from pathlib import Path
 from rangeplotter.models.radar_site import RadarSite
-from shapely.geometry import Polygon, MultiPolygon
+
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon, MultiPolygon
 
 KML_NS = "{http://www.opengis.net/kml/2.2}"
 
 ALTITUDE_MODES = {"clampToGround", "relativeToGround", "absolute"}
 
 def parse_radars(kml_path: str, default_sensor_height_m: float) -> List[RadarSite]:
-    tree = ET.parse(kml_path)
-    root = tree.getroot()
-    
-    # Extract styles map
+    """
+    Parse radar sites (Point placemarks) from a KML file.
+
+    The file is streamed with iterparse: each Placemark is read when it closes
+    and then cleared, so memory stays flat for KMLs with thousands of sites.
+    Styles are resolved after the pass, so a styleUrl may reference a Style
+    defined anywhere in the document.
+    """
     styles = {}
-    for style in root.findall(f".//{KML_NS}Style"):
-        style_id = style.get("id")
-        if style_id:
-            styles[f"#{style_id}"] = style
-            
-    # Extract StyleMaps
     style_maps = {}
-    for sm in root.findall(f".//{KML_NS}StyleMap"):
-        sm_id = sm.get("id")
-        if sm_id:
-            # Find the 'normal' key
-            normal_style_url = None
-            for pair in sm.findall(f"{KML_NS}Pair"):
-                key = pair.find(f"{KML_NS}key")
-                if key is not None and key.text == "normal":
-                    url = pair.find(f"{KML_NS}styleUrl")
-                    if url is not None and url.text:
-                        normal_style_url = url.text.strip()
-                        break
-            if normal_style_url:
-                style_maps[f"#{sm_id}"] = normal_style_url
+    # (RadarSite kwargs, styleUrl, inline Style element) per placemark, styled after parsing
+    sites = []
+
+    for _, el in ET.iterparse(kml_path, events=("end",)):
+        if el.tag == f"{KML_NS}Style":
+            style_id = el.get("id")
+            if style_id:
+                styles[f"#{style_id}"] = el
+        elif el.tag == f"{KML_NS}StyleMap":
+            sm_id = el.get("id")
+            if sm_id:
+                # Find the 'normal' key
+                normal_style_url = None
+                for pair in el.findall(f"{KML_NS}Pair"):
+                    key = pair.find(f"{KML_NS}key")
+                    if key is not None and key.text == "normal":
+                        url = pair.find(f"{KML_NS}styleUrl")
+                        if url is not None and url.text:
+                            normal_style_url = url.text.strip()
+                            break
+                if normal_style_url:
+                    style_maps[f"#{sm_id}"] = normal_style_url
+        elif el.tag == f"{KML_NS}Placemark":
+            site = _radar_fields(el, default_sensor_height_m)
+            if site is not None:
+                sites.append(site)
+            el.clear()
 
-    def extract_style_from_element(element, style_url=None):
-        """Extract style attributes from a Style element or styleUrl."""
+    def extract_style_from_element(inline_style, style_url=None):
+        """Extract style attributes from a styleUrl or an inline Style element."""
         style_el = None
         
         # Resolve StyleMap if needed
@@ -47,8 +60,8 @@ def parse_radars(kml_path: str, default_sensor_height_m: float) -> List[RadarSit
             
         if style_url and style_url in styles:
             style_el = styles[style_url]
-        elif element is not None:
-            style_el = element.find(f"{KML_NS}Style")
+        else:
+            style_el = inline_style
             
         if style_el is None:
             return {}
@@ -113,83 +126,108 @@ def parse_radars(kml_path: str, default_sensor_height_m: float) -> List[RadarSit
             
         return config
 
-    radars: List[RadarSite] = []
-    for pm in root.findall(f".//{KML_NS}Placemark"):
-        name_el = pm.find(f"{KML_NS}name")
-        name = name_el.text.strip() if name_el is not None and name_el.text else "Unnamed"
-        
-        desc_el = pm.find(f"{KML_NS}description")
-        description = desc_el.text.strip() if desc_el is not None and desc_el.text else None
-        
-        style_url_el = pm.find(f"{KML_NS}styleUrl")
-        style_url = style_url_el.text.strip() if style_url_el is not None and style_url_el.text else None
-        
-        # Extract style config
-        style_config = extract_style_from_element(pm, style_url)
-
-        alt_mode_el = pm.find(f".//{KML_NS}altitudeMode")
-        altitude_mode = alt_mode_el.text.strip() if alt_mode_el is not None and alt_mode_el.text else "clampToGround"
-        if altitude_mode not in ALTITUDE_MODES:
-            altitude_mode = "clampToGround"
-        coord_el = pm.find(f".//{KML_NS}Point/{KML_NS}coordinates")
-        if coord_el is None or not coord_el.text:
-            continue
-        coord_text = coord_el.text.strip()
-        parts = coord_text.split(",")
-        if len(parts) < 2:
-            continue
-        lon = float(parts[0])
-        lat = float(parts[1])
-        alt = None
-        if len(parts) > 2:
-            try:
-                alt = float(parts[2])
-            except ValueError:
-                alt = None
-        
-        # Determine sensor height logic
-        # If KML specifies relativeToGround and a valid altitude, use that as the sensor height
-        # and set the additional sensor_height_m_agl to 0 to avoid double counting.
-        # If KML specifies absolute, we also assume the altitude includes the sensor height.
-        # Otherwise, use the default sensor height from config.
-        final_sensor_height = default_sensor_height_m
-        if (altitude_mode == "relativeToGround" or altitude_mode == "absolute") and alt is not None:
-            final_sensor_height = 0.0
-
-        radars.append(RadarSite(
-            name=name,
-            longitude=lon,
-            latitude=lat,
-            altitude_mode=altitude_mode,
-            input_altitude=alt,
-            sensor_height_m_agl=final_sensor_height,
-            description=description,
-            style_url=style_url,
-            style_config=style_config
-        ))
-    return radars
+    return [
+        RadarSite(**fields, style_url=style_url, style_config=extract_style_from_element(inline_style, style_url))
+        for fields, style_url, inline_style in sites
+    ]
+
+def _radar_fields(pm, default_sensor_height_m: float):
+    """Read one Placemark for parse_radars: (RadarSite kwargs, styleUrl, inline Style), or None if it has no Point."""
+    name_el = pm.find(f"{KML_NS}name")
+    name = name_el.text.strip() if name_el is not None and name_el.text else "Unnamed"
+    
+    desc_el = pm.find(f"{KML_NS}description")
+    description = desc_el.text.strip() if desc_el is not None and desc_el.text else None
+    
+    style_url_el = pm.find(f"{KML_NS}styleUrl")
+    style_url = style_url_el.text.strip() if style_url_el is not None and style_url_el.text else None
+
+    alt_mode_el = pm.find(f".//{KML_NS}altitudeMode")
+    altitude_mode = alt_mode_el.text.strip() if alt_mode_el is not None and alt_mode_el.text else "clampToGround"
+    if altitude_mode not in ALTITUDE_MODES:
+        altitude_mode = "clampToGround"
+    coord_el = pm.find(f".//{KML_NS}Point/{KML_NS}coordinates")
+    if coord_el is None or not coord_el.text:
+        return None
+    coord_text = coord_el.text.strip()
+    parts = coord_text.split(",")
+    if len(parts) < 2:
+        return None
+    lon = float(parts[0])
+    lat = float(parts[1])
+    alt = None
+    if len(parts) > 2:
+        try:
+            alt = float(parts[2])
+        except ValueError:
+            alt = None
+    
+    # Determine sensor height logic
+    # If KML specifies relativeToGround and a valid altitude, use that as the sensor height
+    # and set the additional sensor_height_m_agl to 0 to avoid double counting.
+    # If KML specifies absolute, we also assume the altitude includes the sensor height.
+    # Otherwise, use the default sensor height from config.
+    final_sensor_height = default_sensor_height_m
+    if (altitude_mode == "relativeToGround" or altitude_mode == "absolute") and alt is not None:
+        final_sensor_height = 0.0
+
+    fields = dict(
+        name=name,
+        longitude=lon,
+        latitude=lat,
+        altitude_mode=altitude_mode,
+        input_altitude=alt,
+        sensor_height_m_agl=final_sensor_height,
+        description=description,
+    )
+    return fields, style_url, pm.find(f"{KML_NS}Style")
 
 def parse_viewshed_kml(kml_path: str) -> List[dict]:
     """
     Parse a viewshed KML file to extract sensor locations, viewshed polygons, and styles.
     Returns a list of dicts: {'folder_name': str, 'sensor': (lon, lat), 'viewshed': geometry, 'style': dict}
+
+    Each Folder yields one result from the Placemarks inside it (including
+    nested folders); if no folder does, the whole document is treated as one
+    viewshed. The file is streamed with iterparse and each Placemark is
+    cleared once every open folder has seen it, so large viewshed polygons are
+    never all held as XML at once.
     """
-    tree = ET.parse(kml_path)
-    root = tree.getroot()
-    
-    # Extract styles map
     styles = {}
     style_maps = {}
-    
-    for style in root.findall(f".//{KML_NS}Style"):
-        style_id = style.get("id")
-        if style_id:
-            styles[f"#{style_id}"] = style
-
-    for style_map in root.findall(f".//{KML_NS}StyleMap"):
-        map_id = style_map.get("id")
-        if map_id:
-            style_maps[f"#{map_id}"] = style_map
+    results = []
+    open_folders = []  # (document order, accumulator) for each Folder being read
+    document = _ViewshedAccumulator()  # Fallback for files without usable folders
+    n_folders = 0
+
+    for event, el in ET.iterparse(kml_path, events=("start", "end")):
+        if event == "start":
+            if el.tag == f"{KML_NS}Folder":
+                open_folders.append((n_folders, _ViewshedAccumulator()))
+                n_folders += 1
+            continue
+        if el.tag == f"{KML_NS}Style":
+            style_id = el.get("id")
+            if style_id:
+                styles[f"#{style_id}"] = el
+        elif el.tag == f"{KML_NS}StyleMap":
+            map_id = el.get("id")
+            if map_id:
+                style_maps[f"#{map_id}"] = el
+        elif el.tag == f"{KML_NS}Placemark":
+            placemark = _ViewshedPlacemark(el)
+            for _, acc in open_folders:
+                acc.feed(placemark)
+            document.feed(placemark)
+            el.clear()
+        elif el.tag == f"{KML_NS}Folder":
+            order, acc = open_folders.pop()
+            if acc.sensor_loc and acc.viewshed_poly:
+                name_el = el.find(f"{KML_NS}name")
+                folder_name = name_el.text.strip() if name_el is not None and name_el.text else None
+                results.append((order, folder_name, acc))
+            if not open_folders:
+                el.clear()
             
     def resolve_style(style_url):
         if not style_url:
@@ -211,13 +249,13 @@ def parse_viewshed_kml(kml_path: str) -> List[dict]:
             
         return None
             
-    def extract_style_from_element(element, style_url=None):
-        """Extract style attributes from a Style element or styleUrl."""
+    def extract_style_from_element(inline_style, style_url=None):
+        """Extract style attributes from a styleUrl or an inline Style element."""
         style_el = resolve_style(style_url)
         
-        if style_el is None and element is not None:
-            # Try finding inline style
-            style_el = element.find(f"{KML_NS}Style")
+        if style_el is None:
+            # Fall back to the inline style
+            style_el = inline_style
             
         if style_el is None:
             return {}
@@ -283,125 +321,149 @@ def parse_viewshed_kml(kml_path: str) -> List[dict]:
             
         return config
 
-    results = []
-
-    def extract_from_element(element):
-        sensor_loc = None
-        sensor_name = None
-        viewshed_poly = None
+    def style_of(acc: "_ViewshedAccumulator") -> dict:
         style_config = {}
+        for inline_style, style_url in acc.style_refs:
+            style_config.update(extract_style_from_element(inline_style, style_url))
+        return style_config
+
+    if results:
+        # Folders close innermost-first; report them in document order
+        results.sort(key=lambda r: r[0])
+        return [
+            {'folder_name': name, 'sensor': acc.sensor_loc, 'sensor_name': acc.sensor_name, 'viewshed': acc.viewshed_poly, 'style': style_of(acc)}
+            for _, name, acc in results
+        ]
+
+    # If no results from folders, try the whole document (backward compatibility)
+    if document.sensor_loc and document.viewshed_poly:
+        return [{'folder_name': None, 'sensor': document.sensor_loc, 'sensor_name': document.sensor_name, 'viewshed': document.viewshed_poly, 'style': style_of(document)}]
+    return []
+
+
+def _kml_polygon(poly_el) -> Optional[Polygon]:
+    """Build a Polygon (with holes) from a KML Polygon element."""
+    outer = poly_el.find(f"{KML_NS}outerBoundaryIs/{KML_NS}LinearRing/{KML_NS}coordinates")
+    if outer is not None and outer.text:
+        coords_str = outer.text.strip()
+        points = []
+        for p in coords_str.split():
+            parts = p.split(',')
+            if len(parts) >= 2:
+                points.append((float(parts[0]), float(parts[1])))
         
-        # Find all Placemarks in this element context
-        for pm in element.findall(f".//{KML_NS}Placemark"):
-            name = pm.find(f"{KML_NS}name")
-            name_text = name.text if name is not None and name.text else ""
-            
-            # Check for Point (Sensor Location)
-            point = pm.find(f"{KML_NS}Point")
-            if point is not None:
-                # Heuristic: check name or if we haven't found one yet
-                if "Location" in name_text or sensor_loc is None:
-                    coords = point.find(f"{KML_NS}coordinates")
-                    if coords is not None and coords.text:
-                        parts = coords.text.strip().split(',')
-                        if len(parts) >= 2:
-                            sensor_loc = (float(parts[0]), float(parts[1]))
-                            sensor_name = name_text # Capture the name of the sensor placemark
-                    
-                    # Extract style from sensor placemark (IconStyle)
-                    style_url = pm.find(f"{KML_NS}styleUrl")
-                    s_url = style_url.text.strip() if style_url is not None else None
-                    sensor_style = extract_style_from_element(pm, s_url)
-                    style_config.update(sensor_style)
-                    
-            # Check for Polygon or MultiGeometry (Viewshed)
-            def extract_polygon(poly_el) -> Optional[Polygon]:
-                outer = poly_el.find(f"{KML_NS}outerBoundaryIs/{KML_NS}LinearRing/{KML_NS}coordinates")
-                if outer is not None and outer.text:
-                    coords_str = outer.text.strip()
-                    points = []
-                    for p in coords_str.split():
+        if points:
+            # Handle inner boundaries (holes)
+            holes = []
+            for inner in poly_el.findall(f"{KML_NS}innerBoundaryIs/{KML_NS}LinearRing/{KML_NS}coordinates"):
+                if inner.text:
+                    h_points = []
+                    for p in inner.text.strip().split():
                         parts = p.split(',')
                         if len(parts) >= 2:
-                            points.append((float(parts[0]), float(parts[1])))
-                    
-                    if points:
-                        # Handle inner boundaries (holes)
-                        holes = []
-                        for inner in poly_el.findall(f"{KML_NS}innerBoundaryIs/{KML_NS}LinearRing/{KML_NS}coordinates"):
-                            if inner.text:
-                                h_points = []
-                                for p in inner.text.strip().split():
-                                    parts = p.split(',')
-                                    if len(parts) >= 2:
-                                        h_points.append((float(parts[0]), float(parts[1])))
-                                if h_points:
-                                    holes.append(h_points)
-                                    
-                        return Polygon(shell=points, holes=holes)
-                return None
-
-            if "Viewshed" in name_text or viewshed_poly is None:
-                poly = pm.find(f"{KML_NS}Polygon")
-                multi = pm.find(f"{KML_NS}MultiGeometry")
-                
-                # Extract style
-                style_url = pm.find(f"{KML_NS}styleUrl")
-                s_url = style_url.text.strip() if style_url is not None else None
-                poly_style = extract_style_from_element(pm, s_url)
-                style_config.update(poly_style)
-                
-                if poly is not None:
-                    p = extract_polygon(poly)
-                    if p:
-                        viewshed_poly = p
-                elif multi is not None:
-                    polys = []
-                    for p_el in multi.findall(f"{KML_NS}Polygon"):
-                        p = extract_polygon(p_el)
-                        if p:
-                            polys.append(p)
-                    if polys:
-                        viewshed_poly = MultiPolygon(polys)
-        
-        return sensor_loc, sensor_name, viewshed_poly, style_config
+                            h_points.append((float(parts[0]), float(parts[1])))
+                    if h_points:
+                        holes.append(h_points)
 
-    # Strategy: Look for Folders.
-    folders = root.findall(f".//{KML_NS}Folder")
-    
-    if folders:
-        for folder in folders:
-            name_el = folder.find(f"{KML_NS}name")
-            folder_name = name_el.text.strip() if name_el is not None and name_el.text else None
-            sensor, s_name, viewshed, style = extract_from_element(folder)
-            if sensor and viewshed:
-                results.append({'folder_name': folder_name, 'sensor': sensor, 'sensor_name': s_name, 'viewshed': viewshed, 'style': style})
-    
-    # If no results from folders, try the whole document (backward compatibility)
-    if not results:
-        sensor, s_name, viewshed, style = extract_from_element(root)
-        if sensor and viewshed:
-             results.append({'folder_name': None, 'sensor': sensor, 'sensor_name': s_name, 'viewshed': viewshed, 'style': style})
-                        
-    return results
-
-def read_metadata_from_kml(kml_path: Union[str, Path]) -> dict:
+            from shapely.geometry import Polygon
+            return Polygon(shell=points, holes=holes)
+    return None
+
+
+class _ViewshedPlacemark:
+    """The parts of a Placemark parse_viewshed_kml needs, read once before the element is cleared."""
+
+    def __init__(self, pm):
+        name = pm.find(f"{KML_NS}name")
+        self.name = name.text if name is not None and name.text else ""
+
+        style_url = pm.find(f"{KML_NS}styleUrl")
+        s_url = style_url.text.strip() if style_url is not None else None
+        self.style_ref = (pm.find(f"{KML_NS}Style"), s_url)
+
+        # Sensor location (Point)
+        point = pm.find(f"{KML_NS}Point")
+        self.is_point = point is not None
+        self.location = None
+        if point is not None:
+            coords = point.find(f"{KML_NS}coordinates")
+            if coords is not None and coords.text:
+                parts = coords.text.strip().split(',')
+                if len(parts) >= 2:
+                    self.location = (float(parts[0]), float(parts[1]))
+
+        # Viewshed geometry (Polygon or MultiGeometry)
+        self.geometry = None
+        poly = pm.find(f"{KML_NS}Polygon")
+        multi = pm.find(f"{KML_NS}MultiGeometry")
+        if poly is not None:
+            p = _kml_polygon(poly)
+            if p:
+                self.geometry = p
+        elif multi is not None:
+            polys = []
+            for p_el in multi.findall(f"{KML_NS}Polygon"):
+                p = _kml_polygon(p_el)
+                if p:
+                    polys.append(p)
+            if polys:
+                from shapely.geometry import MultiPolygon
+                self.geometry = MultiPolygon(polys)
+
+
+class _ViewshedAccumulator:
+    """Picks the sensor location, viewshed polygon and style refs from a run of Placemarks."""
+
+    def __init__(self):
+        self.sensor_loc = None
+        self.sensor_name = None
+        self.viewshed_poly = None
+        self.style_refs = []  # (inline Style, styleUrl), merged in order once all styles are known
+
+    def feed(self, pm: _ViewshedPlacemark) -> None:
+        # Heuristic: prefer a Point named "...Location...", else the first Point
+        if pm.is_point and ("Location" in pm.name or self.sensor_loc is None):
+            if pm.location is not None:
+                self.sensor_loc = pm.location
+                self.sensor_name = pm.name  # Capture the name of the sensor placemark
+            self.style_refs.append(pm.style_ref)
+
+        if "Viewshed" in pm.name or self.viewshed_poly is None:
+            self.style_refs.append(pm.style_ref)
+            if pm.geometry is not None:
+                self.viewshed_poly = pm.geometry
+
+def _kml_is_complete(kml_path: Union[str, Path]) -> bool:
+    """True if the file ends with the closing </kml> tag (i.e. it was not truncated mid-write)."""
+    with open(kml_path, "rb") as f:
+        f.seek(0, 2)
+        f.seek(max(0, f.tell() - 64))
+        return f.read().rstrip().endswith(b"</kml>")
+
+def read_metadata_from_kml(kml_path: Union[str, Path], keys: Optional[Iterable[str]] = None) -> dict:
     """
     Read metadata from KML ExtendedData.
     Returns a dictionary of key-value pairs found in ExtendedData.
+
+    The file is streamed. When ``keys`` is given, reading stops once all of
+    them have been found, so a lookup such as the embedded ``state_hash``
+    (written ahead of the geometry) skips the coordinate payload; the file
+    must then still end with </kml>, as a full parse would have required.
     """
+    wanted = set(keys) if keys is not None else None
+    data = {}
     try:
-        tree = ET.parse(kml_path)
-        root = tree.getroot()
-        
-        data = {}
-        # Search for ExtendedData anywhere in the document
-        for extended_data in root.findall(f".//{KML_NS}ExtendedData"):
-            for data_node in extended_data.findall(f"{KML_NS}Data"):
-                name = data_node.get("name")
-                value_node = data_node.find(f"{KML_NS}value")
-                if name and value_node is not None and value_node.text:
-                    data[name] = value_node.text
+        for _, el in ET.iterparse(kml_path, events=("end",)):
+            if el.tag == f"{KML_NS}ExtendedData":
+                for data_node in el.findall(f"{KML_NS}Data"):
+                    name = data_node.get("name")
+                    value_node = data_node.find(f"{KML_NS}value")
+                    if name and value_node is not None and value_node.text:
+                        data[name] = value_node.text
+                if wanted is not None and wanted.issubset(data):
+                    return data if _kml_is_complete(kml_path) else {}
+            elif el.tag == f"{KML_NS}Placemark":
+                el.clear()
         return data
     except Exception:
         return {}
@@ -0,0 +1,76 @@
+"""
+Parsed KML Caching Module.
+
+`prepare-dem`, `horizon` and `viewshed` each start by parsing the same input
+KML files. The parsed radar sites are stored as JSON under '{cache_dir}/kml/',
+keyed by the file's resolved path, modification time and the default sensor
+height applied during parsing. Delete that directory to invalidate the cache.
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import List, Optional, Union
+
+from rangeplotter.models.radar_site import RadarSite
+
+log = logging.getLogger(__name__)
+
+# Cache version - increment when RadarSite or the KML parser output changes
+CACHE_VERSION = "1"
+
+
+def _cache_path(kml_path: Path, sensor_height: Union[float, List[float]], cache_dir: Path) -> Path:
+    stat = kml_path.stat()
+    key_src = f"{CACHE_VERSION}|{kml_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{json.dumps(sensor_height)}"
+    key = hashlib.sha1(key_src.encode("utf-8")).hexdigest()
+    return Path(cache_dir) / "kml" / f"{key}.json"
+
+
+def load_cached_radars(
+    kml_path: Path, sensor_height: Union[float, List[float]], cache_dir: Path
+) -> Optional[List[RadarSite]]:
+    """
+    Return the radars previously parsed from kml_path, or None on a cache miss.
+    """
+    try:
+        data = json.loads(_cache_path(kml_path, sensor_height, cache_dir).read_text(encoding="utf-8"))
+        return [RadarSite(**site) for site in data]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.debug(f"Ignoring unreadable KML cache entry for {kml_path}: {e}")
+        return None
+
+
+def store_cached_radars(
+    kml_path: Path, sensor_height: Union[float, List[float]], cache_dir: Path, radars: List[RadarSite]
+) -> None:
+    """
+    Store radars parsed from kml_path. Failures are logged and otherwise ignored.
+
+    Uses atomic write (temp file + rename) so concurrent commands never read a
+    partial entry.
+    """
+    temp_path = None
+    try:
+        path = _cache_path(kml_path, sensor_height, cache_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.tmp.{uuid.uuid4().hex[:8]}")
+        temp_path.write_text(json.dumps([dataclasses.asdict(r) for r in radars]), encoding="utf-8")
+        os.replace(temp_path, path)
+    except Exception as e:
+        log.debug(f"Failed to cache parsed KML {kml_path}: {e}")
+        try:
+            if temp_path is not None and temp_path.exists():
+                temp_path.unlink()
+        except OSError:
+            pass
+
+
+__all__ = ["load_cached_radars", "store_cached_radars"]
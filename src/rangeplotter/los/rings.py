@@ -1,11 +1,14 @@
 from __future__ import annotations
 from typing import List, Dict
+import numpy as np
 from rangeplotter.models.radar_site import RadarSite
-from rangeplotter.geo.earth import mutual_horizon_distance
+from rangeplotter.geo.earth import mutual_horizon_distance_vec
 
 def compute_horizons(radars: List[RadarSite], altitudes_msl: List[float], k: float) -> Dict[str, List[tuple]]:
     """Return dict mapping radar name -> list of (altitude_msl, distance_m_msl)."""
     results: Dict[str, List[tuple]] = {}
+    if not radars:
+        return results
     for r in radars:
         # Until DEM integration, assume ground elevation ~ input altitude if absolute, else 0.
         if r.ground_elevation_m_msl is None:
@@ -13,13 +16,15 @@ def compute_horizons(radars: List[RadarSite], altitudes_msl: List[float], k: flo
                 r.ground_elevation_m_msl = r.input_altitude
             else:
                 r.ground_elevation_m_msl = 0.0
-        radar_height = r.radar_height_m_msl or 0.0
-        ring_list: List[tuple] = []
-        for alt in altitudes_msl:
-            # Mutual horizon distance between radar height and target altitude plane.
-            d_max = mutual_horizon_distance(radar_height, alt, r.latitude, k)
-            ring_list.append((alt, d_max))
-        results[r.name] = ring_list
+    radar_heights = np.array([r.radar_height_m_msl or 0.0 for r in radars], dtype=float)
+    lats = np.array([r.latitude for r in radars], dtype=float)
+    # Mutual horizon distance between radar height and each target altitude plane,
+    # as one (n_radars, n_altitudes) table.
+    distances = mutual_horizon_distance_vec(
+        radar_heights[:, None], np.asarray(altitudes_msl, dtype=float)[None, :], lats[:, None], k
+    ).tolist()
+    for r, row in zip(radars, distances):
+        results[r.name] = list(zip(altitudes_msl, row))
     return results
 
 __all__ = ["compute_horizons"]
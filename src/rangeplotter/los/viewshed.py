@@ -10,7 +10,7 @@ from __future__ import annotations
 import math
 import logging
 from pathlib import Path
-from typing import List, Tuple, Optional, Callable, Any, cast
+from typing import List, Tuple, Optional, Callable, Any, Sequence, cast
 
 import numpy as np
 import rasterio
@@ -22,7 +22,7 @@ from shapely.ops import transform
 import pyproj
 
 from rangeplotter.models.radar_site import RadarSite
-from rangeplotter.io.dem import DemClient, approximate_bounding_box
+from rangeplotter.io.dem import DemClient, approximate_bounding_box, row_major_tile
 from rangeplotter.io.viewshed_cache import ViewshedCache
 from rangeplotter.geo.earth import mutual_horizon_distance, effective_earth_radius
 from rangeplotter.utils.shutdown import is_shutdown_requested
@@ -34,6 +34,22 @@ import os
 import psutil
 import time
 
+def _collect_if_memory_high(max_ram_percent: float) -> bool:
+    """
+    Run a full garbage collection when system memory passes 80% of the RAM budget.
+
+    Large arrays are freed by reference counting as soon as they are deleted;
+    this only reclaims objects kept alive by reference cycles.
+
+    Returns:
+        True if a collection was run.
+    """
+    if psutil.virtual_memory().percent <= max_ram_percent * 0.8:
+        return False
+    import gc
+    gc.collect()
+    return True
+
 def _build_vrt(dem_paths: List[Path]) -> str:
     """
     Builds a VRT (Virtual Dataset) XML for the given DEM paths.
@@ -154,8 +170,8 @@ def _reproject_dem_to_aeqd(
     Uses a VRT (Virtual Raster) to treat multiple tiles as a single source without loading them all.
     Returns the reprojected data (numpy array) and its affine transform.
     """
-    # Filter out non-existent paths
-    valid_paths = [p for p in dem_paths if p.exists()]
+    # Filter out non-existent paths; DTED tiles are read through their row-major copies
+    valid_paths = [row_major_tile(p) for p in dem_paths if p.exists()]
     if not valid_paths:
         raise FileNotFoundError("No valid DEM tiles found.")
 
@@ -247,6 +263,66 @@ def _reproject_dem_to_aeqd(
     return dst_array[0], dst_transform
 
 
+# Minimum number of azimuth chunks per MVA sweep (progress is reported between chunks).
+_MIN_SWEEP_CHUNKS = 20
+
+
+def _mva_polar_chunk(
+    dem_array: np.ndarray,
+    inv_transform: rasterio.Affine,
+    radar_h_msl: float,
+    r_values: np.ndarray,
+    az_chunk: np.ndarray,
+    R_eff: float
+) -> np.ndarray:
+    """
+    Compute MVA (m AGL) for a block of azimuths; see _compute_mva_polar for the physics.
+
+    Pure array code with no callbacks or logging, so the sweep can be split,
+    parallelised or JIT-compiled per chunk.
+
+    Returns:
+        Float32 array (len(az_chunk), len(r_values)).
+    """
+    height, width = dem_array.shape
+    r_values_2d = r_values.reshape(1, -1)
+    az_grid_chunk = az_chunk.reshape(-1, 1)
+
+    x_grid = r_values_2d * np.sin(az_grid_chunk)
+    y_grid = r_values_2d * np.cos(az_grid_chunk)
+
+    cols = (inv_transform.a * x_grid + inv_transform.b * y_grid + inv_transform.c).astype(int)
+    rows = (inv_transform.d * x_grid + inv_transform.e * y_grid + inv_transform.f).astype(int)
+
+    np.clip(cols, 0, width - 1, out=cols)
+    np.clip(rows, 0, height - 1, out=rows)
+
+    elevations = dem_array[rows, cols]
+    elevations_filled = np.nan_to_num(elevations, nan=0.0)
+
+    r_safe = r_values_2d.copy()
+    r_safe[r_safe == 0] = 0.1
+
+    # Compute terrain angle from radar
+    term1 = (elevations_filled - radar_h_msl) / r_safe
+    term2 = r_safe / (2 * R_eff)
+
+    theta_terrain = term1 - term2
+    theta_terrain[:, 0] = -9999.0
+
+    # Running max angle along each ray
+    M = np.maximum.accumulate(theta_terrain, axis=1)
+
+    # Compute the required MSL altitude to clear the max angle M
+    # Using: theta = (h - h_radar) / r - r / (2 * R_eff)
+    # Solve for h: h_req = h_radar + r * (M + r / (2 * R_eff))
+    h_req_msl = radar_h_msl + r_safe * (M + term2)
+
+    # MVA is the height Above Ground Level
+    # Clamp to 0 if ground is visible (h_req <= terrain means MVA = 0)
+    return np.maximum(h_req_msl - elevations_filled, 0.0).astype(np.float32)
+
+
 def _compute_mva_polar(
     dem_array: np.ndarray,
     transform: rasterio.Affine,
@@ -356,60 +432,19 @@ def _compute_mva_polar(
     # Bytes per azimuth: n_r * 44 bytes (accounting for Float32 MVA output)
     bytes_per_az = n_r * 44
     az_chunk_size = max(1, int(target_chunk_bytes / bytes_per_az))
+    # Keep at least _MIN_SWEEP_CHUNKS chunks so progress is reported during the sweep
+    az_chunk_size = min(az_chunk_size, max(1, -(-n_az // _MIN_SWEEP_CHUNKS)))
     
     log.debug(f"Available Budget: {available_budget/1024/1024:.1f} MB. Target chunk size: {target_chunk_bytes/1024/1024:.1f} MB.")
     log.debug(f"Processing MVA sweep in chunks of {az_chunk_size} azimuths...")
     
-    r_values_2d = r_values.reshape(1, n_r)
     it = ~transform
 
     for az_start in range(0, n_az, az_chunk_size):
         az_end = min(az_start + az_chunk_size, n_az)
-        
-        az_chunk = az_values[az_start:az_end]
-        az_grid_chunk = az_chunk.reshape(-1, 1)
-        
-        x_grid = r_values_2d * np.sin(az_grid_chunk)
-        y_grid = r_values_2d * np.cos(az_grid_chunk)
-        
-        cols = (it.a * x_grid + it.b * y_grid + it.c).astype(int)
-        rows = (it.d * x_grid + it.e * y_grid + it.f).astype(int)
-        
-        np.clip(cols, 0, width - 1, out=cols)
-        np.clip(rows, 0, height - 1, out=rows)
-        
-        elevations = dem_array[rows, cols]
-        elevations_filled = np.nan_to_num(elevations, nan=0.0)
-        
-        r_safe = r_values_2d.copy()
-        r_safe[r_safe == 0] = 0.1
-        
-        # Compute terrain angle from radar
-        term1 = (elevations_filled - radar_h_msl) / r_safe
-        term2 = r_safe / (2 * R_eff)
-        
-        theta_terrain = term1 - term2
-        theta_terrain[:, 0] = -9999.0
-        
-        # Running max angle along each ray
-        M = np.maximum.accumulate(theta_terrain, axis=1)
-        
-        # Compute the required MSL altitude to clear the max angle M
-        # Using: theta = (h - h_radar) / r - r / (2 * R_eff)
-        # Solve for h: h_req = h_radar + r * (M + r / (2 * R_eff))
-        h_req_msl = radar_h_msl + r_safe * (M + term2)
-        
-        # MVA is the height Above Ground Level
-        mva_chunk = h_req_msl - elevations_filled
-        
-        # Clamp to 0 if ground is visible (h_req <= terrain means MVA = 0)
-        mva_chunk = np.maximum(mva_chunk, 0.0).astype(np.float32)
-        
-        # Store result
-        mva_polar[az_start:az_end, :] = mva_chunk
-        
-        del x_grid, y_grid, cols, rows, elevations, elevations_filled
-        del theta_terrain, M, h_req_msl, mva_chunk
+        mva_polar[az_start:az_end, :] = _mva_polar_chunk(
+            dem_array, it, radar_h_msl, r_values, az_values[az_start:az_end], R_eff
+        )
 
         if progress_callback:
             progress_callback("Computing MVA", (az_end / n_az) * 100)
@@ -659,6 +694,44 @@ def _polygonize_mask(mask: np.ndarray, transform: rasterio.Affine) -> Polygon |
         return simplified
     return Polygon()
 
+# Share of one viewshed job taken by each reported step, as (start, span) fractions.
+# Zone steps are reported as "Zone N (<res>m)" and looked up by their "Zone N" prefix.
+_STEP_WEIGHTS = {
+    "Downloading DEM": (0.0, 0.05),
+    "Zone 1": (0.05, 0.30),
+    "Zone 2": (0.35, 0.30),
+    "Zone 3": (0.65, 0.30),
+    "Transforming to WGS84": (0.95, 0.05),
+}
+
+
+def _job_progress(
+    progress_callback: Optional[Callable[[str, float], None]]
+) -> Callable[[str, float], None]:
+    """
+    Adapt a job-level progress callback for use inside compute_viewshed.
+
+    The returned reporter takes (step, fraction of that step) and calls
+    ``progress_callback(step, fraction of the whole job)``, but only when the
+    step changes or the job advances by at least 1%. A job therefore makes at
+    most ~100 callbacks however finely its inner loops report.
+    """
+    if progress_callback is None:
+        return lambda step, step_frac: None
+    last: dict[str, Any] = {"step": None, "percent": -1}
+
+    def report(step: str, step_frac: float) -> None:
+        start, span = _STEP_WEIGHTS.get(step.split(" (", 1)[0], (0.0, 0.0))
+        frac = start + span * max(0.0, min(1.0, step_frac))
+        percent = int(frac * 100)
+        if step == last["step"] and percent == last["percent"]:
+            return
+        last["step"], last["percent"] = step, percent
+        progress_callback(step, frac)
+
+    return report
+
+
 def compute_viewshed(
     radar: RadarSite,
     target_alt: float,
@@ -680,7 +753,9 @@ def compute_viewshed(
         target_alt: Target altitude (MSL or AGL depending on altitude_mode).
         dem_client: DEM client for fetching terrain data.
         config: Configuration dictionary.
-        progress_callback: Optional callback for progress updates.
+        progress_callback: Optional callback(step: str, fraction: float), where
+            fraction is the 0-1 completion of the whole job. Called at most
+            once per 1% of progress (plus once per step change).
         rich_progress: Optional rich progress bar.
         altitude_mode: "msl" or "agl".
         use_cache: Whether to use the MVA cache (default True).
@@ -688,21 +763,69 @@ def compute_viewshed(
     Returns:
         Polygon or MultiPolygon representing the visible area in WGS84.
     """
+    return compute_viewsheds(
+        radar,
+        [target_alt],
+        dem_client,
+        config,
+        progress_callback=progress_callback,
+        rich_progress=rich_progress,
+        altitude_mode=altitude_mode,
+        use_cache=use_cache
+    )[0]
+
+
+def compute_viewsheds(
+    radar: RadarSite,
+    target_alts: Sequence[float],
+    dem_client: DemClient,
+    config: dict,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    rich_progress: Optional[Any] = None,
+    altitude_mode: str = "msl",
+    use_cache: bool = True
+) -> List[Polygon | MultiPolygon]:
+    """
+    Compute viewshed polygons for one radar site at several target altitudes.
+    
+    Same results as calling compute_viewshed once per altitude, but DEM tiles
+    are resolved once, and each zone's DEM reprojection and MVA raster are
+    built once for all altitudes whose range covers that zone; only the
+    threshold and polygonize steps run per altitude.
     
-    # 1. Calculate max geometric range
+    Args:
+        radar: The radar site to compute the viewsheds for.
+        target_alts: Target altitudes (MSL or AGL depending on altitude_mode).
+        dem_client: DEM client for fetching terrain data.
+        config: Configuration dictionary.
+        progress_callback: Optional callback(step: str, fraction: float), where
+            fraction is the 0-1 completion of the whole call.
+        rich_progress: Optional rich progress bar.
+        altitude_mode: "msl" or "agl".
+        use_cache: Whether to use the MVA cache (default True).
+        
+    Returns:
+        One Polygon or MultiPolygon (WGS84) per entry of target_alts, in order.
+    """
+    
+    # 1. Calculate max geometric range per altitude
     radar_h = radar.radar_height_m_msl
     if radar_h is None:
         radar_h = 0.0  # Fallback
         
-    d_max = mutual_horizon_distance(radar_h, target_alt, radar.latitude, k=config.get("atmospheric_k_factor", 1.333))
-    d_max *= 1.05  # 5% buffer
-    
-    log.debug(f"Computing viewshed for {radar.name} @ {target_alt}m ({altitude_mode.upper()}). Max range: {d_max/1000:.1f} km")
-    
-    # 2. Get DEM tiles (needed for cache miss path)
-    if progress_callback:
-        progress_callback("Downloading DEM", 0)
-    bbox = approximate_bounding_box(radar.longitude, radar.latitude, d_max)
+    k_factor = config.get("atmospheric_k_factor", 1.333)
+    d_maxes = []
+    for target_alt in target_alts:
+        d_max = mutual_horizon_distance(radar_h, target_alt, radar.latitude, k=k_factor)
+        d_max *= 1.05  # 5% buffer
+        d_maxes.append(d_max)
+        log.debug(f"Computing viewshed for {radar.name} @ {target_alt}m ({altitude_mode.upper()}). Max range: {d_max/1000:.1f} km")
+    
+    report = _job_progress(progress_callback)
+
+    # 2. Get DEM tiles (needed for cache miss path); the widest range covers every altitude
+    report("Downloading DEM", 0.0)
+    bbox = approximate_bounding_box(radar.longitude, radar.latitude, max(d_maxes))
     dem_paths = dem_client.ensure_tiles(bbox, progress=rich_progress)
     
     # 3. Setup cache
@@ -717,10 +840,11 @@ def compute_viewshed(
     # Determine resolution using Multiscale config
     ms_config = config.get('multiscale', {})
     
-    polygons_aeqd = []
+    polygons_aeqd: List[List[Polygon | MultiPolygon]] = [[] for _ in target_alts]
     
+    # The outermost zone extends to each altitude's own range (min(d_max, z_max) below)
     if not ms_config.get('enable', True):
-        zones = [(0.0, d_max, ms_config.get('res_near_m', 30.0))]
+        zones = [(0.0, max(d_maxes), ms_config.get('res_near_m', 30.0))]
     else:
         near_m = ms_config.get('near_m', 50000)
         mid_m = ms_config.get('mid_m', 200000)
@@ -733,7 +857,7 @@ def compute_viewshed(
         zones = [
             (0.0, near_m, res_near),
             (near_m, mid_m, res_mid),
-            (mid_m, max(far_m, d_max), res_far)
+            (mid_m, max(far_m, max(d_maxes)), res_far)
         ]
 
     # Get ground elevation for cache key
@@ -743,7 +867,6 @@ def compute_viewshed(
     # Earth model for cache key
     earth_model_cfg = config.get("earth_model", {})
     earth_model = earth_model_cfg.get("ellipsoid", "WGS84")
-    k_factor = config.get("atmospheric_k_factor", 1.333)
 
     # Process each zone
     for i, (z_min, z_max, z_res) in enumerate(zones):
@@ -752,101 +875,51 @@ def compute_viewshed(
             log.info(f"Shutdown requested. Stopping after zone {i}.")
             break
             
-        if d_max <= z_min:
-            continue
-            
-        pass_max_r = min(d_max, z_max)
-        
-        log.info(f"Processing Zone {i+1}: {z_min/1000:.1f}-{pass_max_r/1000:.1f} km @ {z_res}m resolution")
-        
-        if progress_callback:
-            progress_callback(f"Zone {i+1} ({z_res}m)", 0)
-
-        # Try cache lookup
-        mva_cart = None
-        dem_array = None
-        transform = None
-        cache_hit = False
-        
-        if cache is not None:
-            zone_hash = cache.compute_hash(
-                lat=radar.latitude,
-                lon=radar.longitude,
-                ground_elev=ground_elev,
-                sensor_h_agl=sensor_h_agl,
-                z_min=z_min,
-                z_max=pass_max_r,
-                z_res=z_res,
-                k_factor=k_factor,
-                earth_model=earth_model
-            )
-            
-            cached = cache.get(zone_hash)
-            if cached is not None:
-                mva_cart, transform, _ = cached
-                cache_hit = True
-                log.info(f"Zone {i+1}: Cache HIT ({zone_hash[:8]}...)")
+        # Altitudes sharing a zone extent share its DEM and MVA rasters
+        passes: dict[float, List[int]] = {}
+        for a, d_max in enumerate(d_maxes):
+            if d_max > z_min:
+                passes.setdefault(min(d_max, z_max), []).append(a)
         
-        if not cache_hit:
-            # Cache miss - compute MVA
-            log.info(f"Zone {i+1}: Cache MISS. Computing MVA...")
-            
-            t0 = time.perf_counter()
-            dem_array, transform = _reproject_dem_to_aeqd(
-                dem_paths, 
-                radar.longitude, 
-                radar.latitude, 
-                pass_max_r,
-                target_resolution=z_res,
-                use_disk_swap=use_disk_swap,
-                max_ram_percent=max_ram_percent
-            )
-            t1 = time.perf_counter()
-            log.debug(f"Zone {i+1} Reprojection took {t1-t0:.2f}s. Grid: {dem_array.shape}")
-            
-            # Compute MVA in polar coordinates
-            t_sweep_start = time.perf_counter()
-            mva_polar, r_values, az_values = _compute_mva_polar(
-                dem_array=dem_array,
-                transform=transform,
-                radar_h_msl=radar_h,
-                max_radius_m=pass_max_r,
-                center_lat_deg=radar.latitude,
-                k_factor=k_factor,
-                max_ram_percent=max_ram_percent,
-                progress_callback=None
-            )
+        zone_step = f"Zone {i+1} ({z_res}m)"
+        for p, (pass_max_r, alt_idxs) in enumerate(sorted(passes.items())):
+            log.info(f"Processing Zone {i+1}: {z_min/1000:.1f}-{pass_max_r/1000:.1f} km @ {z_res}m resolution")
             
-            # Convert to Cartesian
-            mva_cart = _polar_to_cartesian_mva(
-                mva_polar=mva_polar,
-                r_values=r_values,
-                az_values=az_values,
-                dem_shape=dem_array.shape,
-                transform=transform,
-                max_radius_m=pass_max_r,
-                progress_callback=None
-            )
-            t_sweep_end = time.perf_counter()
-            log.debug(f"Zone {i+1} MVA computation took {t_sweep_end - t_sweep_start:.2f}s")
-            
-            del mva_polar, r_values, az_values
+            def pass_report(step: str, frac: float, p: int = p) -> None:
+                report(step, (p + frac) / len(passes))
+            pass_report(zone_step, 0.0)
+
+            # Try cache lookup
+            mva_cart = None
+            dem_array = None
+            transform = None
+            cache_hit = False
             
-            # Cache the result
             if cache is not None:
-                aeqd_crs = f"+proj=aeqd +lat_0={radar.latitude} +lon_0={radar.longitude} +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
-                cache.put(zone_hash, mva_cart, transform, aeqd_crs)
-        
-        # Threshold MVA to get binary visibility mask
-        if altitude_mode == "agl":
-            # For AGL mode, target_alt is already in AGL - direct threshold
-            mask = _threshold_mva_to_mask(mva_cart, target_alt)
-        else:
-            # For MSL mode, we need terrain elevation to compute target height AGL
-            # If we have dem_array from cache miss path, use it
-            # Otherwise we need to load it for MSL mode
-            if dem_array is None:
-                dem_array, _ = _reproject_dem_to_aeqd(
+                zone_hash = cache.compute_hash(
+                    lat=radar.latitude,
+                    lon=radar.longitude,
+                    ground_elev=ground_elev,
+                    sensor_h_agl=sensor_h_agl,
+                    z_min=z_min,
+                    z_max=pass_max_r,
+                    z_res=z_res,
+                    k_factor=k_factor,
+                    earth_model=earth_model
+                )
+                
+                cached = cache.get(zone_hash)
+                if cached is not None:
+                    mva_cart, transform, _ = cached
+                    cache_hit = True
+                    log.info(f"Zone {i+1}: Cache HIT ({zone_hash[:8]}...)")
+            
+            if not cache_hit:
+                # Cache miss - compute MVA
+                log.info(f"Zone {i+1}: Cache MISS. Computing MVA...")
+                
+                t0 = time.perf_counter()
+                dem_array, transform = _reproject_dem_to_aeqd(
                     dem_paths, 
                     radar.longitude, 
                     radar.latitude, 
@@ -855,65 +928,112 @@ def compute_viewshed(
                     use_disk_swap=use_disk_swap,
                     max_ram_percent=max_ram_percent
                 )
+                t1 = time.perf_counter()
+                log.debug(f"Zone {i+1} Reprojection took {t1-t0:.2f}s. Grid: {dem_array.shape}")
+                
+                # Compute MVA in polar coordinates
+                t_sweep_start = time.perf_counter()
+                mva_polar, r_values, az_values = _compute_mva_polar(
+                    dem_array=dem_array,
+                    transform=transform,
+                    radar_h_msl=radar_h,
+                    max_radius_m=pass_max_r,
+                    center_lat_deg=radar.latitude,
+                    k_factor=k_factor,
+                    max_ram_percent=max_ram_percent,
+                    progress_callback=lambda _step, pct: pass_report(zone_step, 0.8 * pct / 100.0)
+                )
+                
+                # Convert to Cartesian
+                mva_cart = _polar_to_cartesian_mva(
+                    mva_polar=mva_polar,
+                    r_values=r_values,
+                    az_values=az_values,
+                    dem_shape=dem_array.shape,
+                    transform=transform,
+                    max_radius_m=pass_max_r,
+                    progress_callback=lambda _step, pct: pass_report(zone_step, 0.8 + 0.2 * pct / 100.0)
+                )
+                t_sweep_end = time.perf_counter()
+                log.debug(f"Zone {i+1} MVA computation took {t_sweep_end - t_sweep_start:.2f}s")
+                
+                del mva_polar, r_values, az_values
+                
+                # Cache the result
+                if cache is not None:
+                    aeqd_crs = f"+proj=aeqd +lat_0={radar.latitude} +lon_0={radar.longitude} +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
+                    cache.put(zone_hash, mva_cart, transform, aeqd_crs)
             
-            terrain_elev = np.nan_to_num(dem_array, nan=0.0)
-            target_h_above_ground = target_alt - terrain_elev
-            
-            # Visible where MVA <= target_h_above_ground and target is above ground
-            mask = np.zeros_like(mva_cart, dtype=np.uint8)
-            visible = (mva_cart <= target_h_above_ground) & (target_h_above_ground >= 0)
-            mask[visible] = 1
-            
-            del terrain_elev, target_h_above_ground, visible
-        
-        del mva_cart
-        if dem_array is not None:
-            del dem_array
-        
-        # Polygonize
-        poly = _polygonize_mask(mask, transform)
-        del mask
-        
-        if poly.is_empty:
-            log.warning(f"Zone {i+1} produced an empty viewshed polygon.")
-        else:
-            log.debug(f"Zone {i+1} produced a valid polygon (Area: {poly.area:.1f})")
-
-        # Clip to annulus
-        center = Point(0, 0)
-        outer_circle = center.buffer(pass_max_r)
-        if z_min > 0:
-            inner_circle = center.buffer(z_min)
-            annulus = outer_circle.difference(inner_circle)
-        else:
-            annulus = outer_circle
-            
-        clipped_poly = poly.intersection(annulus)
-        
-        if not clipped_poly.is_empty:
-            log.debug(f"Zone {i+1} clipped polygon is valid (Area: {clipped_poly.area:.1f})")
-            polygons_aeqd.append(clipped_poly)
-        else:
-            log.warning(f"Zone {i+1} clipped polygon is empty.")
-            
-        del poly, clipped_poly
-        
-    # Union all zones
-    from shapely.ops import unary_union
-    log.info(f"Unioning {len(polygons_aeqd)} zone polygons...")
-    if not polygons_aeqd:
-        poly_aeqd = Polygon()
-    else:
-        poly_aeqd = unary_union(polygons_aeqd)
-    
-    if poly_aeqd.is_empty:
-        log.warning("Final AEQD polygon is empty.")
-    else:
-        log.info(f"Final AEQD polygon area: {poly_aeqd.area:.1f}")
-    
+            terrain_elev = None
+            if altitude_mode != "agl":
+                # For MSL mode, we need terrain elevation to compute target height AGL
+                # If we have dem_array from cache miss path, use it
+                # Otherwise we need to load it for MSL mode
+                if dem_array is None:
+                    dem_array, _ = _reproject_dem_to_aeqd(
+                        dem_paths, 
+                        radar.longitude, 
+                        radar.latitude, 
+                        pass_max_r,
+                        target_resolution=z_res,
+                        use_disk_swap=use_disk_swap,
+                        max_ram_percent=max_ram_percent
+                    )
+                terrain_elev = np.nan_to_num(dem_array, nan=0.0)
+            if dem_array is not None:
+                del dem_array
+
+            # Clip to annulus
+            center = Point(0, 0)
+            outer_circle = center.buffer(pass_max_r)
+            if z_min > 0:
+                inner_circle = center.buffer(z_min)
+                annulus = outer_circle.difference(inner_circle)
+            else:
+                annulus = outer_circle
+
+            for a in alt_idxs:
+                target_alt = target_alts[a]
+                # Threshold MVA to get binary visibility mask
+                if terrain_elev is None:
+                    # For AGL mode, target_alt is already in AGL - direct threshold
+                    mask = _threshold_mva_to_mask(mva_cart, target_alt)
+                else:
+                    target_h_above_ground = target_alt - terrain_elev
+                    
+                    # Visible where MVA <= target_h_above_ground and target is above ground
+                    mask = np.zeros_like(mva_cart, dtype=np.uint8)
+                    visible = (mva_cart <= target_h_above_ground) & (target_h_above_ground >= 0)
+                    mask[visible] = 1
+                    
+                    del target_h_above_ground, visible
+                
+                # Polygonize
+                poly = _polygonize_mask(mask, transform)
+                del mask
+                
+                if poly.is_empty:
+                    log.warning(f"Zone {i+1} produced an empty viewshed polygon.")
+                else:
+                    log.debug(f"Zone {i+1} produced a valid polygon (Area: {poly.area:.1f})")
+
+                clipped_poly = poly.intersection(annulus)
+                
+                if not clipped_poly.is_empty:
+                    log.debug(f"Zone {i+1} clipped polygon is valid (Area: {clipped_poly.area:.1f})")
+                    polygons_aeqd[a].append(clipped_poly)
+                else:
+                    log.warning(f"Zone {i+1} clipped polygon is empty.")
+                    
+                del poly, clipped_poly
+
+            del mva_cart, terrain_elev
+
+    # The zone rasters are gone; reclaim anything cyclic before the next job allocates
+    _collect_if_memory_high(max_ram_percent)
+
     # Reproject back to WGS84
-    if progress_callback:
-        progress_callback("Transforming to WGS84", 0)
+    report("Transforming to WGS84", 0.0)
     
     aeqd_proj = f"+proj=aeqd +lat_0={radar.latitude} +lon_0={radar.longitude} +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
     crs_aeqd = pyproj.CRS(aeqd_proj)
@@ -922,10 +1042,114 @@ def compute_viewshed(
     project = pyproj.Transformer.from_crs(crs_aeqd, crs_wgs84, always_xy=True).transform
     
     from shapely.ops import transform as shapely_transform
-    t_vec_start = time.perf_counter()
-    poly_wgs84 = shapely_transform(project, poly_aeqd)
-    t_vec_end = time.perf_counter()
-    log.info(f"Vector Reprojection took {t_vec_end - t_vec_start:.2f}s")
+    from shapely.ops import unary_union
+
+    results = []
+    for zone_polys in polygons_aeqd:
+        # Union all zones
+        log.info(f"Unioning {len(zone_polys)} zone polygons...")
+        if not zone_polys:
+            poly_aeqd = Polygon()
+        else:
+            poly_aeqd = unary_union(zone_polys)
+        
+        if poly_aeqd.is_empty:
+            log.warning("Final AEQD polygon is empty.")
+        else:
+            log.info(f"Final AEQD polygon area: {poly_aeqd.area:.1f}")
+        
+        t_vec_start = time.perf_counter()
+        poly_wgs84 = shapely_transform(project, poly_aeqd)
+        t_vec_end = time.perf_counter()
+        log.info(f"Vector Reprojection took {t_vec_end - t_vec_start:.2f}s")
+        results.append(cast(Polygon | MultiPolygon, poly_wgs84))
     
-    return cast(Polygon | MultiPolygon, poly_wgs84)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Worker-pool entry points
+# ---------------------------------------------------------------------------
+# These live here rather than in the CLI so that spawned worker processes only
+# import the compute stack, not the Typer app.
+
+_worker_progress_queue: Optional[Any] = None
+_worker_dem_client: Optional[DemClient] = None
+_worker_config: Optional[dict] = None
+
+
+def init_viewshed_worker(
+    progress_queue: Optional[Any] = None,
+    dem_client: Optional[DemClient] = None,
+    config: Optional[dict] = None
+) -> None:
+    """
+    Initializer for viewshed worker processes.
+
+    Ctrl-C is left to the parent process, which decides whether to wait for
+    in-flight jobs or terminate the pool. The DEM client and configuration are
+    the same for every job, so they are sent once per worker here rather than
+    pickled with each submitted job.
+
+    Args:
+        progress_queue: Queue receiving (job_id, step, fraction) progress tuples.
+        dem_client: DEM client used by jobs that do not pass their own.
+        config: Configuration dictionary used by jobs that do not pass their own.
+    """
+    import signal
+    global _worker_progress_queue, _worker_dem_client, _worker_config
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_progress_queue = progress_queue
+    _worker_dem_client = dem_client
+    _worker_config = config
+
+
+def run_viewshed_job(
+    job_id: int,
+    radar: RadarSite,
+    target_alts: Sequence[float],
+    dem_client: Optional[DemClient] = None,
+    config: Optional[dict] = None,
+    altitude_mode: str = "msl",
+    use_cache: bool = True,
+    progress_queue: Optional[Any] = None
+) -> List[Polygon | MultiPolygon]:
+    """
+    Run compute_viewsheds for one pool job, forwarding progress to a queue.
+
+    Args:
+        job_id: Identifier echoed back with each progress update.
+        radar: Radar site with sensor_height_m_agl already set for this job.
+        target_alts: Target altitudes computed together by this job.
+        dem_client: DEM client (tiles are expected to be cached already);
+            defaults to the one installed by init_viewshed_worker.
+        config: Configuration dictionary; defaults to the one installed by
+            init_viewshed_worker.
+        altitude_mode: "msl" or "agl".
+        use_cache: Whether to use the MVA cache.
+        progress_queue: Queue for thread workers; process workers use the
+            queue installed by init_viewshed_worker.
+
+    Returns:
+        One Polygon or MultiPolygon (WGS84) per target altitude, in order.
+    """
+    queue = progress_queue if progress_queue is not None else _worker_progress_queue
+    dem_client = dem_client if dem_client is not None else _worker_dem_client
+    config = config if config is not None else _worker_config
+    if dem_client is None or config is None:
+        raise RuntimeError("run_viewshed_job needs dem_client and config, or a worker set up by init_viewshed_worker")
+
+    def _report(step: str, fraction: float) -> None:
+        if queue is not None:
+            queue.put((job_id, step, fraction))
+
+    return compute_viewsheds(
+        radar,
+        target_alts,
+        dem_client,
+        config,
+        progress_callback=_report,
+        altitude_mode=altitude_mode,
+        use_cache=use_cache
+    )
 
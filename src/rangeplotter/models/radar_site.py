@@ -21,7 +21,7 @@ class RadarSite:
         Returns the radar height MSL.
         If sensor_height_m_agl is a list, this property returns the MSL height using the MAX value in the list.
         This is primarily used for horizon calculation (max possible horizon).
-        For individual viewshed calculations, sensor_height_m_agl should be temporarily set to a float.
+        For individual viewshed calculations, use a copy of the site with sensor_height_m_agl set to a float.
         """
         if self.ground_elevation_m_msl is None:
             return None
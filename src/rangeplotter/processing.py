@@ -1,44 +1,69 @@
-from typing import List, Tuple, Union
-from shapely.geometry import Polygon, MultiPolygon
-from shapely.ops import unary_union
-from pyproj import Geod
+from __future__ import annotations
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Tuple, Union
+import numpy as np
 
-GEOD = Geod(ellps="WGS84")
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon, MultiPolygon
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _geod():
+    """WGS84 geodesic, created on first use so importing this module stays cheap."""
+    from pyproj import Geod
+    return Geod(ellps="WGS84")
+
 def create_geodesic_buffer(lon: float, lat: float, radius_km: float, points: int = 128) -> Polygon:
     """
     Create a geodesic circle (buffer) around a point.
     """
-    lons = []
-    lats = []
-    angles = [360.0 * i / points for i in range(points)]
-    
-    for angle in angles:
-        lon_out, lat_out, _ = GEOD.fwd(lon, lat, angle, radius_km * 1000.0)
-        lons.append(lon_out)
-        lats.append(lat_out)
-        
-    return Polygon(zip(lons, lats))
+    from shapely.geometry import Polygon
 
-def clip_viewshed(viewshed: Union[Polygon, MultiPolygon], sensor_loc: Tuple[float, float], radius_km: float) -> Union[Polygon, MultiPolygon]:
-    """
-    Clip the viewshed polygon with a geodesic buffer of the given radius.
-    """
-    buffer = create_geodesic_buffer(sensor_loc[0], sensor_loc[1], radius_km)
-    
+    angles = 360.0 * np.arange(points) / points
+    # One vectorised forward-geodesic call for the whole ring
+    lons, lats, _ = _geod().fwd(
+        np.full(points, float(lon)),
+        np.full(points, float(lat)),
+        angles,
+        np.full(points, radius_km * 1000.0),
+    )
+    return Polygon(np.column_stack((lons, lats)))
+
+@lru_cache(maxsize=256)
+def _clip_buffer(lon: float, lat: float, radius_km: float) -> Polygon:
+    """Valid geodesic clip circle, shared by every viewshed clipped at the same site and range."""
+    buffer = create_geodesic_buffer(lon, lat, radius_km)
     # Ensure validity before intersection
     if not buffer.is_valid:
         logger.debug("Buffer polygon invalid, fixing with buffer(0)")
         buffer = buffer.buffer(0)
+    return buffer
+
+def clip_viewshed(viewshed: Union[Polygon, MultiPolygon], sensor_loc: Tuple[float, float], radius_km: float) -> Union[Polygon, MultiPolygon]:
+    """
+    Clip the viewshed polygon with a geodesic buffer of the given radius.
+    """
+    buffer = _clip_buffer(float(sensor_loc[0]), float(sensor_loc[1]), float(radius_km))
     
     if not viewshed.is_valid:
         logger.debug("Viewshed polygon invalid, fixing with buffer(0)")
         viewshed = viewshed.buffer(0)
-        
+
+    # Cheap bounds tests first: the circle has a fixed vertex count, so these
+    # skip the intersection when the viewshed lies wholly inside or outside it
+    from shapely.geometry import Polygon, box
+    if viewshed.is_empty:
+        return viewshed
+    vminx, vminy, vmaxx, vmaxy = viewshed.bounds
+    bminx, bminy, bmaxx, bmaxy = buffer.bounds
+    if vmaxx < bminx or vminx > bmaxx or vmaxy < bminy or vminy > bmaxy:
+        return Polygon()
+    if buffer.contains(box(vminx, vminy, vmaxx, vmaxy)):
+        return viewshed
+
     try:
         clipped = viewshed.intersection(buffer)
     except Exception as e:
@@ -59,4 +84,5 @@ def union_viewsheds(viewsheds: List[Union[Polygon, MultiPolygon]]) -> Union[Poly
     """
     Compute the geometric union of multiple viewsheds.
     """
+    from shapely.ops import unary_union
     return unary_union(viewsheds)
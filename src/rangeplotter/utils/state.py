@@ -69,7 +69,7 @@ class StateManager:
             return True
             
         # Read metadata from KML
-        metadata = read_metadata_from_kml(output_path)
+        metadata = read_metadata_from_kml(output_path, keys=("state_hash",))
         stored_hash = metadata.get("state_hash")
         
         if stored_hash is None:
@@ -1,6 +1,7 @@
 
 import pytest
 from pathlib import Path
+from unittest.mock import patch
 import yaml
 
 @pytest.fixture
@@ -41,3 +42,17 @@ def sample_kml_content():
     </Placemark>
   </Document>
 </kml>"""
+
+@pytest.fixture
+def isolated_settings(tmp_path):
+    """The real config for CLI runs without --config, with caches and outputs under tmp_path.
+
+    Use it in any CLI test that reaches the DEM, KML, elevation or token caches,
+    so the run writes nothing into the repository's data_cache/.
+    """
+    from rangeplotter.config.settings import load_settings
+    settings = load_settings()
+    settings.cache_dir = str(tmp_path / "cache")
+    settings.output_viewshed_dir = str(tmp_path / "viewshed")
+    with patch("rangeplotter.cli.main.load_settings", return_value=settings):
+        yield settings
@@ -1,3 +1,5 @@
+import json
+from urllib.parse import parse_qs
 
 import pytest
 from unittest.mock import MagicMock, patch
@@ -12,14 +14,14 @@ def auth_instance():
     )
 
 def test_ensure_access_token_password_grant(auth_instance):
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "access_token": "access123",
             "refresh_token": "refresh123",
             "expires_in": 3600
-        }
+        }).encode()
         mock_post.return_value = mock_response
         
         token = auth_instance.ensure_access_token()
@@ -33,14 +35,14 @@ def test_ensure_access_token_refresh_grant(auth_instance):
     # Clear password to force refresh flow
     auth_instance.password = None
     
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "access_token": "new_access",
             "refresh_token": "new_refresh",
             "expires_in": 3600
-        }
+        }).encode()
         mock_post.return_value = mock_response
         
         token = auth_instance.ensure_access_token()
@@ -49,10 +51,12 @@ def test_ensure_access_token_refresh_grant(auth_instance):
         assert auth_instance.refresh_token == "new_refresh"
         # Verify correct grant type used
         args, kwargs = mock_post.call_args
-        assert kwargs['data']['grant_type'] == 'refresh_token'
+        form = parse_qs(kwargs['data'].decode())
+        assert form['grant_type'] == ['refresh_token']
+        assert form['refresh_token'] == ['existing_refresh']
 
 def test_auth_failure(auth_instance):
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 401
         # Configure raise_for_status to raise an exception
@@ -62,3 +66,48 @@ def test_auth_failure(auth_instance):
         
         token = auth_instance.ensure_access_token()
         assert token is None
+
+def test_background_refresh_scheduled():
+    auth = CdseAuth(
+        token_url="https://example.com/token",
+        username="user",
+        password="pass",
+        early_refresh_percent=0.5,
+    )
+    with patch("requests.Session.post") as mock_post:
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({
+            "access_token": "access123",
+            "refresh_token": "refresh123",
+            "expires_in": 3600
+        }).encode()
+        mock_post.return_value = mock_response
+
+        assert auth.ensure_access_token() == "access123"
+        assert auth._refresh_timer is not None
+        assert auth._refresh_timer.daemon
+        auth.close()
+        assert auth._refresh_timer is None
+
+def test_concurrent_callers_share_single_grant(auth_instance):
+    import threading
+    import time
+
+    def slow_post(*args, **kwargs):
+        time.sleep(0.05)
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.content = json.dumps({"access_token": "shared", "expires_in": 3600}).encode()
+        return resp
+
+    with patch("requests.Session.post", side_effect=slow_post) as mock_post:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(auth_instance.ensure_access_token())) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert results == ["shared"] * 5
+    assert mock_post.call_count == 1
@@ -1,3 +1,4 @@
+import json
 
 import pytest
 from unittest.mock import patch, MagicMock
@@ -33,36 +34,167 @@ def test_update_env_file_append(tmp_path):
 
 def test_password_grant_json_error():
     auth = CdseAuth("url", "client", "user", "pass")
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 200
-        mock_post.return_value.json.side_effect = ValueError("Bad JSON")
+        mock_post.return_value.content = b"<html>not json</html>"
         
         token = auth._password_grant()
         assert token is None
 
 def test_password_grant_no_access_token():
     auth = CdseAuth("url", "client", "user", "pass")
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = {"foo": "bar"}
+        mock_post.return_value.content = json.dumps({"foo": "bar"}).encode()
         
         token = auth._password_grant()
         assert token is None
 
 def test_refresh_grant_json_error():
     auth = CdseAuth("url", "client", "user", "pass", refresh_token="ref")
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 200
-        mock_post.return_value.json.side_effect = ValueError("Bad JSON")
+        mock_post.return_value.content = b"<html>not json</html>"
         
         token = auth._refresh_grant()
         assert token is None
 
 def test_refresh_grant_no_access_token():
     auth = CdseAuth("url", "client", "user", "pass", refresh_token="ref")
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = {"foo": "bar"}
+        mock_post.return_value.content = json.dumps({"foo": "bar"}).encode()
         
         token = auth._refresh_grant()
         assert token is None
+
+def test_update_env_file_unchanged_token_skips_write(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("COPERNICUS_REFRESH_TOKEN=same_token\n")
+
+    auth = CdseAuth("url", "client", "user", "pass")
+
+    with patch("rangeplotter.auth.cdse.Path") as mock_path, \
+         patch("rangeplotter.auth.cdse.os.replace") as mock_replace:
+        mock_path.return_value = env_file
+        auth._update_env_file("same_token")
+
+    mock_replace.assert_not_called()
+    assert env_file.read_text() == "COPERNICUS_REFRESH_TOKEN=same_token\n"
+
+def test_password_grant_oversized_body():
+    auth = CdseAuth("url", "client", "user", "pass")
+    with patch("requests.Session.post") as mock_post:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.content = b"x" * 10000
+
+        token = auth._password_grant()
+        assert token is None
+
+def test_update_env_file_spaced_assignment(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("A=1\nCOPERNICUS_REFRESH_TOKEN = old_token\nB=2\n")
+
+    auth = CdseAuth("url", "client", "user", "pass")
+
+    with patch("rangeplotter.auth.cdse.Path") as mock_path:
+        mock_path.return_value = env_file
+        auth._update_env_file("new_token")
+
+    assert env_file.read_text() == "A=1\nCOPERNICUS_REFRESH_TOKEN = new_token\nB=2\n"
+
+def test_token_cache_roundtrip(tmp_path):
+    cache = tmp_path / "auth" / "cdse_token.json"
+    auth = CdseAuth("https://example.com/token", "client", "user", "pass", token_cache_path=cache)
+    with patch("requests.Session.post") as mock_post:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.content = json.dumps({"access_token": "cached", "expires_in": 3600}).encode()
+        assert auth.ensure_access_token() == "cached"
+
+    assert cache.exists()
+    assert (cache.stat().st_mode & 0o777) == 0o600
+
+    # A fresh instance picks up the persisted token without any HTTP call
+    auth2 = CdseAuth("https://example.com/token", "client", "user", "pass", token_cache_path=cache)
+    with patch("requests.Session.post") as mock_post:
+        assert auth2.ensure_access_token() == "cached"
+        mock_post.assert_not_called()
+
+def test_token_cache_shared_between_live_instances(tmp_path):
+    cache = tmp_path / "auth" / "cdse_token.json"
+    # Both created before any token exists, e.g. two pool workers starting together
+    first = CdseAuth("https://example.com/token", "client", "user", "pass", token_cache_path=cache)
+    second = CdseAuth("https://example.com/token", "client", "user", "pass", token_cache_path=cache)
+    with patch("requests.Session.post") as mock_post:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.content = json.dumps({"access_token": "shared", "expires_in": 3600}).encode()
+        assert first.ensure_access_token() == "shared"
+        assert second.ensure_access_token() == "shared"
+        assert mock_post.call_count == 1
+    assert (cache.parent / "cdse_token.json.lock").exists()
+
+def test_token_cache_ignored_for_other_client(tmp_path):
+    cache = tmp_path / "cdse_token.json"
+    cache.write_text(json.dumps({
+        "token_url": "https://example.com/token",
+        "client_id": "other",
+        "access_token": "foreign",
+        "expires_at_wall": 9999999999,
+    }))
+    auth = CdseAuth("https://example.com/token", "client", "user", "pass", token_cache_path=cache)
+    assert auth._token is None
+
+def test_token_cache_ignored_for_other_account(tmp_path):
+    cache = tmp_path / "auth" / "cdse_token.json"
+    auth = CdseAuth("https://example.com/token", "client", "alice", "pass", token_cache_path=cache)
+    with patch("requests.Session.post") as mock_post:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.content = json.dumps({"access_token": "alice_token", "expires_in": 3600}).encode()
+        assert auth.ensure_access_token() == "alice_token"
+    assert "alice" not in json.loads(cache.read_text())["identity"]
+
+    # Switching COPERNICUS_USERNAME must not reuse the previous account's token
+    other = CdseAuth("https://example.com/token", "client", "bob", "pass", token_cache_path=cache)
+    assert other._token is None
+    # Nor must switching to a refresh token for some other account
+    by_refresh = CdseAuth("https://example.com/token", "client", refresh_token="bob_rt", token_cache_path=cache)
+    assert by_refresh._token is None
+
+def test_auth_pickles_for_worker_processes():
+    import pickle
+    auth = CdseAuth("https://example.com/token", "client", refresh_token="ref")
+    auth._get_session()
+    clone = pickle.loads(pickle.dumps(auth))
+    assert clone.refresh_token == "ref"
+    assert clone._session is None
+    assert clone._lock is not None
+
+def test_update_env_file_preserves_mode(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("COPERNICUS_REFRESH_TOKEN=old_token\n")
+    env_file.chmod(0o600)
+
+    auth = CdseAuth("url", "client", "user", "pass")
+
+    with patch("rangeplotter.auth.cdse.Path") as mock_path:
+        mock_path.return_value = env_file
+        auth._update_env_file("new_token")
+
+    assert (env_file.stat().st_mode & 0o777) == 0o600
+    assert env_file.read_text() == "COPERNICUS_REFRESH_TOKEN=new_token\n"
+
+def test_update_env_file_writes_through_symlink(tmp_path):
+    target = tmp_path / "secrets" / "rangeplotter.env"
+    target.parent.mkdir()
+    target.write_text("COPERNICUS_REFRESH_TOKEN=old_token\n")
+    link = tmp_path / ".env"
+    link.symlink_to(target)
+
+    auth = CdseAuth("url", "client", "user", "pass")
+
+    with patch("rangeplotter.auth.cdse.Path") as mock_path:
+        mock_path.return_value = link
+        auth._update_env_file("new_token")
+
+    assert link.is_symlink()
+    assert target.read_text() == "COPERNICUS_REFRESH_TOKEN=new_token\n"
@@ -55,6 +55,7 @@ def test_prepare_dem(tmp_path):
         
         client_instance = MockDemClient.return_value
         client_instance.query_tiles.return_value = []
+        client_instance.query_tiles_many.side_effect = lambda bboxes, limit: {b: [] for b in bboxes}
         
         result = runner.invoke(app, ["prepare-dem", "--config", "dummy.yaml", "--input", "dummy.kml"])
         
@@ -87,6 +88,7 @@ def test_horizon(tmp_path):
         # Setup DemClient mock
         client_instance = MockDemClient.return_value
         client_instance.sample_elevation.return_value = 0.0
+        client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
         client_instance.total_download_time = 0.0
         
         mock_compute.return_value = {}
@@ -108,7 +110,7 @@ def test_viewshed_cli(tmp_path):
     with patch("rangeplotter.cli.main.Settings.from_file") as mock_settings, \
          patch("rangeplotter.cli.main._load_radars") as mock_load_radars, \
          patch("rangeplotter.cli.main.DemClient") as MockDemClient, \
-         patch("rangeplotter.los.viewshed.compute_viewshed") as mock_compute, \
+         patch("rangeplotter.los.viewshed.compute_viewsheds") as mock_compute, \
          patch("rangeplotter.cli.main.export_viewshed_kml") as mock_export, \
          patch("rangeplotter.cli.main.parse_radars") as mock_parse_radars, \
          patch("rangeplotter.cli.main.CdseAuth") as MockAuth:
@@ -131,6 +133,7 @@ def test_viewshed_cli(tmp_path):
             mock_radar.latitude = 0.0
             mock_radar.longitude = 0.0
             mock_radar.style_config = {}
+            mock_radar.radar_height_m_msl = 10.0
             mock_load_radars.return_value = [mock_radar]
             
             # parse_radars is called again in the loop, so we need to mock it too
@@ -138,9 +141,10 @@ def test_viewshed_cli(tmp_path):
             
             client_instance = MockDemClient.return_value
             client_instance.sample_elevation.return_value = 0.0
+            client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
             client_instance.total_download_time = 0.0
             
-            mock_compute.return_value = MagicMock() # Polygon
+            mock_compute.side_effect = lambda radar, alts, *a, **kw: [MagicMock() for _ in alts] # Polygons
             
             # Create a dummy input file
             input_file = tmp_path / "dummy.kml"
@@ -160,7 +164,7 @@ def test_viewshed_cli_overrides(tmp_path):
     with patch("rangeplotter.cli.main.Settings.from_file") as mock_settings, \
          patch("rangeplotter.cli.main._load_radars") as mock_load_radars, \
          patch("rangeplotter.cli.main.DemClient") as MockDemClient, \
-         patch("rangeplotter.los.viewshed.compute_viewshed") as mock_compute, \
+         patch("rangeplotter.los.viewshed.compute_viewsheds") as mock_compute, \
          patch("rangeplotter.cli.main.export_viewshed_kml") as mock_export, \
          patch("rangeplotter.cli.main.parse_radars") as mock_parse_radars, \
          patch("rangeplotter.cli.main.CdseAuth") as MockAuth:
@@ -183,14 +187,16 @@ def test_viewshed_cli_overrides(tmp_path):
             mock_radar.latitude = 0.0
             mock_radar.longitude = 0.0
             mock_radar.style_config = {}
+            mock_radar.radar_height_m_msl = 10.0
             mock_load_radars.return_value = [mock_radar]
             mock_parse_radars.return_value = [mock_radar]
             
             client_instance = MockDemClient.return_value
             client_instance.sample_elevation.return_value = 0.0
+            client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
             client_instance.total_download_time = 0.0
             
-            mock_compute.return_value = MagicMock()
+            mock_compute.side_effect = lambda radar, alts, *a, **kw: [MagicMock() for _ in alts]
             
             input_file = tmp_path / "dummy.kml"
             input_file.touch()
@@ -232,8 +238,9 @@ def test_viewshed_cli_check_download(tmp_path):
             mock_load_radars.return_value = [mock_radar]
             
             client_instance = MockDemClient.return_value
-            client_instance.query_tiles.return_value = []
+            client_instance.query_tiles_many.side_effect = lambda bboxes, limit=20: {tuple(b): [] for b in bboxes}
             client_instance.sample_elevation.return_value = 0.0
+            client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
             
             input_file = tmp_path / "dummy.kml"
             input_file.touch()
@@ -273,6 +280,7 @@ def test_viewshed_cli_download_only(tmp_path):
         
         client_instance = MockDemClient.return_value
         client_instance.sample_elevation.return_value = 0.0
+        client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
         
         input_file = tmp_path / "dummy.kml"
         input_file.touch()
@@ -286,3 +294,56 @@ def test_viewshed_cli_download_only(tmp_path):
         
         assert result.exit_code == 0
         assert "Download complete" in result.stdout
+
+def test_viewshed_cli_skips_up_to_date_outputs(tmp_path):
+    from rangeplotter.utils.state import StateManager
+    with patch("rangeplotter.cli.main.Settings.from_file") as mock_settings, \
+         patch("rangeplotter.cli.main._load_radars") as mock_load_radars, \
+         patch("rangeplotter.cli.main.DemClient") as MockDemClient, \
+         patch("rangeplotter.los.viewshed.compute_viewsheds") as mock_compute, \
+         patch("rangeplotter.io.export.export_viewshed_kml"), \
+         patch("rangeplotter.cli.main.CdseAuth") as MockAuth, \
+         patch.object(StateManager, "should_run", side_effect=lambda name, alt, h, fn: alt != 100.0):
+
+            MockAuth.return_value.ensure_access_token.return_value = "token"
+            settings = mock_settings.return_value
+            settings.logging = {}
+            settings.cache_dir = str(tmp_path / "cache")
+            settings.output_viewshed_dir = str(tmp_path / "output")
+            settings.effective_altitudes = [100.0, 200.0]
+            settings.effective_sensor_heights = [10.0]
+            settings.target_altitude_reference = "msl"
+            settings.resources.max_ram_percent = 90
+            settings.atmospheric_k_factor = 1.333
+            settings.copernicus_api.username = "user"
+            settings.style.model_dump.return_value = {}
+            settings.model_dump.return_value = {}
+
+            mock_radar = MagicMock()
+            mock_radar.name = "R1"
+            mock_radar.latitude = 0.0
+            mock_radar.longitude = 0.0
+            mock_radar.style_config = {}
+            mock_radar.radar_height_m_msl = 10.0
+            mock_load_radars.return_value = [mock_radar]
+
+            client_instance = MockDemClient.return_value
+            client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
+            client_instance.total_download_time = 0.0
+
+            mock_compute.side_effect = lambda radar, alts, *a, **kw: [MagicMock() for _ in alts]
+
+            input_file = tmp_path / "dummy.kml"
+            input_file.touch()
+
+            result = runner.invoke(app, [
+                "viewshed",
+                "--config", "dummy.yaml",
+                "--input", str(input_file),
+                "--output", str(tmp_path / "output")
+            ])
+
+            assert result.exit_code == 0
+            # Only the stale altitude is computed; the skip is reported once
+            assert [c.args[1] for c in mock_compute.call_args_list] == [[200.0]]
+            assert "Skipping 1 of 2 viewsheds" in result.stdout
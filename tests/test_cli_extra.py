@@ -1,6 +1,6 @@
 import pytest
 from typer.testing import CliRunner
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import MagicMock, patch, mock_open, call
 from pathlib import Path
 from rangeplotter.cli.main import app, __version__
 
@@ -78,14 +78,15 @@ def test_prepare_dem(mock_resolve, mock_load_radars, mock_dem_client_cls, mock_a
     mock_load_radars.return_value = [mock_radar]
 
     mock_dem_client = MagicMock()
-    mock_dem_client.query_tiles.return_value = [MagicMock(), MagicMock()]
+    mock_dem_client.query_tiles_many.side_effect = lambda bboxes, limit: {b: [MagicMock(), MagicMock()] for b in bboxes}
     mock_dem_client_cls.return_value = mock_dem_client
 
     result = runner.invoke(app, ["prepare-dem", "--config", "config.yaml"])
     
     assert result.exit_code == 0
     assert "DEM metadata preparation complete" in result.stdout
-    mock_dem_client.query_tiles.assert_called()
+    assert "2 DEM products referenced" in result.stdout
+    mock_dem_client.query_tiles_many.assert_called_once()
 
 
 @patch("rangeplotter.cli.main.Settings")
@@ -234,3 +235,224 @@ def test_detection_range_no_data(mock_parse, mock_settings_cls, tmp_path):
     result = runner.invoke(app, ["detection-range", "--input", str(input_file)])
     assert result.exit_code == 1
     assert "No valid data found" in result.stdout
+
+def test_viewshed_worker_count():
+    from rangeplotter.cli.main import _viewshed_worker_count
+    settings = MagicMock()
+    settings.concurrency.max_workers = 8
+    settings.concurrency.reserve_cpus = 0
+    with patch("rangeplotter.cli.main._available_cpus", return_value=4):
+        assert _viewshed_worker_count(settings, 10) == 4
+        assert _viewshed_worker_count(settings, 2) == 2
+        settings.concurrency.reserve_cpus = 4
+        assert _viewshed_worker_count(settings, 10) == 1
+
+def test_available_cpus_uses_affinity():
+    from rangeplotter.cli.main import _available_cpus
+    with patch("rangeplotter.cli.main.os.sched_getaffinity", create=True, return_value={0, 1}), \
+         patch("rangeplotter.cli.main.os.cpu_count", return_value=64):
+        assert _available_cpus() == 2
+    with patch("rangeplotter.cli.main.os.sched_getaffinity", create=True, side_effect=AttributeError), \
+         patch("rangeplotter.cli.main.os.cpu_count", return_value=None):
+        assert _available_cpus() == 1
+
+def test_resolve_inputs_directory(tmp_path):
+    from rangeplotter.cli.main import _resolve_inputs
+    (tmp_path / "b.kml").touch()
+    (tmp_path / "a.csv").touch()
+    (tmp_path / "notes.txt").touch()
+    (tmp_path / "dir.kml").mkdir()
+
+    files = _resolve_inputs(tmp_path)
+
+    assert [f.name for f in files] == ["b.kml", "a.csv"]
+    assert all(isinstance(f, Path) for f in files)
+
+def test_load_radars_reuses_parsed_kml(tmp_path):
+    import os
+    from rangeplotter.cli.main import _load_radars
+    kml = tmp_path / "sites.kml"
+    kml.write_text("""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+<Placemark><name>Site A</name><Point><coordinates>1.5,2.5,0</coordinates></Point></Placemark>
+</Document></kml>""")
+    cache_dir = tmp_path / "cache"
+
+    first = _load_radars([kml], 10.0, cache_dir)
+    with patch("rangeplotter.cli.main.parse_radars") as mock_parse:
+        second = _load_radars([kml], 10.0, cache_dir)
+        mock_parse.assert_not_called()
+        assert second == first
+
+        # A different default height or an edited file is parsed again
+        mock_parse.return_value = []
+        _load_radars([kml], 20.0, cache_dir)
+        assert mock_parse.call_count == 1
+        st = kml.stat()
+        os.utime(kml, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        _load_radars([kml], 10.0, cache_dir)
+        assert mock_parse.call_count == 2
+
+def test_safe_name():
+    from rangeplotter.cli.main import _safe_name
+    assert _safe_name("Site A/North 2") == "Site_A-North_2"
+    assert _safe_name("Radar_1") == "Radar_1"
+
+def test_dem_client_reused_across_commands(tmp_path):
+    from rangeplotter.cli.main import _get_dem_client
+    first_auth, second_auth = MagicMock(), MagicMock()
+    first = _get_dem_client("http://test.com", first_auth, tmp_path / "dem", verbose=0, max_workers=2)
+    first.total_download_time = 5.0
+    second = _get_dem_client("http://test.com", second_auth, tmp_path / "dem", verbose=1, max_workers=4)
+
+    assert second is first
+    assert second.auth is second_auth
+    assert second.max_workers == 4
+    assert second.total_download_time == 0.0
+    assert _get_dem_client("http://test.com", None, tmp_path / "other") is not first
+
+def test_bbox_contains():
+    from rangeplotter.cli.main import _bbox_contains
+    assert _bbox_contains((0, 0, 2, 2), (0.5, 0.5, 2, 1))
+    assert not _bbox_contains((0, 0, 2, 2), (0.5, -0.1, 1, 1))
+
+def test_load_radars_parses_several_kml_files_in_order(tmp_path):
+    from rangeplotter.cli.main import _load_radars
+    files = []
+    for i in range(3):
+        kml = tmp_path / f"sites{i}.kml"
+        kml.write_text(f"""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+<Placemark><name>Site {i}</name><Point><coordinates>{i},0,0</coordinates></Point></Placemark>
+</Document></kml>""")
+        files.append(kml)
+
+    # Force the process-pool path even on a single-CPU machine and for tiny files
+    with patch("rangeplotter.cli.main._available_cpus", return_value=2), \
+         patch("rangeplotter.cli.main._PARALLEL_PARSE_MIN_BYTES", 0):
+        radars = _load_radars(files + [tmp_path / "missing.kml"], 10.0)
+
+    assert [r.name for r in radars] == ["Site 0", "Site 1", "Site 2"]
+
+def test_parse_workers_stays_in_process_for_small_inputs(tmp_path):
+    from rangeplotter.cli.main import _parse_workers
+    small = [tmp_path / "a.kml", tmp_path / "b.kml"]
+    for f in small:
+        f.write_text("<kml/>")
+
+    with patch("rangeplotter.cli.main._available_cpus", return_value=4):
+        assert _parse_workers(small) == 1
+        assert _parse_workers(small[:1]) == 1
+        with patch("rangeplotter.cli.main._PARALLEL_PARSE_MIN_BYTES", 10):
+            assert _parse_workers(small) == 2
+    with patch("rangeplotter.cli.main._available_cpus", return_value=1), \
+         patch("rangeplotter.cli.main._PARALLEL_PARSE_MIN_BYTES", 0):
+        assert _parse_workers(small) == 1
+
+def test_parse_viewshed_files_in_order_with_errors(tmp_path):
+    from shapely.geometry import Point
+    from rangeplotter.cli.main import _parse_viewshed_files
+    from rangeplotter.io.export import export_viewshed_kml
+    files = []
+    for i in range(2):
+        kml = tmp_path / f"viewshed-S{i}-tgt_alt_100m.kml"
+        export_viewshed_kml(
+            viewshed_polygon=Point(i, 0).buffer(0.1), output_path=kml, altitude=100.0, style_config={},
+            sensors=[{'name': f"S{i}", 'location': (i, 0), 'style_config': {}}], document_name=f"S{i}"
+        )
+        files.append(kml)
+    broken = tmp_path / "broken.kml"
+    broken.write_text("<kml>")
+
+    # Force the process-pool path even on a single-CPU machine and for tiny files
+    with patch("rangeplotter.cli.main._available_cpus", return_value=2), \
+         patch("rangeplotter.cli.main._PARALLEL_PARSE_MIN_BYTES", 0):
+        parsed = _parse_viewshed_files([files[0], broken, files[1]])
+
+    assert [round(r[0]['sensor'][0]) for r, _ in (parsed[0], parsed[2])] == [0, 1]
+    assert parsed[1][0] is None and parsed[1][1] is not None
+
+def test_parse_viewshed_files_small_batch_stays_in_process(tmp_path):
+    from rangeplotter.cli.main import _parse_viewshed_files
+    files = [tmp_path / "a.kml", tmp_path / "b.kml"]
+    for f in files:
+        f.write_text("<kml>")
+
+    with patch("rangeplotter.cli.main._available_cpus", return_value=4), \
+         patch("rangeplotter.cli.main._parse_pool") as mock_pool:
+        parsed = _parse_viewshed_files(files)
+
+    mock_pool.assert_not_called()
+    assert all(res is None and err is not None for res, err in parsed)
+
+def test_filter_radars():
+    import typer
+    from rangeplotter.cli.main import _filter_radars
+    radars = [MagicMock(), MagicMock(), MagicMock()]
+    for r, name in zip(radars, ["North Site", "South Site", "Harbour"]):
+        r.name = name
+
+    # Literal pattern (substring) and regex pattern select the same way re.search would
+    assert [r.name for r in _filter_radars(radars, "Site")] == ["North Site", "South Site"]
+    assert [r.name for r in _filter_radars(radars, "^(North|Harbour)")] == ["North Site", "Harbour"]
+
+    with pytest.raises(typer.Exit) as exc:
+        _filter_radars(radars, "Inland")
+    assert exc.value.exit_code == 0
+    with pytest.raises(typer.Exit) as exc:
+        _filter_radars(radars, "(unclosed")
+    assert exc.value.exit_code == 1
+
+def test_parse_float_list():
+    from rangeplotter.cli.main import _parse_float_list
+    assert _parse_float_list(["100, 200", "500"], "altitude") == [100.0, 200.0, 500.0]
+    assert _parse_float_list(["10,abc", "20"], "range") == [10.0, 20.0]
+    assert _parse_float_list(None, "range") == []
+
+def test_resolve_viewshed_inputs_falls_back_to_viewshed_dir(tmp_path, monkeypatch):
+    from rangeplotter.cli.main import _resolve_viewshed_inputs
+    fallback = tmp_path / "viewshed"
+    fallback.mkdir()
+    for name in ["a_100m.kml", "b_100m.kml", "c_200m.kml", ".hidden_100m.kml"]:
+        (fallback / name).touch()
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    (cwd / "local_100m.kml").touch()
+    monkeypatch.chdir(cwd)
+
+    files = _resolve_viewshed_inputs(
+        ["*_100m.kml", "b_*.kml", "c_200m.kml", "missing.kml", "none_*.kml"], fallback
+    )
+
+    # CWD matches win; unmatched patterns and names are checked in the fallback dir
+    assert files == [
+        Path("local_100m.kml"),
+        fallback / "b_100m.kml",
+        fallback / "c_200m.kml",
+    ]
+
+def test_unit_progress_scales_into_overall_bar():
+    from rangeplotter.cli.main import _UnitProgress
+    prog = MagicMock()
+    report = _UnitProgress(prog, "calc", "overall", base_step=200, span=300)
+
+    report("Computing LOS", 0.5)
+    report("Vectorizing", 1.5)  # clamped to the unit's share
+
+    assert prog.update.call_args_list == [
+        call("calc", description="  Computing LOS...", completed=50.0),
+        call("overall", completed=350.0),
+        call("calc", description="  Vectorizing...", completed=100.0),
+        call("overall", completed=500.0),
+    ]
+
+def test_load_radars_does_not_cache_empty_results(tmp_path):
+    from rangeplotter.cli.main import _load_radars
+    kml = tmp_path / "empty.kml"
+    kml.write_text("<kml/>")
+    cache_dir = tmp_path / "cache"
+
+    with patch("rangeplotter.cli.main._parse_kml_files", return_value=[[]]), \
+         patch("rangeplotter.cli.main.store_cached_radars") as store:
+        assert _load_radars([kml], 10.0, cache_dir) == []
+    store.assert_not_called()
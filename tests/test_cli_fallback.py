@@ -30,7 +30,7 @@ def mock_parse_viewshed():
         mock.return_value = []
         yield mock
 
-def test_viewshed_fallback(mock_dirs, mock_parse_radars):
+def test_viewshed_fallback(mock_dirs, mock_parse_radars, isolated_settings):
     input_dir, _ = mock_dirs
     
     # Create file in default input dir
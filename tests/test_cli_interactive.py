@@ -33,8 +33,9 @@ def test_viewshed_check_download_interactive_yes(tmp_path):
         tile = DemTile("t1", (0,0,1,1), tmp_path / "cache/dem/t1.dt2")
         # tile.local_path does not exist
         
-        client.query_tiles.return_value = [tile]
+        client.query_tiles_many.side_effect = lambda bboxes, limit=20: {tuple(b): [tile] for b in bboxes}
         client.sample_elevation.return_value = 0.0
+        client.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
         
         # User says YES to download
         mock_confirm.return_value = True
@@ -78,8 +79,9 @@ def test_viewshed_check_download_interactive_no(tmp_path):
         # Simulate missing local tile
         tile = DemTile("t1", (0,0,1,1), tmp_path / "cache/dem/t1.dt2")
         
-        client.query_tiles.return_value = [tile]
+        client.query_tiles_many.side_effect = lambda bboxes, limit=20: {tuple(b): [tile] for b in bboxes}
         client.sample_elevation.return_value = 0.0
+        client.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
         
         # User says NO
         mock_confirm.return_value = False
@@ -13,3 +13,17 @@ def test_default_settings():
     # Settings requires copernicus_api, so we need to provide it or mock it.
     # But Settings is a Pydantic model, so we can instantiate it with dict.
     pass 
+
+def test_from_file_reparses_after_edit(sample_config_path):
+    first = Settings.from_file(sample_config_path)
+    # Mutating a loaded instance must not leak into later loads
+    first.altitudes_msl_m.append(999)
+    assert Settings.from_file(sample_config_path).altitudes_msl_m == [100, 200]
+
+    import os, yaml
+    data = yaml.safe_load(sample_config_path.read_text())
+    data["sensor_height_m_agl"] = 25.0
+    sample_config_path.write_text(yaml.safe_dump(data))
+    st = sample_config_path.stat()
+    os.utime(sample_config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert Settings.from_file(sample_config_path).sensor_height_m_agl == 25.0
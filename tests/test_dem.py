@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch, mock_open
 from pathlib import Path
-from rangeplotter.io.dem import DemClient, DemTile
+from rangeplotter.io.dem import DemClient, DemTile, merge_bboxes
 import json
 
 @pytest.fixture
@@ -26,7 +26,7 @@ def test_query_tiles_no_auth(tmp_path):
 
 def test_query_tiles_with_auth(dem_client):
     # Mock requests.get for OData query
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -57,7 +57,7 @@ def test_query_tiles_with_auth(dem_client):
 def test_download_tile_zip(dem_client):
     tile = DemTile("tile1", (0,0,1,1), dem_client.cache_dir / "tile1.dt2")
     
-    with patch("requests.get") as mock_get, \
+    with patch("requests.Session.get") as mock_get, \
          patch("zipfile.ZipFile") as mock_zip:
          
         # Mock redirect then success
@@ -110,6 +110,8 @@ def test_sample_elevation_from_index(dem_client):
         
         elev = dem_client.sample_elevation(0.5, 0.5)
         assert elev == 123.0
+        # Reads a single-pixel window, not the whole band
+        assert ds.read.call_args.kwargs["window"].width == 1
 
 def test_sample_elevation_fallback(dem_client):
     # No index file, but file exists in cache
@@ -152,7 +154,7 @@ def test_get_download_requirements(dem_client):
 
 def test_download_tile_failure(dem_client):
     tile = DemTile("tile1", (0,0,1,1), dem_client.cache_dir / "tile1.dt2")
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.return_value.status_code = 404
         path = dem_client.download_tile(tile)
         assert not path.exists()
@@ -190,3 +192,92 @@ def test_ensure_tiles(dem_client):
         assert t2.local_path in paths
         
         mock_download.assert_called_once_with(t2)
+
+def test_ensure_tiles_many_dedupes_and_downloads_concurrently(dem_client):
+    dem_client.max_workers = 4
+    with patch.object(dem_client, 'query_tiles_many') as mock_query, \
+         patch.object(dem_client, 'download_tile') as mock_download:
+
+        shared = DemTile("shared", (0,0,1,1), dem_client.cache_dir / "shared.dt2")
+        a = DemTile("a", (0,0,1,1), dem_client.cache_dir / "a.dt2")
+        b = DemTile("b", (1,0,2,1), dem_client.cache_dir / "b.dt2")
+        # Separate bboxes that both report the shared tile
+        mock_query.return_value = {(0,0,1,1): [a, shared], (5,5,6,6): [shared, b]}
+
+        def download_side_effect(tile):
+            tile.downloaded = True
+            return tile.local_path
+
+        mock_download.side_effect = download_side_effect
+
+        paths = dem_client.ensure_tiles_many([(0,0,1,1), (5,5,6,6)])
+
+        assert sorted(p.name for p in paths) == ["a.dt2", "b.dt2", "shared.dt2"]
+        assert mock_download.call_count == 3
+
+def test_merge_bboxes():
+    # Contained and duplicate boxes collapse into the outer one
+    assert merge_bboxes([(0,0,2,2), (0.5,0.5,1,1), (0,0,2,2)]) == [(0,0,2,2)]
+    # Side-by-side boxes form a rectangle and merge
+    assert merge_bboxes([(0,0,1,1), (1,0,2,1)]) == [(0.0, 0.0, 2.0, 1.0)]
+    # Diagonal overlap would add large empty corners, so the boxes are kept
+    diag = [(0,0,2,2), (1.5,1.5,3.5,3.5)]
+    assert sorted(merge_bboxes(diag)) == sorted(diag)
+    # Disjoint boxes are untouched
+    assert sorted(merge_bboxes([(0,0,1,1), (5,5,6,6)])) == [(0,0,1,1), (5,5,6,6)]
+
+def test_ensure_tiles_reuses_lookup(dem_client):
+    with patch.object(dem_client, 'query_tiles') as mock_query:
+        t1 = DemTile("t1", (0,0,1,1), dem_client.cache_dir / "t1.dt2")
+        t1.local_path.write_text("data")
+        mock_query.return_value = [t1]
+
+        dem_client.ensure_tiles((0,0,1,1))
+        dem_client.ensure_tiles((0.00001,0,1,1))
+
+        mock_query.assert_called_once()
+
+def test_sample_elevations_opens_each_tile_once(dem_client):
+    index_data = {
+        "tile1": {"name": "tile1_dt2", "footprint": "geography'SRID=4326;POLYGON((0 0, 0 1, 1 1, 1 0, 0 0))'"},
+        "tile2": {"name": "tile2_dt2", "footprint": "geography'SRID=4326;POLYGON((1 0, 1 1, 2 1, 2 0, 1 0))'"},
+    }
+    (dem_client.cache_dir / "index.json").write_text(json.dumps(index_data))
+    (dem_client.cache_dir / "tile1.dt2").touch()
+    (dem_client.cache_dir / "tile2.dt2").touch()
+
+    with patch("rasterio.open") as mock_open_raster:
+        ds = mock_open_raster.return_value.__enter__.return_value
+        ds.index.return_value = (0, 0)
+        ds.height = 10
+        ds.width = 10
+        ds.read.return_value = MagicMock()
+        ds.read.return_value.__getitem__.return_value = 42.0
+
+        elevs = dem_client.sample_elevations([0.2, 0.8, 1.5], [0.5, 0.5, 0.5])
+
+        assert list(elevs) == [42.0, 42.0, 42.0]
+        assert mock_open_raster.call_count == 2
+
+def test_sample_elevations_reads_tiles_concurrently(dem_client):
+    dem_client.max_workers = 4
+    index_data = {
+        "tile1": {"name": "tile1_dt2", "footprint": "geography'SRID=4326;POLYGON((0 0, 0 1, 1 1, 1 0, 0 0))'"},
+        "tile2": {"name": "tile2_dt2", "footprint": "geography'SRID=4326;POLYGON((1 0, 1 1, 2 1, 2 0, 1 0))'"},
+    }
+    (dem_client.cache_dir / "index.json").write_text(json.dumps(index_data))
+    (dem_client.cache_dir / "tile1.dt2").touch()
+    (dem_client.cache_dir / "tile2.dt2").touch()
+
+    with patch("rasterio.open") as mock_open_raster:
+        ds = mock_open_raster.return_value.__enter__.return_value
+        ds.index.return_value = (0, 0)
+        ds.height = 10
+        ds.width = 10
+        ds.read.return_value = MagicMock()
+        ds.read.return_value.__getitem__.return_value = 7.0
+
+        elevs = dem_client.sample_elevations([0.2, 1.5], [0.5, 0.5])
+
+        assert list(elevs) == [7.0, 7.0]
+        assert mock_open_raster.call_count == 2
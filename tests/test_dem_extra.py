@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import MagicMock, patch, mock_open
 from pathlib import Path
-from rangeplotter.io.dem import DemClient, DemTile, approximate_bounding_box
+from rangeplotter.io.dem import DemClient, DemTile, approximate_bounding_box, approximate_bounding_box_vec
 import json
+import os
 import zipfile
 import io
 
@@ -26,6 +27,13 @@ def test_approximate_bounding_box():
     assert bbox[2] == pytest.approx(1.0, abs=0.1)
     assert bbox[3] == pytest.approx(1.0, abs=0.1)
 
+def test_approximate_bounding_box_vec_matches_scalar():
+    lons, lats, radii = [0.0, 10.0, -120.0], [0.0, 60.0, 89.9], [1000.0, 50000.0, 200000.0]
+    boxes = approximate_bounding_box_vec(lons, lats, radii)
+    assert boxes.shape == (3, 4)
+    for row, args in zip(boxes, zip(lons, lats, radii)):
+        assert tuple(row) == pytest.approx(approximate_bounding_box(*args))
+
 def test_check_local_coverage(dem_client):
     # Create index.json
     index_data = {
@@ -63,6 +71,21 @@ def test_check_local_coverage_miss(dem_client):
     
     assert tiles is None
 
+def test_footprint_index_reused_until_index_changes(dem_client):
+    index_data = {
+        "tile1": {"name": "tile1", "footprint": "geography'SRID=4326;POLYGON((0 0, 0 1, 1 1, 1 0, 0 0))'"}
+    }
+    dem_client._save_index(index_data)
+    pids, _, _, tree = dem_client._footprint_index()
+    assert pids == ["tile1"]
+    # Unchanged index.json: same tree object
+    assert dem_client._footprint_index()[3] is tree
+
+    index_data["tile2"] = {"name": "tile2", "footprint": "geography'SRID=4326;POLYGON((1 0, 1 1, 2 1, 2 0, 1 0))'"}
+    dem_client._save_index(index_data)
+    assert dem_client._footprint_index()[0] == ["tile1", "tile2"]
+    assert [t.id for t in dem_client._check_local_coverage((0.5, 0.2, 1.5, 0.8))] == ["tile1", "tile2"]
+
 @patch("rangeplotter.io.dem.rasterio.open")
 def test_sample_elevation(mock_open_ds, dem_client):
     # Create index.json
@@ -112,7 +135,7 @@ def test_sample_elevation_fallback(mock_open_ds, dem_client):
 def test_download_tile_bad_zip(dem_client):
     tile = DemTile("tile1", (0,0,1,1), dem_client.cache_dir / "tile1.dt2")
     
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_resp = MagicMock()
         mock_resp.status_code = 200
         mock_resp.iter_content.return_value = [b"not a zip file"]
@@ -135,7 +158,7 @@ def test_download_tile_zip_selection(dem_client):
     
     zip_content = zip_buffer.getvalue()
     
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_resp = MagicMock()
         mock_resp.status_code = 200
         mock_resp.iter_content.return_value = [zip_content]
@@ -164,3 +187,99 @@ def test_get_download_requirements(dem_client):
         assert reqs["cached_count"] == 1
         assert reqs["download_count"] == 1
         assert reqs["est_size_mb"] == 25.0
+
+def test_download_tile_failure_leaves_no_partial_file(dem_client):
+    tile = DemTile("tile1", (0,0,1,1), dem_client.cache_dir / "tile1.dt2")
+
+    with patch("requests.Session.get") as mock_get:
+        mock_resp = MagicMock()
+        mock_resp.status_code = 200
+        mock_resp.iter_content.return_value = [b"not a zip file"]
+        mock_get.return_value = mock_resp
+        # Fail after the payload has been written to the temp file
+        with patch("rangeplotter.io.dem.os.replace", side_effect=OSError("disk full")):
+            dem_client.download_tile(tile)
+
+    assert not tile.local_path.exists()
+    assert not tile.downloaded
+    assert list(dem_client.cache_dir.glob("tile1.dt2.tmp.*")) == []
+
+def test_dem_client_pickles_for_worker_processes(tmp_path):
+    import pickle
+    client = DemClient("http://test.com", None, tmp_path, max_workers=4)
+    client._get_session()
+    clone = pickle.loads(pickle.dumps(client))
+    assert clone.max_workers == 4
+    assert clone._session is None
+    with clone._cache_lock, clone._time_lock:
+        pass
+
+def test_partition_cached(tmp_path):
+    from rangeplotter.io.dem import partition_cached
+    full = tmp_path / "full.dt2"
+    full.write_bytes(b"x")
+    empty = tmp_path / "empty.dt2"
+    empty.touch()
+    tiles = [DemTile(n, (0, 0, 1, 1), p) for n, p in [("full", full), ("empty", empty), ("gone", tmp_path / "gone.dt2")]]
+
+    cached, missing = partition_cached(tiles)
+    assert [t.id for t in cached] == ["full"]
+    assert [t.id for t in missing] == ["empty", "gone"]
+
+def test_row_major_tile_mirrors_dted(tmp_path):
+    import numpy as np
+    import rasterio
+    import rasterio.shutil
+    from rasterio.transform import from_origin
+    from rangeplotter.io.dem import row_major_tile
+
+    n = 121  # DTED level 0 grid
+    data = np.arange(n * n, dtype=np.int16).reshape(n, n)
+    data[0, 0] = -32767
+    src_tif = tmp_path / "src.tif"
+    with rasterio.open(src_tif, "w", driver="GTiff", width=n, height=n, count=1, dtype="int16",
+                       crs="EPSG:4326", transform=from_origin(10 - 0.5 / 120, 47 + 0.5 / 120, 1 / 120, 1 / 120)) as dst:
+        dst.write(data, 1)
+    tile = tmp_path / "tile.dt2"
+    with rasterio.open(src_tif) as src:
+        rasterio.shutil.copy(src, tile, driver="DTED")
+
+    header = row_major_tile(tile)
+    assert header == tmp_path / "row_major" / "tile.dt2.raw.vrt"
+    assert not any(f.name.endswith((".raw", ".raw.vrt")) for f in tmp_path.iterdir())
+    with rasterio.open(tile) as a, rasterio.open(header) as b:
+        assert b.block_shapes[0][1] == b.width  # row blocks, not DTED column records
+        assert (a.transform, a.crs, a.nodata, a.dtypes) == (b.transform, b.crs, b.nodata, b.dtypes)
+        assert np.array_equal(a.read(1), b.read(1))
+
+    # Reused until the tile changes
+    built = header.stat().st_mtime_ns
+    assert row_major_tile(tile) == header and header.stat().st_mtime_ns == built
+    os.utime(tile, ns=(built + 10**9, built + 10**9))
+    row_major_tile(tile)
+    assert header.stat().st_mtime_ns > built
+
+    # Other formats, and unreadable tiles, are used as they are
+    assert row_major_tile(src_tif) == src_tif
+    broken = tmp_path / "broken.dt2"
+    broken.write_bytes(b"not dted")
+    assert row_major_tile(broken) == broken
+    assert list(tmp_path.rglob("*.tmp.*")) == []
+
+def test_cache_version_tracks_tiles_only(dem_client):
+    cache_dir = dem_client.cache_dir
+    empty = dem_client.cache_version
+
+    tile = cache_dir / "tile1.dt2"
+    tile.write_bytes(b"x")
+    with_tile = dem_client.cache_version
+    assert with_tile != empty
+
+    # Catalogue rewrites and derived files leave the version alone
+    (cache_dir / "index.json").write_text("{}")
+    (cache_dir / "query_cache.json").write_text("{}")
+    assert dem_client.cache_version == with_tile
+
+    # Replacing a tile changes it
+    tile.write_bytes(b"xy")
+    assert dem_client.cache_version != with_tile
@@ -23,7 +23,7 @@ def test_query_tiles_pagination(tmp_path, mock_auth):
         "value": [{"Id": "tile2", "Name": "Tile 2"}]
     }
     
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.side_effect = [
             MagicMock(status_code=200, json=lambda: page1),
             MagicMock(status_code=200, json=lambda: page2)
@@ -36,6 +36,18 @@ def test_query_tiles_pagination(tmp_path, mock_auth):
         assert tiles[1].id == "tile2"
         assert mock_get.call_count == 2
 
+def test_session_reused_across_requests(tmp_path, mock_auth):
+    client = DemClient("http://test.com", mock_auth, tmp_path)
+    session = client._get_session()
+    assert client._get_session() is session
+
+    retry = session.get_adapter("https://catalogue.example").max_retries
+    assert retry.total == 5 and 503 in retry.status_forcelist
+
+    client.close()
+    assert client._session is None
+    assert client._get_session() is not session
+
 def test_query_tiles_cache(tmp_path, mock_auth):
     client = DemClient("http://test.com", mock_auth, tmp_path)
     
@@ -48,7 +60,7 @@ def test_query_tiles_cache(tmp_path, mock_auth):
     # Create dummy file for cached tile
     (tmp_path / "cached_tile.dt2").touch()
     
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         tiles = client.query_tiles((0, 0, 1, 1))
         
         assert len(tiles) == 1
@@ -74,7 +86,7 @@ def test_query_tiles_auth_failure(tmp_path):
 def test_query_tiles_http_error(tmp_path, mock_auth):
     client = DemClient("http://test.com", mock_auth, tmp_path)
     
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.return_value.status_code = 500
         mock_get.return_value.text = "Server Error"
         
@@ -86,10 +98,72 @@ def test_query_tiles_http_error(tmp_path, mock_auth):
 def test_query_tiles_empty_result(tmp_path, mock_auth):
     client = DemClient("http://test.com", mock_auth, tmp_path)
     
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = {"value": []}
         
         tiles = client.query_tiles((0, 0, 1, 1))
         assert len(tiles) == 1
         assert tiles[0].id.startswith("synthetic_")
+
+def test_query_tiles_many_batches_requests(tmp_path, mock_auth):
+    client = DemClient("http://test.com", mock_auth, tmp_path)
+    page = {
+        "value": [
+            {"Id": "west", "Name": "W", "Footprint": "geography'SRID=4326;POLYGON((0 0, 0 1, 1 1, 1 0, 0 0))'"},
+            {"Id": "east", "Name": "E", "Footprint": "geography'SRID=4326;POLYGON((5 0, 5 1, 6 1, 6 0, 5 0))'"},
+        ]
+    }
+    bboxes = [(0.2, 0.2, 0.8, 0.8), (5.2, 0.2, 5.8, 0.8)]
+
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value = MagicMock(status_code=200, json=lambda: page)
+        result = client.query_tiles_many(bboxes)
+
+        assert mock_get.call_count == 1
+        assert " or " in mock_get.call_args[0][0]
+        assert [t.id for t in result[bboxes[0]]] == ["west"]
+        assert [t.id for t in result[bboxes[1]]] == ["east"]
+
+    # Both results are now in the query cache / index, so a repeat is free
+    with patch("requests.Session.get") as mock_get:
+        again = client.query_tiles_many(bboxes)
+        mock_get.assert_not_called()
+        assert [t.id for t in again[bboxes[1]]] == ["east"]
+
+def test_query_tiles_cache_contained_bbox(tmp_path, mock_auth):
+    client = DemClient("http://test.com", mock_auth, tmp_path)
+
+    # An earlier, larger query found three tiles; "east" does not touch the new bbox
+    # and "mid" has no indexed footprint, so it is kept
+    (tmp_path / "query_cache.json").write_text(json.dumps({"0.0000_0.0000_2.0000_1.0000": ["west", "mid", "east"]}))
+    (tmp_path / "index.json").write_text(json.dumps({
+        "west": {"name": "west", "footprint": "geography'SRID=4326;POLYGON ((0 0, 0.5 0, 0.5 1, 0 1, 0 0))'"},
+        "east": {"name": "east", "footprint": "geography'SRID=4326;POLYGON ((1.5 0, 2 0, 2 1, 1.5 1, 1.5 0))'"},
+    }))
+
+    with patch("requests.Session.get") as mock_get:
+        tiles = client.query_tiles((0.2, 0.2, 0.8, 0.8))
+
+    assert [t.id for t in tiles] == ["west", "mid"]
+    mock_get.assert_not_called()
+    mock_auth.ensure_access_token.assert_not_called()
+
+def test_query_tiles_many_sends_batches_concurrently(tmp_path, mock_auth):
+    import threading
+    from rangeplotter.io import dem as dem_mod
+
+    client = DemClient("http://test.com", mock_auth, tmp_path, max_workers=4)
+    bboxes = [(float(i), 0.0, i + 0.5, 0.5) for i in range(dem_mod._MAX_OR_CLAUSES * 2 + 1)]
+    threads = set()
+
+    def fake_fetch(filter_str, limit, token):
+        threads.add(threading.get_ident())
+        return []
+
+    with patch.object(client, "_fetch_products", side_effect=fake_fetch) as fetch:
+        results = client.query_tiles_many(bboxes)
+
+    assert fetch.call_count == 3
+    assert set(results) == set(bboxes)
+    assert threading.get_ident() not in threads
@@ -1,6 +1,7 @@
 
 import math
-from rangeplotter.geo.earth import mutual_horizon_distance, single_horizon_distance
+import numpy as np
+from rangeplotter.geo.earth import mutual_horizon_distance, mutual_horizon_distance_vec, single_horizon_distance
 
 def test_single_horizon():
     # h = 100m, k=1.333
@@ -17,3 +18,17 @@ def test_mutual_horizon():
     d = mutual_horizon_distance(h1, h2, 0, 1.333)
     d_single = single_horizon_distance(h1, 0, 1.333)
     assert math.isclose(d, d_single * 2, rel_tol=1e-5)
+
+def test_mutual_horizon_vec_matches_scalar():
+    heights = [10.0, 250.0, 1200.0]
+    lats = [0.0, 45.0, -70.0]
+    d = mutual_horizon_distance_vec(np.array(heights), 500.0, np.array(lats), 1.333)
+    for i, (h, lat) in enumerate(zip(heights, lats)):
+        assert math.isclose(d[i], mutual_horizon_distance(h, 500.0, lat, 1.333), rel_tol=1e-9)
+
+def test_mutual_horizon_distance_is_memoised():
+    mutual_horizon_distance.cache_clear()
+    first = mutual_horizon_distance(30.0, 1000.0, 51.5, 1.333)
+    again = mutual_horizon_distance(30.0, 1000.0, 51.5, 1.333)
+    assert again == first
+    assert mutual_horizon_distance.cache_info().hits == 1
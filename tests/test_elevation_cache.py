@@ -0,0 +1,34 @@
+"""
+Unit tests for the ElevationCache class.
+"""
+import json
+
+from rangeplotter.io.elevation_cache import ElevationCache
+
+
+def test_roundtrip(tmp_path):
+    cache = ElevationCache(tmp_path, "v1")
+    assert cache.get(1.5, 2.5) is None
+    cache.put(1.5, 2.5, 123.4)
+    assert cache.save()
+
+    reloaded = ElevationCache(tmp_path, "v1")
+    assert reloaded.get(1.5, 2.5) == 123.4
+    assert list(tmp_path.glob("*.tmp.*")) == []
+
+
+def test_dem_version_change_invalidates(tmp_path):
+    cache = ElevationCache(tmp_path, "v1")
+    cache.put(1.5, 2.5, 123.4)
+    cache.save()
+
+    assert ElevationCache(tmp_path, "v2").get(1.5, 2.5) is None
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    (tmp_path / "elevations.json").write_text("{not json")
+    cache = ElevationCache(tmp_path, "v1")
+    assert cache.get(0.0, 0.0) is None
+    cache.put(0.0, 0.0, 5.0)
+    assert cache.save()
+    assert json.loads((tmp_path / "elevations.json").read_text())["points"]
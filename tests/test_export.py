@@ -1,9 +1,11 @@
 from rangeplotter.io.export import (
     to_kml_color, _coords_to_kml_str, export_viewshed_kml, export_horizons_kml,
-    export_kml_polygon, geodesic_circle_coords, kml_ring_placemark, export_combined_kml
+    export_kml_polygon, geodesic_circle_coords, kml_ring_placemark, export_combined_kml,
+    format_number
 )
 from shapely.geometry import Polygon, MultiPolygon
 from pathlib import Path
+import pytest
 from rangeplotter.models.radar_site import RadarSite
 
 def test_to_kml_color():
@@ -18,10 +20,19 @@ def test_to_kml_color():
     c = to_kml_color("#FFFFFF", 0.5).lower()
     assert c.startswith("7f") or c.startswith("80")
 
+def test_format_number():
+    assert format_number(100.0) == "100"
+    assert format_number(100) == "100"
+    assert format_number(12.5) == "12.5"
+    assert format_number(-3.0) == "-3"
+
 def test_coords_to_kml_str():
     coords = [(0, 0), (1, 1)]
     s = _coords_to_kml_str(coords, 100)
-    assert s == "0,0,100 1,1,100"
+    assert s == "0.0000000,0.0000000,100 1.0000000,1.0000000,100"
+    # 3D input: the ring's own z is replaced by the export altitude; lon/lat rounded to 7 dp
+    assert _coords_to_kml_str([(1.123456789, -2.5, 7.0)], 50.0) == "1.1234568,-2.5000000,50.0"
+    assert _coords_to_kml_str([], 50.0) == ""
 
 def test_export_viewshed_kml(tmp_path):
     poly = Polygon([(0,0), (1,0), (1,1), (0,1)])
@@ -172,3 +183,20 @@ def test_export_combined_kml(tmp_path):
     content = out_file.read_text()
     assert "<name>Combined</name>" in content
     assert "R1" in content
+
+def test_export_viewshed_kml_failure_leaves_no_partial_file(tmp_path, monkeypatch):
+    import rangeplotter.io.export as export_mod
+
+    def boom(coords, altitude=0.0):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(export_mod, "_coords_to_kml_str", boom)
+    out_file = tmp_path / "partial.kml"
+    with pytest.raises(RuntimeError):
+        export_viewshed_kml(
+            viewshed_polygon=Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            output_path=out_file,
+            altitude=100.0,
+            style_config={}
+        )
+    assert list(tmp_path.iterdir()) == []
@@ -121,3 +121,42 @@ def test_parse_viewshed_sensor_name(tmp_path):
     results = parse_viewshed_kml(str(kml_file))
     assert len(results) == 1
     assert results[0]['sensor_name'] == "My Custom Sensor"
+
+def test_parse_viewshed_nested_folders_and_late_styles(tmp_path):
+    kml_content = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+  <Document>
+    <Folder>
+      <name>Outer</name>
+      <Placemark>
+        <name>Sensor Location</name>
+        <Point><coordinates>1,2,0</coordinates></Point>
+      </Placemark>
+      <Folder>
+        <name>Inner</name>
+        <Placemark>
+          <name>Inner Location</name>
+          <Point><coordinates>3,4,0</coordinates></Point>
+        </Placemark>
+        <Placemark>
+          <name>Viewshed</name>
+          <styleUrl>#poly</styleUrl>
+          <Polygon><outerBoundaryIs><LinearRing><coordinates>0,0,0 1,0,0 1,1,0 0,0,0</coordinates></LinearRing></outerBoundaryIs></Polygon>
+        </Placemark>
+      </Folder>
+    </Folder>
+    <Style id="poly"><PolyStyle><color>7f0000ff</color></PolyStyle></Style>
+  </Document>
+</kml>
+"""
+    f = tmp_path / "nested.kml"
+    f.write_text(kml_content)
+
+    results = parse_viewshed_kml(str(f))
+
+    # Outer folder first (document order), and it sees the nested placemarks
+    assert [r['folder_name'] for r in results] == ["Outer", "Inner"]
+    assert results[0]['sensor'] == (3.0, 4.0)
+    assert results[1]['sensor'] == (3.0, 4.0)
+    # Style defined after the placemarks still resolves
+    assert results[1]['style']['fill_color'] == "#ff0000"
@@ -1,6 +1,7 @@
 from typer.testing import CliRunner
 from rangeplotter.cli.main import app
 from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pytest
 
@@ -161,6 +162,7 @@ def mock_horizon_dependencies():
         # Setup DemClient mock
         client_instance = MockDemClient.return_value
         client_instance.sample_elevation.return_value = 0.0
+        client_instance.sample_elevations.side_effect = lambda lons, lats: [0.0] * len(lons)
         client_instance.total_download_time = 0.0
         
         # Setup radar mocks (2 sensors)
@@ -181,9 +183,9 @@ def mock_horizon_dependencies():
         mock_load_radars.return_value = [radar1, radar2]
         
         # compute_horizons returns rings dict keyed by sensor name
-        # It's called once per sensor with [r], so return dict with that sensor's name
+        # It's called on chunks of radars, so return an entry per sensor passed in
         def compute_side_effect(radars_arg, altitudes, k_factor):
-            return {radars_arg[0].name: {100: [(0, 0), (1, 1)]}}
+            return {r.name: {100: [(0, 0), (1, 1)]} for r in radars_arg}
         
         mock_compute.side_effect = compute_side_effect
         
@@ -266,3 +268,67 @@ def test_horizon_union_overrides_config(mock_horizon_dependencies, tmp_path):
     
     assert result.exit_code == 0
     assert mocks['export'].call_count == 2  # Per-sensor outputs
+
+def test_detection_range_clips_on_thread_pool(mock_dependencies, tmp_path):
+    """Sensors are clipped concurrently; results stay paired with their sensors."""
+    mocks = mock_dependencies
+    mocks['settings'].max_threads = 4
+    input_file = tmp_path / "viewshed-tgt_alt_100.0m.kml"
+    input_file.touch()
+    v1, v2, v3 = MagicMock(), MagicMock(), MagicMock()
+    mocks['parse'].return_value = [
+        {'sensor': (10.0, 20.0), 'viewshed': v1, 'sensor_name': 'S1', 'style': {}},
+        {'sensor': (11.0, 21.0), 'viewshed': v2, 'sensor_name': 'S2', 'style': {}},
+        {'sensor': (12.0, 22.0), 'viewshed': v3, 'sensor_name': 'S3', 'style': {}}
+    ]
+    # S2 is clipped away entirely
+    mocks['clip'].side_effect = lambda viewshed, sensor, rng: MagicMock(is_empty=viewshed is v2)
+
+    with patch("rangeplotter.cli.main._available_cpus", return_value=4), \
+         patch("rangeplotter.cli.main.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as pool:
+        result = runner.invoke(app, [
+            "detection-range",
+            "--input", str(input_file),
+            "--range", "100",
+            "--output", str(tmp_path / "out"),
+            "--no-union"
+        ])
+
+    assert result.exit_code == 0
+    assert pool.call_args.kwargs == {"max_workers": 4}
+    assert mocks['clip'].call_count == 3
+    exported = [c.kwargs['sensors'][0]['name'] for c in mocks['export'].call_args_list]
+    assert exported == ['S1', 'S3']
+
+def test_detection_range_reuses_clips_across_variants_and_ranges(mock_dependencies, tmp_path):
+    """Each viewshed is clipped once per range; one wholly inside a range is not clipped again."""
+    mocks = mock_dependencies
+    mocks['settings'].max_threads = 1
+    input_file = tmp_path / "viewshed-tgt_alt_100.0m.kml"
+    input_file.touch()
+    # Site A has two variants, site B one (reused in both scenarios)
+    a1, a2, b = MagicMock(), MagicMock(), MagicMock()
+    mocks['parse'].return_value = [
+        {'sensor': (10.0, 20.0), 'viewshed': a1, 'sensor_name': 'A', 'style': {}},
+        {'sensor': (10.0, 20.0), 'viewshed': a2, 'sensor_name': 'A', 'style': {}},
+        {'sensor': (11.0, 21.0), 'viewshed': b, 'sensor_name': 'B', 'style': {}},
+    ]
+    # B already fits inside the 100 km circle, so clip_viewshed hands it back unchanged
+    mocks['clip'].side_effect = lambda viewshed, sensor, rng: viewshed if viewshed is b else MagicMock(is_empty=False)
+    b.is_empty = False
+
+    result = runner.invoke(app, [
+        "detection-range",
+        "--input", str(input_file),
+        "--range", "100",
+        "--range", "200",
+        "--output", str(tmp_path / "out"),
+        "--no-union"
+    ])
+
+    assert result.exit_code == 0
+    clipped = [(c.args[0], c.args[2]) for c in mocks['clip'].call_args_list]
+    assert clipped == [(a1, 100.0), (b, 100.0), (a1, 200.0), (a2, 100.0), (a2, 200.0)]
+    # B is still exported in every scenario at every range
+    exported = [c.kwargs['sensors'][0]['name'] for c in mocks['export'].call_args_list]
+    assert exported.count('B') == 4
@@ -31,6 +31,9 @@ def test_clip_viewshed():
 def test_clip_viewshed_exception():
     viewshed = MagicMock()
     viewshed.is_valid = True
+    viewshed.is_empty = False
+    # Straddles the clip circle, so the intersection can't be skipped
+    viewshed.bounds = (-2, -2, 2, 2)
     # First intersection fails
     # Fallback buffer succeeds
     # Second intersection (after buffer) fails
@@ -48,3 +51,24 @@ def test_union_viewsheds():
     
     assert union.area == 2.0
     assert isinstance(union, Polygon) # Should merge into one
+
+def test_clip_viewshed_reuses_buffer():
+    from rangeplotter.processing import _clip_buffer
+    _clip_buffer.cache_clear()
+    viewshed = Polygon([(-2, -2), (2, -2), (2, 2), (-2, 2)])
+    a = clip_viewshed(viewshed, (0, 0), 100)
+    b = clip_viewshed(viewshed, (0, 0), 100)
+    assert a.equals(b)
+    info = _clip_buffer.cache_info()
+    assert info.misses == 1 and info.hits == 1
+
+def test_clip_viewshed_skips_intersection_when_inside_or_outside():
+    inside = MagicMock(wraps=Polygon([(-0.1, -0.1), (0.1, -0.1), (0.1, 0.1), (-0.1, 0.1)]))
+    inside.is_valid = True
+    inside.is_empty = False
+    inside.bounds = (-0.1, -0.1, 0.1, 0.1)
+    assert clip_viewshed(inside, (0, 0), 100) is inside
+    inside.intersection.assert_not_called()
+
+    outside = Polygon([(5, 5), (6, 5), (6, 6), (5, 6)])
+    assert clip_viewshed(outside, (0, 0), 100).is_empty
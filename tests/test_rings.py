@@ -35,3 +35,18 @@ def test_compute_horizons_absolute():
     
     # Check that ground elevation was defaulted to input_altitude for absolute
     assert r1.ground_elevation_m_msl == 50.0
+
+def test_compute_horizons_matches_scalar_formula():
+    import math
+    from rangeplotter.geo.earth import mutual_horizon_distance
+    radars = [
+        RadarSite(name="A", latitude=10.0, longitude=0, input_altitude=None, altitude_mode="clampToGround", sensor_height_m_agl=20.0),
+        RadarSite(name="B", latitude=-60.0, longitude=5, input_altitude=300.0, altitude_mode="absolute", sensor_height_m_agl=0.0),
+    ]
+    altitudes = [50.0, 500.0, 5000.0]
+
+    results = compute_horizons(radars, altitudes, 1.333)
+
+    for r in radars:
+        for alt, d in results[r.name]:
+            assert math.isclose(d, mutual_horizon_distance(r.radar_height_m_msl, alt, r.latitude, 1.333), rel_tol=1e-9)
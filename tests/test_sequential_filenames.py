@@ -24,13 +24,14 @@ def mock_dem_client():
     with patch("rangeplotter.cli.main.DemClient") as mock:
         instance = mock.return_value
         instance.sample_elevation.return_value = 10.0
+        instance.sample_elevations.side_effect = lambda lons, lats: [10.0] * len(lons)
         instance.total_download_time = 0.0
         yield instance
 
 @pytest.fixture
 def mock_compute_viewshed():
-    with patch("rangeplotter.los.viewshed.compute_viewshed") as mock:
-        mock.return_value = Polygon([(0,0), (1,0), (1,1), (0,1)])
+    with patch("rangeplotter.los.viewshed.compute_viewsheds") as mock:
+        mock.side_effect = lambda radar, alts, *a, **kw: [Polygon([(0,0), (1,0), (1,1), (0,1)]) for _ in alts]
         yield mock
 
 @pytest.fixture
@@ -82,12 +83,14 @@ def test_detection_range_sequential_numbering(tmp_path, mock_parse_kml, mock_exp
     
     mock_parse_kml.side_effect = side_effect
     
-    result = runner.invoke(app, [
-        "detection-range", 
-        "--input", str(tmp_path / "*.kml"),
-        "--range", "50",
-        "--output", str(tmp_path / "output")
-    ])
+    # Keep parsing in-process so the mocked parser is used
+    with patch("rangeplotter.cli.main._available_cpus", return_value=1):
+        result = runner.invoke(app, [
+            "detection-range", 
+            "--input", str(tmp_path / "*.kml"),
+            "--range", "50",
+            "--output", str(tmp_path / "output")
+        ])
     
     assert result.exit_code == 0
     
@@ -121,7 +124,7 @@ def mock_mutual_horizon():
         mock.return_value = 1000.0
         yield mock
 
-def test_viewshed_sequential_numbering(tmp_path, mock_dem_client, mock_compute_viewshed, mock_load_radars, mock_parse_radars, mock_export_kml, mock_mutual_horizon):
+def test_viewshed_sequential_numbering(tmp_path, isolated_settings, mock_dem_client, mock_compute_viewshed, mock_load_radars, mock_parse_radars, mock_export_kml, mock_mutual_horizon):
     # Create dummy input KML
     input_kml = tmp_path / "input.kml"
     input_kml.touch()
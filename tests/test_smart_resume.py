@@ -48,6 +48,21 @@ def test_read_metadata_empty(tmp_path):
     data = read_metadata_from_kml(p)
     assert data == {}
 
+def test_read_metadata_keys_stops_early_but_rejects_truncated(tmp_path):
+    head = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Placemark>
+<ExtendedData><Data name="state_hash"><value>abc</value></Data></ExtendedData>
+<MultiGeometry><Polygon><outerBoundaryIs><LinearRing><coordinates>0,0 1,0 1,1 0,0</coordinates>"""
+    p = tmp_path / "vs.kml"
+    # Malformed geometry after the metadata is never reached when only the hash is wanted
+    p.write_text(head + "<bad></LinearRing></outerBoundaryIs></Polygon></MultiGeometry></Placemark></Document></kml>", encoding="utf-8")
+    assert read_metadata_from_kml(p, keys=("state_hash",)) == {"state_hash": "abc"}
+    assert read_metadata_from_kml(p) == {}
+
+    # A file cut off mid-write must not look up to date
+    p.write_text(head, encoding="utf-8")
+    assert read_metadata_from_kml(p, keys=("state_hash",)) == {}
+
 def test_state_manager_hashing(tmp_path, mock_radar_site):
     mgr = StateManager(tmp_path)
     
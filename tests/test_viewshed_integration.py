@@ -7,7 +7,7 @@ from rasterio.transform import from_origin
 import numpy as np
 import time
 from shapely.geometry import Polygon, MultiPolygon
-from rangeplotter.los.viewshed import compute_viewshed
+from rangeplotter.los.viewshed import compute_viewshed, _job_progress, _compute_mva_polar, _mva_polar_chunk
 from rangeplotter.models.radar_site import RadarSite
 from rangeplotter.io.viewshed_cache import ViewshedCache
 
@@ -40,7 +40,7 @@ def synthetic_dem_path(tmp_path):
         
     return dem_path
 
-def test_compute_viewshed_integration(synthetic_dem_path):
+def test_compute_viewshed_integration(synthetic_dem_path, tmp_path):
     # Mock DemClient
     mock_client = MagicMock()
     mock_client.ensure_tiles.return_value = [synthetic_dem_path]
@@ -58,6 +58,7 @@ def test_compute_viewshed_integration(synthetic_dem_path):
     
     # Config dict
     config = {
+        "cache_dir": str(tmp_path / "cache"),
         "resources": {"use_disk_swap": False},
         "multiscale": {"enable": False}, # Disable multiscale for simple test
         "atmospheric_k_factor": 1.333
@@ -80,7 +81,7 @@ def test_compute_viewshed_integration(synthetic_dem_path):
     assert not poly.is_empty
     assert poly.area > 0
 
-def test_compute_viewshed_agl(synthetic_dem_path):
+def test_compute_viewshed_agl(synthetic_dem_path, tmp_path):
     # Mock DemClient
     mock_client = MagicMock()
     mock_client.ensure_tiles.return_value = [synthetic_dem_path]
@@ -96,6 +97,7 @@ def test_compute_viewshed_agl(synthetic_dem_path):
     )
     
     config = {
+        "cache_dir": str(tmp_path / "cache"),
         "resources": {"use_disk_swap": False},
         "multiscale": {"enable": False},
         "atmospheric_k_factor": 1.333
@@ -276,4 +278,104 @@ class TestViewshedCacheIntegration:
         # Cache should be empty or not created
         cache = ViewshedCache(Path(config["cache_dir"]))
         stats = cache.get_cache_stats()
-        assert stats["count"] == 0
\ No newline at end of file
+        assert stats["count"] == 0
+
+def test_compute_viewsheds_shares_zone_rasters(synthetic_dem_path, monkeypatch):
+    from rangeplotter.los import viewshed as vs
+    mock_client = MagicMock()
+    mock_client.ensure_tiles.return_value = [synthetic_dem_path]
+    radar = RadarSite(
+        name="Multi Alt Radar",
+        longitude=0.0,
+        latitude=0.0,
+        altitude_mode="clampToGround",
+        input_altitude=None,
+        sensor_height_m_agl=10.0,
+        ground_elevation_m_msl=10.0
+    )
+    # Small near/mid zones so every altitude's range reaches past them
+    config = {
+        "resources": {"use_disk_swap": False},
+        "multiscale": {"enable": True, "near_m": 300, "mid_m": 600, "far_m": 900,
+                       "res_near_m": 30.0, "res_mid_m": 60.0, "res_far_m": 90.0},
+        "atmospheric_k_factor": 1.333
+    }
+    alts = [100.0, 500.0]
+    singles = [compute_viewshed(radar, alt, mock_client, config, use_cache=False) for alt in alts]
+
+    calls = []
+    real_mva = vs._compute_mva_polar
+    monkeypatch.setattr(vs, "_compute_mva_polar", lambda *a, **kw: calls.append(kw["max_radius_m"]) or real_mva(*a, **kw))
+    grouped = vs.compute_viewsheds(radar, alts, mock_client, config, use_cache=False)
+
+    for single, poly in zip(singles, grouped):
+        assert poly.symmetric_difference(single).area == pytest.approx(0.0, abs=1e-12)
+    # Near and mid zones once for both altitudes; far zone once per altitude (ranges differ)
+    assert len(calls) == 4
+    assert mock_client.ensure_tiles.call_count == 3
+
+def test_job_progress_maps_and_throttles():
+    calls = []
+    report = _job_progress(lambda step, frac: calls.append((step, round(frac, 4))))
+    report("Downloading DEM", 0.0)
+    for i in range(1000):
+        report("Zone 1 (30.0m)", i / 1000)
+    report("Transforming to WGS84", 0.0)
+
+    assert calls[0] == ("Downloading DEM", 0.0)
+    assert calls[1] == ("Zone 1 (30.0m)", 0.05)
+    assert calls[-1] == ("Transforming to WGS84", 0.95)
+    # Only whole-percent changes are forwarded
+    assert len(calls) <= 2 + 31
+    assert _job_progress(None)("Zone 1 (30.0m)", 0.5) is None
+
+def test_mva_sweep_is_chunked_with_progress():
+    dem = np.random.default_rng(0).uniform(0, 50, (200, 200)).astype(np.float32)
+    transform = from_origin(-3000, 3000, 30, 30)
+    calls = []
+    mva, r_values, az_values = _compute_mva_polar(
+        dem, transform, radar_h_msl=20.0, max_radius_m=2900.0, center_lat_deg=0.0,
+        progress_callback=lambda step, pct: calls.append(pct)
+    )
+
+    assert len(calls) >= 20
+    assert calls[-1] == 100.0
+    from rangeplotter.geo.earth import effective_earth_radius
+    whole = _mva_polar_chunk(dem, ~transform, 20.0, r_values, az_values, effective_earth_radius(0.0, 1.333))
+    np.testing.assert_array_equal(mva, whole)
+
+def test_run_viewshed_job_uses_worker_state(monkeypatch):
+    import queue
+    from rangeplotter.los import viewshed as vs
+    seen = {}
+
+    def fake_compute(radar, alts, dem_client, config, progress_callback=None, **kwargs):
+        seen.update(dem_client=dem_client, config=config, alts=alts)
+        progress_callback("Downloading DEM", 0.0)
+        return [Polygon() for _ in alts]
+
+    monkeypatch.setattr(vs, "compute_viewsheds", fake_compute)
+    # The initializer ignores SIGINT; keep Ctrl-C working for the test run
+    monkeypatch.setattr("signal.signal", lambda *a: None)
+    q = queue.Queue()
+    client, cfg = MagicMock(), {"cache_dir": "x"}
+    vs.init_viewshed_worker(q, client, cfg)
+    try:
+        assert len(vs.run_viewshed_job(3, MagicMock(), [100.0, 200.0])) == 2
+    finally:
+        vs.init_viewshed_worker(None, None, None)
+
+    assert seen == {"dem_client": client, "config": cfg, "alts": [100.0, 200.0]}
+    assert q.get_nowait() == (3, "Downloading DEM", 0.0)
+
+def test_collect_if_memory_high(monkeypatch):
+    from rangeplotter.los import viewshed as vs
+    collected = []
+    monkeypatch.setattr("gc.collect", lambda: collected.append(1))
+
+    monkeypatch.setattr(vs.psutil, "virtual_memory", lambda: MagicMock(percent=50.0))
+    assert vs._collect_if_memory_high(80.0) is False
+
+    monkeypatch.setattr(vs.psutil, "virtual_memory", lambda: MagicMock(percent=70.0))
+    assert vs._collect_if_memory_high(80.0) is True
+    assert collected == [1]